@@ -279,6 +279,11 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                    default=False,
                    # weakrefs needed, because of get_subclasses()
                    requires=[("translation.rweakref", True)]),
+
+        BoolOption("withintvaluedict",
+                   "use special dict strategies storing unboxed int values "
+                   "for dicts with str or int keys",
+                   default=False),
      ]),
 ])
 
@@ -303,6 +308,7 @@ def set_pypy_opt_level(config, level):
         #config.objspace.std.suggest(newshortcut=True)
         config.objspace.std.suggest(withspecialisedtuple=True)
         config.objspace.std.suggest(withidentitydict=True)
+        config.objspace.std.suggest(withintvaluedict=True)
         #if not IS_64_BITS:
         #    config.objspace.std.suggest(withsmalllong=True)
 
@@ -318,6 +324,7 @@ def set_pypy_opt_level(config, level):
         config.objspace.std.suggest(withrangelist=True)
         config.objspace.std.suggest(withprebuiltchar=True)
         config.objspace.std.suggest(withmapdict=True)
+        config.objspace.std.suggest(withintvaluedict=True)
         if not IS_64_BITS:
             config.objspace.std.suggest(withsmalllong=True)
 
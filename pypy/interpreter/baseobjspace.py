@@ -1035,6 +1035,14 @@ class ObjSpace(object):
         from pypy.objspace.std.listobject import make_empty_list_with_size
         return make_empty_list_with_size(self, sizehint)
 
+    def newdict_hint(self, sizehint):
+        from pypy.objspace.std.dictmultiobject import make_empty_dict_with_size
+        return make_empty_dict_with_size(self, sizehint)
+
+    def newset_hint(self, sizehint):
+        from pypy.objspace.std.setobject import make_empty_set_with_size
+        return make_empty_set_with_size(self, sizehint)
+
     @jit.unroll_safe
     def exception_match(self, w_exc_type, w_check_class):
         """Checks if the given exception type matches 'w_check_class'."""
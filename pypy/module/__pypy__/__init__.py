@@ -76,6 +76,8 @@ class Module(MixedModule):
         'validate_fd'               : 'interp_magic.validate_fd',
         'resizelist_hint'           : 'interp_magic.resizelist_hint',
         'newlist_hint'              : 'interp_magic.newlist_hint',
+        'newdict_hint'              : 'interp_magic.newdict_hint',
+        'newset_hint'               : 'interp_magic.newset_hint',
         'add_memory_pressure'       : 'interp_magic.add_memory_pressure',
         'newdict'                   : 'interp_dict.newdict',
         'reversed_dict'             : 'interp_dict.reversed_dict',
@@ -1,9 +1,10 @@
-from pypy.interpreter.error import OperationError, wrap_oserror
+from pypy.interpreter.error import OperationError, oefmt, wrap_oserror
 from pypy.interpreter.gateway import unwrap_spec
 from pypy.interpreter.pyframe import PyFrame
 from pypy.interpreter.mixedmodule import MixedModule
 from rpython.rlib.objectmodel import we_are_translated
-from pypy.objspace.std.dictmultiobject import W_DictMultiObject
+from pypy.objspace.std.dictmultiobject import (W_DictMultiObject,
+    SizeDictStrategy)
 from pypy.objspace.std.listobject import W_ListObject
 from pypy.objspace.std.setobject import W_BaseSetObject
 from pypy.objspace.std.typeobject import MethodCache
@@ -116,6 +117,49 @@ def resizelist_hint(space, w_iterable, sizehint):
 def newlist_hint(space, sizehint):
     return space.newlist_hint(sizehint)
 
+@unwrap_spec(sizehint=int, kind=str)
+def newdict_hint(space, sizehint, kind='any'):
+    """ newdict_hint(sizehint, kind='any')
+
+    Create an empty dict with preallocated room for sizehint items.
+
+    kind is a string and can be:
+
+    * "any" - the strategy is chosen by the first key, as for {}
+
+    * "bytes", "unicode", "int", "float" - the keys are expected to be all
+      of this type
+
+    * "object" - keys of any type
+    """
+    w_dict = space.newdict_hint(sizehint)
+    assert isinstance(w_dict, W_DictMultiObject)
+    strategy = w_dict.strategy
+    assert isinstance(strategy, SizeDictStrategy)
+    if kind == 'any':
+        pass
+    elif kind == 'bytes':
+        strategy.switch_to_bytes_strategy(w_dict)
+    elif kind == 'unicode':
+        strategy.switch_to_unicode_strategy(w_dict)
+    elif kind == 'int':
+        strategy.switch_to_int_strategy(w_dict)
+    elif kind == 'float':
+        strategy.switch_to_float_strategy(w_dict)
+    elif kind == 'object':
+        strategy.switch_to_object_strategy(w_dict)
+    else:
+        raise oefmt(space.w_TypeError, "unknown kind of dict %s", kind)
+    return w_dict
+
+@unwrap_spec(sizehint=int)
+def newset_hint(space, sizehint):
+    """ newset_hint(sizehint)
+
+    Create an empty set with preallocated room for sizehint items.
+    """
+    return space.newset_hint(sizehint)
+
 @unwrap_spec(debug=bool)
 def set_debug(space, debug):
     space.sys.debug = debug
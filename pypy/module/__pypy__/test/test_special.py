@@ -56,6 +56,8 @@ class AppTest(object):
         assert strategy(l) == "UnicodeListStrategy"
         l = [1.1, 2.2, 3.3]
         assert strategy(l) == "FloatListStrategy"
+        l = [1, 2.2, 3]
+        assert strategy(l) == "IntOrFloatListStrategy"
         l = range(3)
         assert strategy(l) == "SimpleRangeListStrategy"
         l = range(1, 2)
@@ -67,6 +69,34 @@ class AppTest(object):
         o = 5
         raises(TypeError, strategy, 5)
 
+    def test_newdict_hint(self):
+        from __pypy__ import newdict_hint, strategy
+
+        d = newdict_hint(100)
+        assert d == {}
+        assert strategy(d) == "SizeDictStrategy"
+        d["a"] = 1
+        assert strategy(d) == "BytesDictStrategy"
+        assert d == {"a": 1}
+        d = newdict_hint(100, "int")
+        assert strategy(d) == "IntDictStrategy"
+        d["a"] = 1
+        assert strategy(d) == "ObjectDictStrategy"
+        assert d == {"a": 1}
+        assert strategy(newdict_hint(5, "unicode")) == "UnicodeDictStrategy"
+        assert strategy(newdict_hint(5, "object")) == "ObjectDictStrategy"
+        raises(TypeError, newdict_hint, 5, "foo")
+
+    def test_newset_hint(self):
+        from __pypy__ import newset_hint, strategy
+
+        s = newset_hint(100)
+        assert s == set()
+        assert strategy(s) == "SizeSetStrategy"
+        s.add(5)
+        assert strategy(s) == "IntegerSetStrategy"
+        assert s == set([5])
+
     def test_dict_strategy(self):
         from __pypy__ import strategy
 
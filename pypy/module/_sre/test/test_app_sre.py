@@ -995,6 +995,21 @@ class AppTestOptimizations:
         assert re.search("b(\d)", "ababbbab1")
         assert None == re.search("b(\d)", "ababbbab")
 
+    def test_literal_search_skips(self):
+        import re
+        s = "x" * 50 + "b1" + "x" * 50 + "blab2"
+        r1 = re.compile("b(\d)")
+        r2 = re.compile("lab\d")
+        for string in [s, unicode(s), buffer(s)]:
+            assert r1.search(string).span() == (50, 52)
+            assert r1.search(string, 51).span() == (105, 107)
+            assert r2.search(string).span() == (103, 107)
+            assert r2.search(string, 0, 106) is None
+            assert r1.findall(string) == ["1", "2"]
+        m = re.search("lab\d", s)
+        assert m.string == s
+        assert m.group() == "lab2"
+
     def test_repeat_one_literal_tail(self):
         import re
         assert re.search(".+ab", "wowowowawoabwowo")
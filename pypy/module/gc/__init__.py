@@ -10,10 +10,15 @@ class Module(MixedModule):
         'enable_finalizers': 'interp_gc.enable_finalizers',
         'disable_finalizers': 'interp_gc.disable_finalizers',
         'garbage': 'space.newlist([])',
+        'get_stats': 'interp_gc.get_stats',
         #'dump_heap_stats': 'interp_gc.dump_heap_stats',
     }
     appleveldefs = {}
 
+    def startup(self, space):
+        from pypy.module.gc.interp_gc import timestamp_calibration
+        timestamp_calibration.startup()
+
     def __init__(self, space, w_name):
         if (not space.config.translating or
                 space.config.translation.gctransformer == "framework"):
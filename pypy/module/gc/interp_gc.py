@@ -1,6 +1,9 @@
 from pypy.interpreter.gateway import unwrap_spec
 from pypy.interpreter.error import OperationError
 from rpython.rlib import rgc
+from rpython.rlib.rarithmetic import r_longlong
+from rpython.rlib.rtimer import read_timestamp
+import time
 
 
 @unwrap_spec(generation=int)
@@ -48,6 +51,82 @@ def enable_finalizers(space):
 def disable_finalizers(space):
     space.user_del_action.finalizers_lock_count += 1
 
+class TimestampCalibration(object):
+    """The GC measures times with read_timestamp().  To convert them to
+    seconds, we compare with time.time() over the whole run, like
+    _lsprof does."""
+
+    def __init__(self):
+        self.start_time = 0.0
+        self.start_timestamp = r_longlong(0)
+
+    def _cleanup_(self):
+        self.__init__()
+
+    def startup(self):
+        self.start_time = time.time()
+        self.start_timestamp = r_longlong(read_timestamp())
+
+    def seconds_per_tick(self):
+        elapsed_timestamp = r_longlong(read_timestamp()) - self.start_timestamp
+        if elapsed_timestamp <= 0:
+            return 0.0
+        return (time.time() - self.start_time) / float(elapsed_timestamp)
+
+timestamp_calibration = TimestampCalibration()
+
+_stats_counters = [
+    ('minor_collections', rgc.MINOR_COLLECTIONS),
+    ('major_collections', rgc.MAJOR_COLLECTIONS),
+    ('total_memory_released', rgc.TOTAL_MEMORY_RELEASED),
+    ('bytes_promoted', rgc.BYTES_PROMOTED),
+    ('pinned_objects', rgc.PINNED_OBJECTS),
+    ('arena_memory_used', rgc.ARENA_MEMORY_USED),
+    ('arena_memory_allocated', rgc.ARENA_MEMORY_ALLOCATED),
+    ('rawmalloced_memory', rgc.RAWMALLOCED_MEMORY),
+    ]
+_stats_times = [
+    ('minor', rgc.TIME_MINOR, rgc.MAX_TIME_MINOR),
+    ('marking', rgc.TIME_MARKING, rgc.MAX_TIME_MARKING),
+    ('sweeping', rgc.TIME_SWEEPING, rgc.MAX_TIME_SWEEPING),
+    ('finalizing', rgc.TIME_FINALIZING, rgc.MAX_TIME_FINALIZING),
+    ]
+
+def get_stats(space):
+    """Return a dict with statistics about the GC.  The values are all
+    0 if the GC in use doesn't track them.
+
+    The counters are the numbers of minor and completed major
+    collections, and sizes in bytes.  For every phase of the GC, 'xxx_time'
+    and 'max_xxx_time' are the total time spent in that phase and its
+    longest single pause, in seconds.  'pause_histogram' counts the pauses
+    (minor collections and major collection steps) whose duration is below
+    the corresponding entry of 'pause_histogram_limits', and above the
+    previous one; the last entry counts all the longer pauses.
+    """
+    w_stats = space.newdict()
+    for name, stats_no in _stats_counters:
+        value = rgc.get_stats(stats_no)
+        space.setitem_str(w_stats, name, space.int(space.wrap(value)))
+    factor = timestamp_calibration.seconds_per_tick()
+    for name, time_no, max_time_no in _stats_times:
+        space.setitem_str(w_stats, name + '_time',
+                          space.wrap(rgc.get_stats(time_no) * factor))
+        space.setitem_str(w_stats, 'max_' + name + '_time',
+                          space.wrap(rgc.get_stats(max_time_no) * factor))
+    counts_w = []
+    limits_w = []
+    limit = rgc.PAUSE_HISTOGRAM_FIRST
+    for i in range(rgc.PAUSE_HISTOGRAM_BUCKETS):
+        value = rgc.get_stats(rgc.PAUSE_HISTOGRAM + i)
+        counts_w.append(space.int(space.wrap(value)))
+        limits_w.append(space.wrap(limit * factor))
+        limit *= 2.0
+    space.setitem_str(w_stats, 'pause_histogram', space.newlist(counts_w))
+    space.setitem_str(w_stats, 'pause_histogram_limits',
+                      space.newlist(limits_w[:-1]))
+    return w_stats
+
 # ____________________________________________________________
 
 @unwrap_spec(filename='str0')
@@ -70,6 +70,23 @@ class AppTestGC(object):
         gc.enable()
         assert gc.isenabled()
 
+    def test_get_stats(self):
+        import gc
+        stats = gc.get_stats()
+        assert isinstance(stats, dict)
+        for key in ['minor_collections', 'major_collections',
+                    'total_memory_released', 'bytes_promoted',
+                    'pinned_objects', 'arena_memory_used',
+                    'arena_memory_allocated', 'rawmalloced_memory']:
+            assert stats[key] >= 0
+        for phase in ['minor', 'marking', 'sweeping', 'finalizing']:
+            assert 0.0 <= stats['max_%s_time' % phase] <= (
+                stats['%s_time' % phase])
+        assert len(stats['pause_histogram']) == 16
+        limits = stats['pause_histogram_limits']
+        assert len(limits) == 15
+        assert limits == sorted(limits)
+
 
 class AppTestGcDumpHeap(object):
     pytestmark = py.test.mark.xfail(run=False)
@@ -4,6 +4,8 @@ over all the array elements.
 """
 from pypy.interpreter.error import OperationError
 from rpython.rlib import jit
+from rpython.rlib.objectmodel import specialize
+from rpython.rlib.rawstorage import raw_storage_getitem, raw_storage_setitem
 from rpython.rlib.rstring import StringBuilder
 from rpython.rtyper.lltypesystem import lltype, rffi
 from pypy.module.micronumpy import support, constants as NPY
@@ -52,6 +54,96 @@ def call2(space, shape, func, calc_dtype, w_lhs, w_rhs, out):
         out_state = out_iter.next(out_state)
     return out
 
+# Binary ufuncs on float64 arrays that are C-contiguous, aligned and in
+# native byte order don't need the iterators of call2(): they are computed
+# by a plain loop over the raw storage, which the C compiler can turn into
+# SIMD instructions.  One of the two operands can also be a single value.
+
+def _is_contiguous_float64(w_arr, shape):
+    dtype = w_arr.get_dtype()
+    flags = w_arr.get_flags()
+    return (dtype.num == NPY.DOUBLE and dtype.is_native() and
+            flags & NPY.ARRAY_C_CONTIGUOUS != 0 and
+            flags & NPY.ARRAY_ALIGNED != 0 and
+            w_arr.get_shape() == shape)
+
+def call2_contiguous(space, name, calc_dtype, w_lhs, w_rhs, out):
+    """Compute the ufunc 'name' with a fast loop if possible, and return
+    True; or return False if call2() must be used instead.
+    """
+    shape = out.get_shape()
+    if not (calc_dtype.num == NPY.DOUBLE and
+            _is_contiguous_float64(out, shape)):
+        return False
+    if name == 'add':
+        return _call2_contiguous('add', space, calc_dtype, w_lhs, w_rhs, out)
+    if name == 'subtract':
+        return _call2_contiguous('sub', space, calc_dtype, w_lhs, w_rhs, out)
+    if name == 'multiply':
+        return _call2_contiguous('mul', space, calc_dtype, w_lhs, w_rhs, out)
+    return False
+
+@specialize.arg(0)
+def _call2_contiguous(op, space, calc_dtype, w_lhs, w_rhs, out):
+    shape = out.get_shape()
+    size = out.get_size()
+    if _is_contiguous_float64(w_lhs, shape):
+        if _is_contiguous_float64(w_rhs, shape):
+            with w_lhs.implementation as lstorage:
+                with w_rhs.implementation as rstorage:
+                    with out.implementation as ostorage:
+                        _float64_kernel(op, True, True, size,
+                                        lstorage, w_lhs.get_start(), 0.0,
+                                        rstorage, w_rhs.get_start(), 0.0,
+                                        ostorage, out.get_start())
+            return True
+        if w_rhs.get_size() == 1:
+            rvalue = _float64_scalar(space, calc_dtype, w_rhs)
+            with w_lhs.implementation as lstorage:
+                with out.implementation as ostorage:
+                    _float64_kernel(op, True, False, size,
+                                    lstorage, w_lhs.get_start(), 0.0,
+                                    ostorage, 0, rvalue,
+                                    ostorage, out.get_start())
+            return True
+    elif w_lhs.get_size() == 1 and _is_contiguous_float64(w_rhs, shape):
+        lvalue = _float64_scalar(space, calc_dtype, w_lhs)
+        with w_rhs.implementation as rstorage:
+            with out.implementation as ostorage:
+                _float64_kernel(op, False, True, size,
+                                ostorage, 0, lvalue,
+                                rstorage, w_rhs.get_start(), 0.0,
+                                ostorage, out.get_start())
+        return True
+    return False
+
+def _float64_scalar(space, calc_dtype, w_arr):
+    from pypy.module.micronumpy.boxes import W_Float64Box
+    w_value = w_arr.get_scalar_value().convert_to(space, calc_dtype)
+    assert isinstance(w_value, W_Float64Box)
+    return w_value.value
+
+@jit.dont_look_inside
+@specialize.arg(0, 1, 2)
+def _float64_kernel(op, lhs_is_array, rhs_is_array, size,
+                    lstorage, lstart, lvalue, rstorage, rstart, rvalue,
+                    ostorage, ostart):
+    i = 0
+    while i < size:
+        ofs = i * 8
+        if lhs_is_array:
+            lvalue = raw_storage_getitem(lltype.Float, lstorage, lstart + ofs)
+        if rhs_is_array:
+            rvalue = raw_storage_getitem(lltype.Float, rstorage, rstart + ofs)
+        if op == 'add':
+            res = lvalue + rvalue
+        elif op == 'sub':
+            res = lvalue - rvalue
+        else:
+            res = lvalue * rvalue
+        raw_storage_setitem(ostorage, ostart + ofs, res)
+        i += 1
+
 call1_driver = jit.JitDriver(
     name='numpy_call1',
     greens=['shapelen', 'func', 'calc_dtype', 'res_dtype'],
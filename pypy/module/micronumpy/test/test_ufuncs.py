@@ -459,6 +459,35 @@ class AppTestUfuncs(BaseNumpyAppTest):
         x = Obj()
         assert type(add(x, 0)) is str
 
+    def test_contiguous_float64(self):
+        from numpy import arange, array, add, subtract, multiply, dtype
+
+        a = arange(10.0).reshape(2, 5)
+        b = arange(10.0, 20.0).reshape(2, 5)
+        for func, op in [(add, lambda x, y: x + y),
+                         (subtract, lambda x, y: x - y),
+                         (multiply, lambda x, y: x * y)]:
+            c = func(a, b)
+            assert c.shape == (2, 5)
+            assert c.tolist() == [[op(x, y) for x, y in zip(r1, r2)]
+                                  for r1, r2 in zip(a.tolist(), b.tolist())]
+            assert func(a, 2.5).tolist() == [[op(x, 2.5) for x in r]
+                                             for r in a.tolist()]
+            assert func(2.5, a).tolist() == [[op(2.5, x) for x in r]
+                                             for r in a.tolist()]
+        # in-place, and overlapping input and output
+        c = arange(6.0)
+        add(c, c, out=c)
+        assert c.tolist() == [0.0, 2.0, 4.0, 6.0, 8.0, 10.0]
+        add(c[:-1], 1.0, out=c[1:])
+        assert c.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+        # not contiguous, or not in native byte order
+        assert add(a[:, ::2], b[:, ::2]).tolist() == [[10.0, 14.0, 18.0],
+                                                      [20.0, 24.0, 28.0]]
+        x = array([1.0, 2.0], dtype=dtype('float64').newbyteorder())
+        assert add(x, x).tolist() == [2.0, 4.0]
+        assert add(arange(3), 0.5).tolist() == [0.5, 1.5, 2.5]
+
     def test_divide(self):
         from numpy import array, divide
 
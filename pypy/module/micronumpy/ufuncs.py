@@ -627,8 +627,10 @@ class W_Ufunc2(W_Ufunc):
                                            w_instance=out_subtype)
         else:
             w_res = out
-        w_res = loop.call2(space, new_shape, self.func, calc_dtype,
-                           w_lhs, w_rhs, w_res)
+        if not loop.call2_contiguous(space, self.name, calc_dtype,
+                                     w_lhs, w_rhs, w_res):
+            w_res = loop.call2(space, new_shape, self.func, calc_dtype,
+                               w_lhs, w_rhs, w_res)
         if out is None:
             if w_res.is_scalar():
                 return w_res.get_scalar_value()
@@ -14,9 +14,13 @@ class Module(MixedModule):
         'get_stats_snapshot': 'interp_resop.get_stats_snapshot',
         'enable_debug': 'interp_resop.enable_debug',
         'disable_debug': 'interp_resop.disable_debug',
+        'get_guard_profile': 'interp_resop.get_guard_profile',
+        'enable_guard_profiling': 'interp_resop.enable_guard_profiling',
+        'disable_guard_profiling': 'interp_resop.disable_guard_profiling',
         'ResOperation': 'interp_resop.WrappedOp',
         'DebugMergePoint': 'interp_resop.DebugMergePoint',
         'JitLoopInfo': 'interp_resop.W_JitLoopInfo',
+        'JitGuardInfo': 'interp_resop.W_JitGuardInfo',
         'Box': 'interp_resop.WrappedBox',
         'PARAMETER_DOCS': 'space.wrap(rpython.rlib.jit.PARAMETER_DOCS)',
     }
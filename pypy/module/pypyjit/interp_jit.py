@@ -136,10 +136,13 @@ def set_param(space, __args__):
     for key, w_value in kwds_w.items():
         if key == 'enable_opts':
             jit.set_param(None, 'enable_opts', space.str_w(w_value))
+        elif key == 'warmup_profile':
+            jit.set_param(None, 'warmup_profile', space.str_w(w_value))
         else:
             intval = space.int_w(w_value)
             for name, _ in unroll_parameters:
-                if name == key and name != 'enable_opts':
+                if (name == key and name != 'enable_opts' and
+                        name != 'warmup_profile'):
                     jit.set_param(None, name, intval)
                     break
             else:
@@ -405,6 +405,77 @@ def get_stats_snapshot(space):
     return space.wrap(W_JitInfoSnapshot(space, w_times, w_counters,
                                         w_counter_times))
 
+class W_JitGuardInfo(W_Root):
+    """ Failure statistics of a single guard
+    """
+    def __init__(self, space, type, loop_no, bridge_no, guard_no, opname,
+                 location, fail_count, has_bridge):
+        self.type = type
+        self.loop_no = loop_no
+        self.bridge_no = bridge_no
+        self.guard_no = guard_no
+        self.opname = opname
+        self.location = location
+        self.fail_count = fail_count
+        self.has_bridge = has_bridge
+
+    def descr_repr(self, space):
+        return space.wrap('<JitGuardInfo %s at %s, %d failures>' %
+                          (self.opname, self.location, self.fail_count))
+
+W_JitGuardInfo.typedef = TypeDef(
+    'JitGuardInfo',
+    __doc__ = W_JitGuardInfo.__doc__,
+    type = interp_attrproperty('type', cls=W_JitGuardInfo,
+                               doc="Type of the trace, loop or bridge"),
+    loop_no = interp_attrproperty('loop_no', cls=W_JitGuardInfo,
+                                  doc="Loop cardinal number"),
+    bridge_no = interp_attrproperty('bridge_no', cls=W_JitGuardInfo,
+                                    doc="bridge number (if in a bridge)"),
+    guard_no = interp_attrproperty('guard_no', cls=W_JitGuardInfo,
+               doc="Guard number, the bridge_no of a bridge attached to it"),
+    opname = interp_attrproperty('opname', cls=W_JitGuardInfo,
+                                 doc="Name of the guard operation"),
+    location = interp_attrproperty('location', cls=W_JitGuardInfo,
+                                   doc="Source location of the guard"),
+    fail_count = interp_attrproperty('fail_count', cls=W_JitGuardInfo,
+                 doc="Number of failures since enable_guard_profiling()"),
+    has_bridge = interp_attrproperty('has_bridge', cls=W_JitGuardInfo,
+                                     doc="Whether a bridge is attached"),
+    __repr__ = interp2app(W_JitGuardInfo.descr_repr),
+)
+W_JitGuardInfo.typedef.acceptable_as_base_class = False
+
+def get_guard_profile(space):
+    """ Get a list of JitGuardInfo, one for every guard of every loop and
+    bridge currently alive. Failures are only counted between
+    enable_guard_profiling() and disable_guard_profiling().
+    """
+    ll_guards = jit_hooks.stats_get_guard_profile(None)
+    guards_w = []
+    for i in range(len(ll_guards)):
+        item = ll_guards[i]
+        if item.type == 'b':
+            type = 'bridge'
+        else:
+            type = 'loop'
+        guards_w.append(space.wrap(W_JitGuardInfo(space, type,
+            item.loop_no, item.bridge_no, item.guard_no, hlstr(item.opname),
+            hlstr(item.location), item.fail_count, item.has_bridge)))
+    return space.newlist(guards_w)
+
+def enable_guard_profiling(space):
+    """ Start counting guard failures, from zero. Cheap enough to leave on
+    for a sampling window in production.
+    """
+    jit_hooks.stats_set_guard_profiling(None, True)
+
+def disable_guard_profiling(space):
+    """ Stop counting guard failures. The counts collected so far stay
+    available from get_guard_profile().
+    """
+    jit_hooks.stats_set_guard_profiling(None, False)
+
 def enable_debug(space):
     """ Set the jit debugging - completely necessary for some stats to work,
     most notably assembler counters.
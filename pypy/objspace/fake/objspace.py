@@ -42,6 +42,9 @@ class W_MyObject(W_Root):
     def buffer_w(self, space, flags):
         return StringBuffer("foobar")
 
+    def readbuf_w(self, space):
+        return StringBuffer("foobar")
+
     def str_w(self, space):
         return NonConstant("foobar")
 
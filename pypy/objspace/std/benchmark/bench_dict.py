@@ -45,8 +45,36 @@ def bench_simple_dict(SIZE = 10000):
     count_operation("Existing key access", lambda : rand_keys(lookup_keys))
     return test_d
 
+def bench_keys(name, keys, missing_keys, REPEAT=100):
+    print name
+    values = range(len(keys))
+    test_d = count_operation("Creation", lambda : dict(zip(keys, values)))
+
+    def lookup(keys):
+        for i in xrange(REPEAT):
+            for key in keys:
+                test_d.get(key)
+
+    count_operation("Random key access", lambda : lookup(missing_keys))
+    count_operation("Existing key access", lambda : lookup(keys))
+    return test_d
+
+def bench_float_dict(SIZE = 10000):
+    keys = [random.random() * 1000 for i in xrange(SIZE)]
+    missing_keys = [random.random() * 1000 for i in xrange(1000)]
+    return bench_keys("Float keys", keys, missing_keys)
+
+class Plain(object):
+    pass
+
+def bench_identity_dict(SIZE = 10000):
+    keys = [Plain() for i in xrange(SIZE)]
+    missing_keys = [Plain() for i in xrange(1000)]
+    return bench_keys("Instance keys", keys, missing_keys)
+
 if __name__ == '__main__':
-    test_d = bench_simple_dict()
     import __pypy__
-    print __pypy__.internal_repr(test_d)
-    print __pypy__.internal_repr(test_d.iterkeys())
+    for bench in [bench_simple_dict, bench_float_dict, bench_identity_dict]:
+        test_d = bench()
+        print __pypy__.internal_repr(test_d)
+        print __pypy__.internal_repr(test_d.iterkeys())
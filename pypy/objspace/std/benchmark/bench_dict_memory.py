@@ -0,0 +1,53 @@
+
+""" memory used by big counters, with and without unboxed int values.
+Needs a translated pypy (for the gc.get_rpy_* functions).
+"""
+
+import gc, sys
+
+def storage_memory(d):
+    # the referents of a dict are its strategy, which is shared and would
+    # lead us to the whole object space, and its storage, which for a big
+    # dict is by far the biggest one
+    best_size = -1
+    for ref in gc.get_rpy_referents(d):
+        size = sum([gc.get_rpy_memory_usage(sub)
+                    for sub in gc.get_rpy_referents(ref)])
+        if size > best_size:
+            best_size = size
+            storage = ref
+    total = gc.get_rpy_memory_usage(storage)
+    for array in gc.get_rpy_referents(storage):     # entries, indexes
+        total += gc.get_rpy_memory_usage(array)
+        for item in gc.get_rpy_referents(array):    # keys, boxed values
+            total += gc.get_rpy_memory_usage(item)
+    return total
+
+def make_counter(keys, boxed):
+    d = {}
+    if boxed:
+        # storing another value once switches to the strategy with boxes
+        d[keys[0]] = None
+    for i, key in enumerate(keys):
+        d[key] = i * 7
+    return d
+
+def bench(name, keys):
+    import __pypy__
+    sizes = []
+    for boxed in [False, True]:
+        d = make_counter(keys, boxed)
+        size = storage_memory(d)
+        sizes.append(size)
+        strategy = __pypy__.internal_repr(d).split('(')[1].split(')')[0]
+        print "%s, %s: %d bytes, %.1f per entry" % (
+            name, strategy, size, float(size) / len(keys))
+    print "saved by the unboxed values: %.1f bytes per entry" % (
+        float(sizes[1] - sizes[0]) / len(keys))
+
+if __name__ == '__main__':
+    SIZE = 100000
+    if len(sys.argv) > 1:
+        SIZE = int(sys.argv[1])
+    bench("str keys", ["key%d" % i for i in xrange(SIZE)])
+    bench("int keys", range(SIZE * 3, SIZE * 4))
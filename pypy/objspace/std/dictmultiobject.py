@@ -1,8 +1,11 @@
 """The builtin dict implementation"""
 
+import sys
+
 from rpython.rlib import jit, rerased, objectmodel
 from rpython.rlib.debug import mark_dict_non_null
 from rpython.rlib.objectmodel import newlist_hint, r_dict, specialize
+from rpython.rlib.rfloat import isnan
 from rpython.tool.sourcetools import func_renamer, func_with_new_name
 
 from pypy.interpreter.baseobjspace import W_Root
@@ -113,15 +116,15 @@ class W_DictMultiObject(W_Root):
         if w_fill is None:
             w_fill = space.w_None
         if space.is_w(w_type, space.w_dict):
-            w_dict = W_DictMultiObject.allocate_and_init_instance(space,
-                                                                  w_type)
-
             byteslist = space.listview_bytes(w_keys)
             if byteslist is not None:
+                w_dict = make_empty_dict_with_size(space, len(byteslist))
                 for key in byteslist:
                     w_dict.setitem_str(key, w_fill)
             else:
-                for w_key in space.listview(w_keys):
+                keys_w = space.listview(w_keys)
+                w_dict = make_empty_dict_with_size(space, len(keys_w))
+                for w_key in keys_w:
                     w_dict.setitem(w_key, w_fill)
         else:
             w_dict = space.call_function(w_type)
@@ -537,52 +540,67 @@ class EmptyDictStrategy(DictStrategy):
     def get_empty_storage(self):
         return self.erase(None)
 
-    def switch_to_correct_strategy(self, w_dict, w_key):
+    def get_sizehint(self):
+        return -1
+
+    def _switch_to(self, w_dict, strategy):
+        w_dict.strategy = strategy
+        w_dict.dstorage = strategy.get_empty_storage()
+        sizehint = self.get_sizehint()
+        if sizehint > 0:
+            strategy.prepare_update(w_dict, sizehint)
+
+    def switch_to_correct_strategy(self, w_dict, w_key, w_value=None):
         withidentitydict = self.space.config.objspace.std.withidentitydict
+        unbox_value = (self.space.config.objspace.std.withintvaluedict and
+                       w_value is not None and
+                       is_unboxable_int_value(self.space, w_value))
         if type(w_key) is self.space.StringObjectCls:
-            self.switch_to_bytes_strategy(w_dict)
+            if unbox_value:
+                self.switch_to_bytes_int_strategy(w_dict)
+            else:
+                self.switch_to_bytes_strategy(w_dict)
             return
         elif type(w_key) is self.space.UnicodeObjectCls:
             self.switch_to_unicode_strategy(w_dict)
             return
         w_type = self.space.type(w_key)
         if self.space.is_w(w_type, self.space.w_int):
-            self.switch_to_int_strategy(w_dict)
+            if unbox_value:
+                self.switch_to_int_int_strategy(w_dict)
+            else:
+                self.switch_to_int_strategy(w_dict)
+        elif self.space.is_w(w_type, self.space.w_float):
+            self.switch_to_float_strategy(w_dict)
         elif withidentitydict and w_type.compares_by_identity():
             self.switch_to_identity_strategy(w_dict)
         else:
             self.switch_to_object_strategy(w_dict)
 
     def switch_to_bytes_strategy(self, w_dict):
-        strategy = self.space.fromcache(BytesDictStrategy)
-        storage = strategy.get_empty_storage()
-        w_dict.strategy = strategy
-        w_dict.dstorage = storage
+        self._switch_to(w_dict, self.space.fromcache(BytesDictStrategy))
+
+    def switch_to_bytes_int_strategy(self, w_dict):
+        self._switch_to(w_dict, self.space.fromcache(BytesIntDictStrategy))
 
     def switch_to_unicode_strategy(self, w_dict):
-        strategy = self.space.fromcache(UnicodeDictStrategy)
-        storage = strategy.get_empty_storage()
-        w_dict.strategy = strategy
-        w_dict.dstorage = storage
+        self._switch_to(w_dict, self.space.fromcache(UnicodeDictStrategy))
 
     def switch_to_int_strategy(self, w_dict):
-        strategy = self.space.fromcache(IntDictStrategy)
-        storage = strategy.get_empty_storage()
-        w_dict.strategy = strategy
-        w_dict.dstorage = storage
+        self._switch_to(w_dict, self.space.fromcache(IntDictStrategy))
+
+    def switch_to_int_int_strategy(self, w_dict):
+        self._switch_to(w_dict, self.space.fromcache(IntIntDictStrategy))
+
+    def switch_to_float_strategy(self, w_dict):
+        self._switch_to(w_dict, self.space.fromcache(FloatDictStrategy))
 
     def switch_to_identity_strategy(self, w_dict):
         from pypy.objspace.std.identitydict import IdentityDictStrategy
-        strategy = self.space.fromcache(IdentityDictStrategy)
-        storage = strategy.get_empty_storage()
-        w_dict.strategy = strategy
-        w_dict.dstorage = storage
+        self._switch_to(w_dict, self.space.fromcache(IdentityDictStrategy))
 
     def switch_to_object_strategy(self, w_dict):
-        strategy = self.space.fromcache(ObjectDictStrategy)
-        storage = strategy.get_empty_storage()
-        w_dict.strategy = strategy
-        w_dict.dstorage = storage
+        self._switch_to(w_dict, self.space.fromcache(ObjectDictStrategy))
 
     def getitem(self, w_dict, w_key):
         #return w_value or None
@@ -597,16 +615,20 @@ class EmptyDictStrategy(DictStrategy):
 
     def setdefault(self, w_dict, w_key, w_default):
         # here the dict is always empty
-        self.switch_to_correct_strategy(w_dict, w_key)
+        self.switch_to_correct_strategy(w_dict, w_key, w_default)
         w_dict.setitem(w_key, w_default)
         return w_default
 
     def setitem(self, w_dict, w_key, w_value):
-        self.switch_to_correct_strategy(w_dict, w_key)
+        self.switch_to_correct_strategy(w_dict, w_key, w_value)
         w_dict.setitem(w_key, w_value)
 
     def setitem_str(self, w_dict, key, w_value):
-        self.switch_to_bytes_strategy(w_dict)
+        if (self.space.config.objspace.std.withintvaluedict and
+                is_unboxable_int_value(self.space, w_value)):
+            self.switch_to_bytes_int_strategy(w_dict)
+        else:
+            self.switch_to_bytes_strategy(w_dict)
         w_dict.setitem_str(key, w_value)
 
     def delitem(self, w_dict, w_key):
@@ -641,6 +663,23 @@ class EmptyDictStrategy(DictStrategy):
         return iter([])
 
 
+class SizeDictStrategy(EmptyDictStrategy):
+    """Like empty, but when the first item is stored, room for sizehint
+    items is preallocated in the storage of the new strategy."""
+    def __init__(self, space, sizehint):
+        self.sizehint = sizehint
+        EmptyDictStrategy.__init__(self, space)
+
+    def get_sizehint(self):
+        return self.sizehint
+
+
+def make_empty_dict_with_size(space, sizehint):
+    strategy = SizeDictStrategy(space, sizehint)
+    storage = strategy.get_empty_storage()
+    return W_DictMultiObject(space, strategy, storage)
+
+
 # Iterator Implementation base classes
 
 def _new_next(TP):
@@ -1179,6 +1218,254 @@ class IntDictStrategy(AbstractTypedStrategy, DictStrategy):
 create_iterator_classes(IntDictStrategy)
 
 
+class FloatDictStrategy(AbstractTypedStrategy, DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("float")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, unwrapped):
+        return self.space.wrap(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.float_w(wrapped)
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return space.is_w(space.type(w_obj), space.w_float)
+
+    def _never_equal_to(self, w_lookup_type):
+        space = self.space
+        # ints, longs and bools can be equal to a float
+        return (space.is_w(w_lookup_type, space.w_NoneType) or
+                space.is_w(w_lookup_type, space.w_str) or
+                space.is_w(w_lookup_type, space.w_unicode)
+                )
+
+    # A NaN key is only found again by identity, which the unwrapped
+    # storage cannot do.  Lookups of a NaN simply find nothing, but storing
+    # one switches to the object strategy.
+
+    def setitem(self, w_dict, w_key, w_value):
+        if self.is_correct_type(w_key) and isnan(self.unwrap(w_key)):
+            self.switch_to_object_strategy(w_dict)
+            w_dict.setitem(w_key, w_value)
+            return
+        AbstractTypedStrategy.setitem(self, w_dict, w_key, w_value)
+
+    def setdefault(self, w_dict, w_key, w_default):
+        if self.is_correct_type(w_key) and isnan(self.unwrap(w_key)):
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.setdefault(w_key, w_default)
+        return AbstractTypedStrategy.setdefault(self, w_dict, w_key,
+                                                w_default)
+
+    def wrapkey(space, key):
+        return space.wrap(key)
+
+create_iterator_classes(FloatDictStrategy)
+
+
+# ____________________________________________________________
+# strategies storing unwrapped int values, with config.withintvaluedict
+
+# returned by lookups when the key is not there; never stored unwrapped
+MISSING_INT = -sys.maxint - 1
+
+def is_unboxable_int_value(space, w_value):
+    return (space.is_w(space.type(w_value), space.w_int) and
+            space.int_w(w_value) != MISSING_INT)
+
+
+class AbstractIntValueStrategy(object):
+    """Mixin for the strategies that store exact ints as unwrapped values,
+    e.g. for big counters.  The values are boxed again every time they are
+    read.  Storing any other value switches to the strategy returned by
+    get_boxed_strategy(), which has the same keys and wrapped values.
+    """
+    _mixin_ = True
+
+    def get_boxed_strategy(self):
+        raise NotImplementedError("abstract base class")
+
+    def wrapvalue(space, value):
+        return space.wrap(value)
+
+    def _getitem_unwrapped(self, w_dict, key):
+        value = self.unerase(w_dict.dstorage).get(key, MISSING_INT)
+        if value == MISSING_INT:
+            return None
+        return self.space.wrap(value)
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        if self.is_correct_type(w_key):
+            return self._getitem_unwrapped(w_dict, self.unwrap(w_key))
+        elif self._never_equal_to(space.type(w_key)):
+            return None
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+    def setitem(self, w_dict, w_key, w_value):
+        if is_unboxable_int_value(self.space, w_value):
+            if self.is_correct_type(w_key):
+                self.unerase(w_dict.dstorage)[self.unwrap(w_key)] = (
+                    self.space.int_w(w_value))
+                return
+            self.switch_to_object_strategy(w_dict)
+        else:
+            self.switch_to_boxed_strategy(w_dict)
+        w_dict.setitem(w_key, w_value)
+
+    def setdefault(self, w_dict, w_key, w_default):
+        if self.is_correct_type(w_key):
+            d = self.unerase(w_dict.dstorage)
+            key = self.unwrap(w_key)
+            value = d.get(key, MISSING_INT)
+            if value != MISSING_INT:
+                return self.space.wrap(value)
+            if is_unboxable_int_value(self.space, w_default):
+                d[key] = self.space.int_w(w_default)
+                return w_default
+            self.switch_to_boxed_strategy(w_dict)
+        else:
+            self.switch_to_object_strategy(w_dict)
+        return w_dict.setdefault(w_key, w_default)
+
+    def values(self, w_dict):
+        space = self.space
+        return [space.wrap(value)
+                for value in self.unerase(w_dict.dstorage).itervalues()]
+
+    def items(self, w_dict):
+        space = self.space
+        d = self.unerase(w_dict.dstorage)
+        return [space.newtuple([self.wrap(key), space.wrap(value)])
+                for (key, value) in d.iteritems()]
+
+    def popitem(self, w_dict):
+        key, value = self.unerase(w_dict.dstorage).popitem()
+        return (self.wrap(key), self.space.wrap(value))
+
+    def switch_to_boxed_strategy(self, w_dict):
+        d = self.unerase(w_dict.dstorage)
+        strategy = self.get_boxed_strategy()
+        d_new = strategy.unerase(strategy.get_empty_storage())
+        for key, value in d.iteritems():
+            d_new[key] = self.space.wrap(value)
+        w_dict.strategy = strategy
+        w_dict.dstorage = strategy.erase(d_new)
+
+    def switch_to_object_strategy(self, w_dict):
+        d = self.unerase(w_dict.dstorage)
+        strategy = self.space.fromcache(ObjectDictStrategy)
+        d_new = strategy.unerase(strategy.get_empty_storage())
+        for key, value in d.iteritems():
+            d_new[self.wrap(key)] = self.space.wrap(value)
+        w_dict.strategy = strategy
+        w_dict.dstorage = strategy.erase(d_new)
+
+
+class BytesIntDictStrategy(AbstractIntValueStrategy, AbstractTypedStrategy,
+                           DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("bytes_int")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def get_boxed_strategy(self):
+        return self.space.fromcache(BytesDictStrategy)
+
+    def wrap(self, unwrapped):
+        return self.space.wrap(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.str_w(wrapped)
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return space.is_w(space.type(w_obj), space.w_str)
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def _never_equal_to(self, w_lookup_type):
+        return _never_equal_to_string(self.space, w_lookup_type)
+
+    def setitem_str(self, w_dict, key, w_value):
+        assert key is not None
+        if is_unboxable_int_value(self.space, w_value):
+            self.unerase(w_dict.dstorage)[key] = self.space.int_w(w_value)
+        else:
+            self.switch_to_boxed_strategy(w_dict)
+            w_dict.setitem_str(key, w_value)
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        # same performance hack as in BytesDictStrategy
+        if type(w_key) is space.StringObjectCls:
+            return self.getitem_str(w_dict, w_key.unwrap(space))
+        return AbstractIntValueStrategy.getitem(self, w_dict, w_key)
+
+    def getitem_str(self, w_dict, key):
+        assert key is not None
+        return self._getitem_unwrapped(w_dict, key)
+
+    def listview_bytes(self, w_dict):
+        return self.unerase(w_dict.dstorage).keys()
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_bytes(self.listview_bytes(w_dict))
+
+    def wrapkey(space, key):
+        return space.wrap(key)
+
+create_iterator_classes(BytesIntDictStrategy)
+
+
+class IntIntDictStrategy(AbstractIntValueStrategy, AbstractTypedStrategy,
+                         DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("int_int")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def get_boxed_strategy(self):
+        return self.space.fromcache(IntDictStrategy)
+
+    def wrap(self, unwrapped):
+        return self.space.wrap(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.int_w(wrapped)
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return space.is_w(space.type(w_obj), space.w_int)
+
+    def _never_equal_to(self, w_lookup_type):
+        space = self.space
+        return (space.is_w(w_lookup_type, space.w_NoneType) or
+                space.is_w(w_lookup_type, space.w_str) or
+                space.is_w(w_lookup_type, space.w_unicode)
+                )
+
+    def listview_int(self, w_dict):
+        return self.unerase(w_dict.dstorage).keys()
+
+    def wrapkey(space, key):
+        return space.wrap(key)
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_int(self.listview_int(w_dict))
+
+create_iterator_classes(IntIntDictStrategy)
+
+
 def update1(space, w_dict, w_data):
     if isinstance(w_data, W_DictMultiObject):    # optimization case only
         update1_dict_dict(space, w_dict, w_data)
@@ -1199,12 +1486,16 @@ def update1_dict_dict(space, w_dict, w_data):
 
 
 def update1_pairs(space, w_dict, data_w):
-    for w_pair in data_w:
-        pair = space.fixedview(w_pair)
+    # like rev_update1_dict_dict(), call prepare_update() after the first
+    # setitem(), which chooses the strategy
+    for i in range(len(data_w)):
+        pair = space.fixedview(data_w[i])
         if len(pair) != 2:
             raise oefmt(space.w_ValueError, "sequence of pairs expected")
         w_key, w_value = pair
         w_dict.setitem(w_key, w_value)
+        if i == 0:
+            w_dict.strategy.prepare_update(w_dict, len(data_w) - 1)
 
 
 def update1_keys(space, w_dict, w_data, data_w):
@@ -74,7 +74,16 @@ class IdentityDictStrategy(AbstractTypedStrategy, DictStrategy):
         return w_type.compares_by_identity()
 
     def _never_equal_to(self, w_lookup_type):
-        return False
+        # like IdentitySetStrategy.may_contain_equal_elements(): the builtin
+        # types that compare by value are never equal to our keys, so
+        # looking them up doesn't need to switch to ObjectDictStrategy
+        space = self.space
+        return (space.is_w(w_lookup_type, space.w_int) or
+                space.is_w(w_lookup_type, space.w_long) or
+                space.is_w(w_lookup_type, space.w_bool) or
+                space.is_w(w_lookup_type, space.w_float) or
+                space.is_w(w_lookup_type, space.w_str) or
+                space.is_w(w_lookup_type, space.w_unicode))
 
     def w_keys(self, w_dict):
         return self.space.newlist(self.unerase(w_dict.dstorage).keys())
@@ -21,6 +21,9 @@ class EmptyKwargsDictStrategy(EmptyDictStrategy):
         w_dict.strategy = strategy
         w_dict.dstorage = storage
 
+    def switch_to_bytes_int_strategy(self, w_dict):
+        self.switch_to_bytes_strategy(w_dict)
+
 
 class KwargsDictStrategy(DictStrategy):
     erase, unerase = rerased.new_erasing_pair("kwargsdict")
@@ -10,7 +10,7 @@ http://morepypy.blogspot.com/2011/10/more-compact-lists-with-list-strategies.htm
 import operator
 import sys
 
-from rpython.rlib import debug, jit, rerased
+from rpython.rlib import debug, jit, rerased, longlong2float
 from rpython.rlib.listsort import make_timsort_class
 from rpython.rlib.objectmodel import (
     import_from_mixin, instantiate, newlist_hint, resizelist_hint, specialize)
@@ -101,6 +101,19 @@ def get_strategy_from_list_objects(space, list_w, sizehint):
     else:
         return space.fromcache(FloatListStrategy)
 
+    # check for a mix of ints and floats
+    for w_obj in list_w:
+        if type(w_obj) is W_IntObject:
+            if not longlong2float.can_encode_int32(space.int_w(w_obj)):
+                break
+        elif type(w_obj) is W_FloatObject:
+            if not longlong2float.can_encode_float(space.float_w(w_obj)):
+                break
+        else:
+            break
+    else:
+        return space.fromcache(IntOrFloatListStrategy)
+
     return space.fromcache(ObjectListStrategy)
 
 
@@ -1289,6 +1302,10 @@ class AbstractUnwrappedStrategy(object):
     def list_is_correct_type(self, w_list):
         raise NotImplementedError("abstract base class")
 
+    def switch_to_next_strategy(self, w_list, w_sample_item):
+        # called when 'w_sample_item' cannot be stored in w_list
+        w_list.switch_to_object_strategy()
+
     @jit.look_inside_iff(lambda space, w_list, list_w:
             jit.loop_unrolling_heuristic(list_w, len(list_w), UNROLL_CUTOFF))
     def init_from_list_w(self, w_list, list_w):
@@ -1386,7 +1403,7 @@ class AbstractUnwrappedStrategy(object):
             self.unerase(w_list.lstorage).append(self.unwrap(w_item))
             return
 
-        w_list.switch_to_object_strategy()
+        self.switch_to_next_strategy(w_list, w_item)
         w_list.append(w_item)
 
     def insert(self, w_list, index, w_item):
@@ -1396,7 +1413,7 @@ class AbstractUnwrappedStrategy(object):
             l.insert(index, self.unwrap(w_item))
             return
 
-        w_list.switch_to_object_strategy()
+        self.switch_to_next_strategy(w_list, w_item)
         w_list.insert(index, w_item)
 
     def _extend_from_list(self, w_list, w_other):
@@ -1420,7 +1437,7 @@ class AbstractUnwrappedStrategy(object):
             except IndexError:
                 raise
         else:
-            w_list.switch_to_object_strategy()
+            self.switch_to_next_strategy(w_list, w_item)
             w_list.setitem(index, w_item)
 
     def setslice(self, w_list, start, step, slicelength, w_other):
@@ -1617,6 +1634,33 @@ class IntegerListStrategy(ListStrategy):
     def getitems_int(self, w_list):
         return self.unerase(w_list.lstorage)
 
+    def int_2_float_or_int(self, w_list):
+        l = self.unerase(w_list.lstorage)
+        if not longlong2float.CAN_ALWAYS_ENCODE_INT32:
+            for intval in l:
+                if not longlong2float.can_encode_int32(intval):
+                    raise ValueError
+        return [longlong2float.encode_int32_into_longlong_nan(intval)
+                for intval in l]
+
+    def switch_to_int_or_float_strategy(self, w_list):
+        try:
+            generalized_list = self.int_2_float_or_int(w_list)
+        except ValueError:
+            return False
+        strategy = self.space.fromcache(IntOrFloatListStrategy)
+        w_list.strategy = strategy
+        w_list.lstorage = strategy.erase(generalized_list)
+        return True
+
+    def switch_to_next_strategy(self, w_list, w_sample_item):
+        if (type(w_sample_item) is W_FloatObject and
+                longlong2float.can_encode_float(
+                    self.space.float_w(w_sample_item)) and
+                self.switch_to_int_or_float_strategy(w_list)):
+            return
+        w_list.switch_to_object_strategy()
+
 
     _base_extend_from_list = _extend_from_list
 
@@ -1627,6 +1671,11 @@ class IntegerListStrategy(ListStrategy):
             assert other is not None
             l += other
             return
+        if (w_other.strategy is self.space.fromcache(FloatListStrategy) or
+            w_other.strategy is self.space.fromcache(IntOrFloatListStrategy)):
+            if self.switch_to_int_or_float_strategy(w_list):
+                w_list.extend(w_other)
+                return
         return self._base_extend_from_list(w_list, w_other)
 
 
@@ -1670,6 +1719,41 @@ class FloatListStrategy(ListStrategy):
     def getitems_float(self, w_list):
         return self.unerase(w_list.lstorage)
 
+    def float_2_float_or_int(self, w_list):
+        l = self.unerase(w_list.lstorage)
+        for floatval in l:
+            if not longlong2float.can_encode_float(floatval):
+                raise ValueError
+        return [longlong2float.float2longlong(floatval) for floatval in l]
+
+    def switch_to_int_or_float_strategy(self, w_list):
+        try:
+            generalized_list = self.float_2_float_or_int(w_list)
+        except ValueError:
+            return False
+        strategy = self.space.fromcache(IntOrFloatListStrategy)
+        w_list.strategy = strategy
+        w_list.lstorage = strategy.erase(generalized_list)
+        return True
+
+    def switch_to_next_strategy(self, w_list, w_sample_item):
+        if (type(w_sample_item) is W_IntObject and
+                longlong2float.can_encode_int32(
+                    self.space.int_w(w_sample_item)) and
+                self.switch_to_int_or_float_strategy(w_list)):
+            return
+        w_list.switch_to_object_strategy()
+
+    _base_extend_from_list = _extend_from_list
+
+    def _extend_from_list(self, w_list, w_other):
+        if (w_other.strategy is self.space.fromcache(IntegerListStrategy) or
+            w_other.strategy is self.space.fromcache(IntOrFloatListStrategy)):
+            if self.switch_to_int_or_float_strategy(w_list):
+                w_list.extend(w_other)
+                return
+        return self._base_extend_from_list(w_list, w_other)
+
     def _safe_find(self, w_list, obj, start, stop):
         from rpython.rlib.rfloat import isnan
         from rpython.rlib.longlong2float import float2longlong
@@ -1690,6 +1774,107 @@ class FloatListStrategy(ListStrategy):
         raise ValueError
 
 
+class IntOrFloatListStrategy(ListStrategy):
+    """Stores a mix of ints and floats unboxed, as 64-bit values: a float
+    as its bit pattern, and an int, which must fit in 32 bits, as a NaN
+    with a reserved high word (see rpython/rlib/longlong2float.py).
+    Switching to it from IntegerListStrategy or FloatListStrategy only
+    needs to convert the items, without allocating boxes."""
+    import_from_mixin(AbstractUnwrappedStrategy)
+
+    _none_value = longlong2float.float2longlong(0.0)
+
+    def wrap(self, llval):
+        if longlong2float.is_int32_from_longlong_nan(llval):
+            intval = longlong2float.decode_int32_from_longlong_nan(llval)
+            return self.space.wrap(intval)
+        else:
+            floatval = longlong2float.longlong2float(llval)
+            return self.space.wrap(floatval)
+
+    def unwrap(self, w_int_or_float):
+        if type(w_int_or_float) is W_IntObject:
+            intval = self.space.int_w(w_int_or_float)
+            return longlong2float.encode_int32_into_longlong_nan(intval)
+        else:
+            floatval = self.space.float_w(w_int_or_float)
+            return longlong2float.float2longlong(floatval)
+
+    erase, unerase = rerased.new_erasing_pair("longlong")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def is_correct_type(self, w_obj):
+        if type(w_obj) is W_IntObject:
+            intval = self.space.int_w(w_obj)
+            return longlong2float.can_encode_int32(intval)
+        elif type(w_obj) is W_FloatObject:
+            floatval = self.space.float_w(w_obj)
+            return longlong2float.can_encode_float(floatval)
+        else:
+            return False
+
+    def list_is_correct_type(self, w_list):
+        return w_list.strategy is self.space.fromcache(IntOrFloatListStrategy)
+
+    def sort(self, w_list, reverse):
+        l = self.unerase(w_list.lstorage)
+        sorter = IntOrFloatSort(l, len(l))
+        # 1 and 1.0 compare equal but are different objects: keep the
+        # sort stable when reversing, by reversing before and after
+        if reverse:
+            l.reverse()
+        sorter.sort()
+        if reverse:
+            l.reverse()
+
+    def _safe_find(self, w_list, obj, start, stop):
+        l = self.unerase(w_list.lstorage)
+        # 'obj' is found if it is the same as an item (this includes
+        # NaNs with the same bit pattern) or if it is equal to it as a
+        # float (this includes 0.0 == -0.0 and 42 == 42.0)
+        fobj = longlong2float.maybe_decode_longlong_as_float(obj)
+        for i in range(start, min(stop, len(l))):
+            llval = l[i]
+            if llval == obj:
+                return i
+            if longlong2float.maybe_decode_longlong_as_float(llval) == fobj:
+                return i
+        raise ValueError
+
+    def _as_int_or_float_list(self, w_other):
+        """Return the items of w_other, a list of ints or a list of
+        floats, converted to our storage format, or None."""
+        strategy = w_other.strategy
+        try:
+            if strategy is self.space.fromcache(IntegerListStrategy):
+                return strategy.int_2_float_or_int(w_other)
+            if strategy is self.space.fromcache(FloatListStrategy):
+                return strategy.float_2_float_or_int(w_other)
+        except ValueError:
+            pass
+        return None
+
+    _base_extend_from_list = _extend_from_list
+
+    def _extend_from_list(self, w_list, w_other):
+        other = self._as_int_or_float_list(w_other)
+        if other is not None:
+            l = self.unerase(w_list.lstorage)
+            l += other
+            return
+        return self._base_extend_from_list(w_list, w_other)
+
+    _base_setslice = setslice
+
+    def setslice(self, w_list, start, step, slicelength, w_other):
+        other = self._as_int_or_float_list(w_other)
+        if other is not None:
+            w_other = W_ListObject.from_storage_and_strategy(
+                    self.space, self.erase(other), self)
+        return self._base_setslice(w_list, start, step, slicelength, w_other)
+
+
 class BytesListStrategy(ListStrategy):
     import_from_mixin(AbstractUnwrappedStrategy)
 
@@ -1785,6 +1970,7 @@ listrepr = app.interphook("listrepr")
 TimSort = make_timsort_class()
 IntBaseTimSort = make_timsort_class()
 FloatBaseTimSort = make_timsort_class()
+IntOrFloatBaseTimSort = make_timsort_class()
 StringBaseTimSort = make_timsort_class()
 UnicodeBaseTimSort = make_timsort_class()
 
@@ -1815,6 +2001,13 @@ class FloatSort(FloatBaseTimSort):
         return a < b
 
 
+class IntOrFloatSort(IntOrFloatBaseTimSort):
+    def lt(self, a, b):
+        fa = longlong2float.maybe_decode_longlong_as_float(a)
+        fb = longlong2float.maybe_decode_longlong_as_float(b)
+        return fa < fb
+
+
 class StringSort(StringBaseTimSort):
     def lt(self, a, b):
         return a < b
@@ -7,7 +7,7 @@ from pypy.objspace.std.bytesobject import W_BytesObject
 from pypy.objspace.std.intobject import W_IntObject
 from pypy.objspace.std.unicodeobject import W_UnicodeObject
 
-from rpython.rlib.objectmodel import r_dict
+from rpython.rlib.objectmodel import r_dict, prepare_dict_update
 from rpython.rlib.rarithmetic import intmask, r_uint
 from rpython.rlib import rerased, jit
 
@@ -676,6 +676,9 @@ class SetStrategy(object):
     def listview_int(self, w_set):
         return None
 
+    def prepare_update(self, w_set, num_extra):
+        pass
+
     #def erase(self, storage):
     #    raise NotImplementedError
 
@@ -756,6 +759,9 @@ class EmptySetStrategy(SetStrategy):
     def get_empty_storage(self):
         return self.erase(None)
 
+    def get_sizehint(self):
+        return -1
+
     def is_correct_type(self, w_key):
         return False
 
@@ -783,6 +789,9 @@ class EmptySetStrategy(SetStrategy):
             strategy = self.space.fromcache(ObjectSetStrategy)
         w_set.strategy = strategy
         w_set.sstorage = strategy.get_empty_storage()
+        sizehint = self.get_sizehint()
+        if sizehint > 0:
+            strategy.prepare_update(w_set, sizehint)
         w_set.add(w_key)
 
     def remove(self, w_set, w_item):
@@ -842,6 +851,25 @@ class EmptySetStrategy(SetStrategy):
                                 self.space.wrap('pop from an empty set'))
 
 
+class SizeSetStrategy(EmptySetStrategy):
+    """Like empty, but when the first item is added, room for sizehint
+    items is preallocated in the storage of the new strategy."""
+    def __init__(self, space, sizehint):
+        self.sizehint = sizehint
+        EmptySetStrategy.__init__(self, space)
+
+    def get_sizehint(self):
+        return self.sizehint
+
+
+def make_empty_set_with_size(space, sizehint):
+    w_set = W_SetObject(space)
+    strategy = SizeSetStrategy(space, sizehint)
+    w_set.strategy = strategy
+    w_set.sstorage = strategy.get_empty_storage()
+    return w_set
+
+
 class AbstractUnwrappedSetStrategy(object):
     _mixin_ = True
 
@@ -861,6 +889,7 @@ class AbstractUnwrappedSetStrategy(object):
             jit.loop_unrolling_heuristic(list_w, len(list_w), UNROLL_CUTOFF))
     def get_storage_from_list(self, list_w):
         setdata = self.get_empty_dict()
+        prepare_dict_update(setdata, len(list_w))
         for w_item in list_w:
             setdata[self.unwrap(w_item)] = None
         return self.erase(setdata)
@@ -869,6 +898,7 @@ class AbstractUnwrappedSetStrategy(object):
             jit.loop_unrolling_heuristic(items, len(items), UNROLL_CUTOFF))
     def get_storage_from_unwrapped_list(self, items):
         setdata = self.get_empty_dict()
+        prepare_dict_update(setdata, len(items))
         for item in items:
             setdata[item] = None
         return self.erase(setdata)
@@ -876,6 +906,9 @@ class AbstractUnwrappedSetStrategy(object):
     def length(self, w_set):
         return len(self.unerase(w_set.sstorage))
 
+    def prepare_update(self, w_set, num_extra):
+        prepare_dict_update(self.unerase(w_set.sstorage), num_extra)
+
     def clear(self, w_set):
         w_set.switch_to_empty_strategy()
 
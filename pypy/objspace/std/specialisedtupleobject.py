@@ -1,7 +1,12 @@
+import operator
+
 from pypy.interpreter.error import OperationError
-from pypy.objspace.std.tupleobject import W_AbstractTupleObject
+from pypy.objspace.std.tupleobject import (W_AbstractTupleObject,
+    _unroll_condition, _unroll_condition_cmp, UNROLL_CUTOFF)
 from pypy.objspace.std.util import negate
-from rpython.rlib.objectmodel import compute_hash
+from rpython.rlib import jit
+from rpython.rlib.debug import make_sure_not_resized
+from rpython.rlib.objectmodel import compute_hash, specialize
 from rpython.rlib.rarithmetic import intmask
 from rpython.rlib.unroll import unrolling_iterable
 from rpython.tool.sourcetools import func_with_new_name
@@ -125,6 +130,146 @@ def make_specialised_class(typetuple):
     _specialisations.append(cls)
     return cls
 
+
+def make_homogeneous_class(itemtype):
+    """Tuples of any length whose items are all of the same type, which is
+    int, float or str.  The items are stored unwrapped in a list, and are
+    only wrapped again when they are read.
+    """
+    if itemtype == int:
+        unwrap = lambda space, w_obj: space.int_w(w_obj)
+    elif itemtype == float:
+        unwrap = lambda space, w_obj: space.float_w(w_obj)
+    elif itemtype == str:
+        unwrap = lambda space, w_obj: space.str_w(w_obj)
+    else:
+        raise AssertionError
+
+    def equal(x, y):
+        if itemtype == float:
+            # issue with NaNs, which should be equal here
+            return x == y or float2longlong(x) == float2longlong(y)
+        return x == y
+
+    class cls(W_AbstractTupleObject):
+        _immutable_fields_ = ['values[*]']
+
+        @jit.look_inside_iff(lambda self, space, list_w:
+                jit.loop_unrolling_heuristic(list_w, len(list_w),
+                                             UNROLL_CUTOFF))
+        def __init__(self, space, list_w):
+            self.space = space
+            values = [unwrap(space, list_w[0])] * len(list_w)
+            for i in range(1, len(list_w)):
+                values[i] = unwrap(space, list_w[i])
+            make_sure_not_resized(values)
+            self.values = values
+
+        def length(self):
+            return len(self.values)
+
+        @jit.look_inside_iff(lambda self: _unroll_condition(self))
+        def tolist(self):
+            space = self.space
+            list_w = [None] * len(self.values)
+            for i in range(len(self.values)):
+                list_w[i] = space.wrap(self.values[i])
+            return list_w
+
+        @jit.look_inside_iff(lambda self: _unroll_condition(self))
+        def getitems_copy(self):
+            space = self.space
+            return [space.wrap(value) for value in self.values]
+
+        @jit.look_inside_iff(lambda self, _1: _unroll_condition(self))
+        def descr_hash(self, space):
+            # must give the same result as W_TupleObject.descr_hash()
+            mult = 1000003
+            x = 0x345678
+            z = len(self.values)
+            for value in self.values:
+                if itemtype == float:
+                    from pypy.objspace.std.floatobject import _hash_float
+                    y = _hash_float(space, value)
+                else:
+                    y = compute_hash(value)
+                x = (x ^ y) * mult
+                z -= 1
+                mult += 82520 + z + z
+            x += 97531
+            return space.wrap(intmask(x))
+
+        def descr_eq(self, space, w_other):
+            if not isinstance(w_other, W_AbstractTupleObject):
+                return space.w_NotImplemented
+            if not isinstance(w_other, cls):
+                return self._descr_eq_generic(space, w_other)
+            return self._descr_eq(space, w_other)
+
+        @jit.look_inside_iff(_unroll_condition_cmp)
+        def _descr_eq(self, space, w_other):
+            values1 = self.values
+            values2 = w_other.values
+            if len(values1) != len(values2):
+                return space.w_False
+            for i in range(len(values1)):
+                if not equal(values1[i], values2[i]):
+                    return space.w_False
+            return space.w_True
+
+        @jit.look_inside_iff(_unroll_condition_cmp)
+        def _descr_eq_generic(self, space, w_other):
+            items2 = w_other.tolist()
+            if len(self.values) != len(items2):
+                return space.w_False
+            for i in range(len(items2)):
+                if not space.eq_w(space.wrap(self.values[i]), items2[i]):
+                    return space.w_False
+            return space.w_True
+
+        descr_ne = negate(descr_eq)
+
+        def _make_comparison(name):
+            op = getattr(operator, name)
+            generic_compare = getattr(W_AbstractTupleObject, 'descr_' + name)
+
+            def compare_tuples(self, space, w_other):
+                if not isinstance(w_other, cls):
+                    return generic_compare(self, space, w_other)
+                return _compare_tuples(self, space, w_other)
+
+            @jit.look_inside_iff(_unroll_condition_cmp)
+            def _compare_tuples(self, space, w_other):
+                values1 = self.values
+                values2 = w_other.values
+                ncmp = min(len(values1), len(values2))
+                # Search for the first index where items are different
+                for p in range(ncmp):
+                    if not equal(values1[p], values2[p]):
+                        return space.newbool(op(values1[p], values2[p]))
+                # No more items to compare -- compare sizes
+                return space.newbool(op(len(values1), len(values2)))
+
+            compare_tuples.__name__ = 'descr_' + name
+            return compare_tuples
+
+        descr_lt = _make_comparison('lt')
+        descr_le = _make_comparison('le')
+        descr_gt = _make_comparison('gt')
+        descr_ge = _make_comparison('ge')
+        del _make_comparison
+
+        def getitem(self, space, index):
+            try:
+                return space.wrap(self.values[index])
+            except IndexError:
+                raise OperationError(space.w_IndexError,
+                                     space.wrap("tuple index out of range"))
+
+    cls.__name__ = 'W_SpecialisedTupleObject_%ss' % itemtype.__name__
+    _specialisations.append(cls)
+    return cls
+
 # ---------- current specialized versions ----------
 
 _specialisations = []
@@ -132,6 +277,12 @@ Cls_ii = make_specialised_class((int, int))
 Cls_oo = make_specialised_class((object, object))
 Cls_ff = make_specialised_class((float, float))
 
+# used for the homogeneous tuples with at least this many items
+MIN_HOMOGENEOUS_LENGTH = 3
+Cls_ints = make_homogeneous_class(int)
+Cls_floats = make_homogeneous_class(float)
+Cls_strs = make_homogeneous_class(str)
+
 def makespecialisedtuple(space, list_w):
     from pypy.objspace.std.intobject import W_IntObject
     from pypy.objspace.std.floatobject import W_FloatObject
@@ -144,5 +295,32 @@ def makespecialisedtuple(space, list_w):
             if type(w_arg2) is W_FloatObject:
                 return Cls_ff(space, w_arg1, w_arg2)
         return Cls_oo(space, w_arg1, w_arg2)
+    elif len(list_w) >= MIN_HOMOGENEOUS_LENGTH:
+        return makehomogeneoustuple(space, list_w)
     else:
         raise NotSpecialised
+
+@jit.look_inside_iff(lambda space, list_w:
+        jit.loop_unrolling_heuristic(list_w, len(list_w), UNROLL_CUTOFF))
+def makehomogeneoustuple(space, list_w):
+    from pypy.objspace.std.intobject import W_IntObject
+    from pypy.objspace.std.floatobject import W_FloatObject
+    from pypy.objspace.std.bytesobject import W_BytesObject
+    w_arg1 = list_w[0]
+    if type(w_arg1) is W_IntObject:
+        if _all_of_type(list_w, W_IntObject):
+            return Cls_ints(space, list_w)
+    elif type(w_arg1) is W_FloatObject:
+        if _all_of_type(list_w, W_FloatObject):
+            return Cls_floats(space, list_w)
+    elif type(w_arg1) is W_BytesObject:
+        if _all_of_type(list_w, W_BytesObject):
+            return Cls_strs(space, list_w)
+    raise NotSpecialised
+
+@specialize.arg(1)
+def _all_of_type(list_w, W_Class):
+    for w_obj in list_w:
+        if type(w_obj) is not W_Class:
+            return False
+    return True
@@ -2,7 +2,7 @@ import sys
 import py
 
 from pypy.objspace.std.dictmultiobject import (W_DictMultiObject,
-    BytesDictStrategy, ObjectDictStrategy)
+    BytesDictStrategy, ObjectDictStrategy, IntDictStrategy, SizeDictStrategy)
 
 
 class TestW_DictObject(object):
@@ -134,6 +134,43 @@ class TestW_DictObject(object):
         assert space.eq_w(w_d.getitem_str("a"), space.w_None)
         assert space.eq_w(w_d.getitem_str("b"), space.w_None)
 
+    def test_newdict_hint(self):
+        space = self.space
+        w_d = space.newdict_hint(13)
+        assert isinstance(w_d.strategy, SizeDictStrategy)
+        assert w_d.strategy.sizehint == 13
+        w_d.setitem(space.wrap(5), space.wrap("a"))
+        assert isinstance(w_d.strategy, IntDictStrategy)
+        assert space.eq_w(w_d.getitem(space.wrap(5)), space.wrap("a"))
+        assert w_d.length() == 1
+
+    def test_presized_bulk_paths(self, monkeypatch):
+        space = self.space
+        w = space.wrap
+        seen = []
+        def prepare_update(self, w_dict, num_extra):
+            seen.append(num_extra)
+        monkeypatch.setattr(BytesDictStrategy, 'prepare_update',
+                            prepare_update)
+        #
+        w_d = space.newdict_hint(13)
+        w_d.setitem_str("a", space.w_None)
+        assert seen == [13]
+        #
+        del seen[:]
+        w_l = space.newlist([w("a"), w("b"), w("c")])
+        w_d = space.call_method(space.w_dict, "fromkeys", w_l)
+        assert seen == [3]
+        assert w_d.length() == 3
+        #
+        del seen[:]
+        w_l = space.newlist([space.newtuple([w("a"), w(1)]),
+                             space.newtuple([w("b"), w(2)]),
+                             space.newtuple([w("c"), w(3)])])
+        w_d = space.call_function(space.w_dict, w_l)
+        assert seen == [2]
+        assert space.eq_w(w_d.getitem_str("c"), w(3))
+
     def test_listview_bytes_dict(self):
         w = self.space.wrap
         w_d = self.space.newdict()
@@ -986,6 +1023,43 @@ class AppTestStrategies(object):
         assert "IntDictStrategy" in self.get_strategy(d)
         assert d[1L] == "hi"
 
+    def test_empty_to_float(self):
+        d = {}
+        d[1.5] = "hi"
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        d[-0.0] = "zero"
+        d[0.0] = "again"
+        assert len(d) == 2
+        assert d.get("1.5") is None
+        assert d.get(None) is None
+        assert d.get(float("nan")) is None
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        assert d.keys() == [1.5, -0.0]
+        assert type(d.keys()[0]) is float
+        assert d[0] == "again"
+        assert d == {1.5: "hi", 0: "again"}
+
+    def test_float_lookup_int(self):
+        d = {2.0: "two"}
+        assert d[2] == "two"
+        assert d[2L] == "two"
+        assert 1.0 not in d
+        assert True not in d
+        d[1.0] = "one"
+        assert d[True] == "one"
+
+    def test_float_nan_key(self):
+        nan = float("nan")
+        d = {1.5: 1}
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        d[nan] = 2
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d[nan] == 2
+        d = {}
+        assert d.setdefault(nan, 3) == 3
+        assert d.setdefault(nan, 4) == 3
+        assert d.keys()[0] is nan
+
     def test_iter_dict_length_change(self):
         d = {1: 2, 3: 4, 5: 6}
         it = d.iteritems()
@@ -1014,6 +1088,100 @@ class AppTestStrategies(object):
         raises(RuntimeError, list, it)
 
 
+class AppTest_DictIntValues(AppTest_DictMultiObject):
+    spaceconfig = {"objspace.std.withintvaluedict": True}
+
+
+class AppTestIntValueStrategies(AppTestStrategies):
+    spaceconfig = {"objspace.std.withintvaluedict": True}
+
+    def test_empty_to_string(self):
+        d = {}
+        d["a"] = "b"
+        assert "BytesDictStrategy" in self.get_strategy(d)
+        d = {}
+        d["a"] = 1
+        assert "BytesIntDictStrategy" in self.get_strategy(d)
+
+    def test_empty_to_int(self):
+        d = {}
+        d[1] = "hi"
+        assert "IntDictStrategy" in self.get_strategy(d)
+        d = {}
+        d[1] = 2
+        assert "IntIntDictStrategy" in self.get_strategy(d)
+        assert d[1L] == 2
+
+    def test_counter(self):
+        d = {}
+        for word in "a b c a b a".split():
+            d[word] = d.get(word, 0) + 1
+        assert "BytesIntDictStrategy" in self.get_strategy(d)
+        assert d == {"a": 3, "b": 2, "c": 1}
+        assert sorted(d.items()) == [("a", 3), ("b", 2), ("c", 1)]
+        assert sorted(d.values()) == [1, 2, 3]
+        assert sorted(d.itervalues()) == [1, 2, 3]
+        assert sorted(d.iteritems()) == [("a", 3), ("b", 2), ("c", 1)]
+        assert d.setdefault("a", 5) == 3
+        assert d.setdefault("d", 5) == 5
+        assert d.pop("d") == 5
+        assert "BytesIntDictStrategy" in self.get_strategy(d)
+        d2 = d.copy()
+        assert "BytesIntDictStrategy" in self.get_strategy(d2)
+        assert d2 == d
+        assert d.get("x") is None
+        assert d.get(None) is None
+        assert "BytesIntDictStrategy" in self.get_strategy(d)
+
+    def test_int_keys(self):
+        import sys
+        d = dict.fromkeys(range(5), 0)
+        d[3] += 4
+        assert "IntIntDictStrategy" in self.get_strategy(d)
+        assert d == {0: 0, 1: 0, 2: 0, 3: 4, 4: 0}
+        assert d.popitem()[1] in (0, 4)
+        d[sys.maxint] = sys.maxint
+        assert d[sys.maxint] == sys.maxint
+        assert "IntIntDictStrategy" in self.get_strategy(d)
+
+    def test_boxed_values(self):
+        import sys
+        for value in [None, "x", 1L, True, 1.5, -sys.maxint-1]:
+            d = {"a": 1, "b": 2}
+            d["c"] = value
+            assert "BytesDictStrategy" in self.get_strategy(d)
+            assert d == {"a": 1, "b": 2, "c": value}
+            assert type(d["c"]) is type(value)
+            d = {1: 2}
+            assert d.setdefault(3, value) is value
+            assert "IntDictStrategy" in self.get_strategy(d)
+            assert d == {1: 2, 3: value}
+        class myint(int):
+            pass
+        d = {"a": 1}
+        d["b"] = myint(2)
+        assert "BytesDictStrategy" in self.get_strategy(d)
+        assert type(d["b"]) is myint
+
+    def test_other_keys(self):
+        d = {"a": 1}
+        d[1] = 2
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d == {"a": 1, 1: 2}
+        d = {1: 1}
+        assert d.get(1.0) == 1
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+
+    def test_kwargs(self):
+        def f(**kwargs):
+            return kwargs
+        d = f(a=1, b=2)
+        assert "KwargsDictStrategy" in self.get_strategy(d)
+        d = {}
+        d.update(a=1)
+        assert d == {"a": 1}
+
+
 class FakeWrapper(object):
     hash_count = 0
     def unwrap(self, space):
@@ -1117,6 +1285,7 @@ class Config:
             withcelldict = False
             withmethodcache = False
             withidentitydict = False
+            withintvaluedict = False
             withmapdict = False
 
 FakeSpace.config = Config()
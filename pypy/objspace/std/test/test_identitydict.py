@@ -111,6 +111,18 @@ class AppTestIdentityDict(object):
         assert d[y] == 1
         assert not self.uses_identity_strategy(d)
 
+    def test_lookup_builtin_types(self):
+        class X(object):
+            pass
+        x = X()
+        d = {x: 1}
+        assert self.uses_identity_strategy(d)
+        for key in [1, 1L, True, 1.5, 'x', u'x']:
+            assert key not in d
+            assert d.get(key) is None
+        assert self.uses_identity_strategy(d)
+        assert d[x] == 1
+
     def test_iter(self):
         class X(object):
             pass
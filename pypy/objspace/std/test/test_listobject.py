@@ -672,6 +672,31 @@ class AppTestListObject(object):
         l.sort()
         assert l == [3, 6, 9]
 
+    def test_sort_int_or_float(self):
+        l = [3, 1.5, -2, 0.25, 1, 1.0, -2.0]
+        l.sort()
+        assert l == [-2, -2.0, 0.25, 1, 1.0, 1.5, 3]
+        assert [type(x) for x in l] == [int, float, float, int, float,
+                                        float, int]
+        l = [3, 1.5, -2, 1.0, 1, -2.0]
+        l.sort(reverse=True)
+        assert l == [3, 1.5, 1.0, 1, -2, -2.0]
+        assert [type(x) for x in l] == [int, float, float, int, int, float]
+
+    def test_int_or_float_find(self):
+        l = [1, 2.5, -0.0, 4]
+        assert l.index(2.5) == 1
+        assert l.index(4.0) == 3
+        assert l.index(1.0) == 0
+        assert l.index(0) == 2
+        assert 4 in l
+        assert 3 not in l
+        assert l.count(4.0) == 1
+        nan = float('nan')
+        l = [1, nan, 2.5]
+        assert l.index(nan) == 1
+        assert sum([1, 2.5, 3]) == 6.5
+
     def test_getitem(self):
         l = [1, 2, 3, 4, 5, 6, 9]
         assert l[0] == 1
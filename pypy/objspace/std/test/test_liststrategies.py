@@ -2,7 +2,8 @@ import sys
 from pypy.objspace.std.listobject import (
     W_ListObject, EmptyListStrategy, ObjectListStrategy, IntegerListStrategy,
     FloatListStrategy, BytesListStrategy, RangeListStrategy,
-    SimpleRangeListStrategy, make_range_list, UnicodeListStrategy)
+    SimpleRangeListStrategy, make_range_list, UnicodeListStrategy,
+    IntOrFloatListStrategy)
 from pypy.objspace.std import listobject
 from pypy.objspace.std.test.test_listobject import TestW_ListObject
 
@@ -318,7 +319,67 @@ class TestW_ListStrategies(TestW_ListObject):
         l = W_ListObject(space, [w(1.1), w(2.2), w(3.3)])
         assert isinstance(l.strategy, FloatListStrategy)
         l.extend(W_ListObject(space, [w(4), w(5), w(6)]))
+        assert isinstance(l.strategy, IntOrFloatListStrategy)
+
+        l = W_ListObject(space, [w(1.1), w(2.2), w(3.3)])
+        assert isinstance(l.strategy, FloatListStrategy)
+        l.extend(W_ListObject(space, [w('a'), w('b')]))
+        assert isinstance(l.strategy, ObjectListStrategy)
+
+    def test_int_or_float_from_list_objects(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1), w(2.5), w(-3)])
+        assert isinstance(l.strategy, IntOrFloatListStrategy)
+        assert space.unwrap(l) == [1, 2.5, -3]
+        assert type(space.unwrap(l)[0]) is int
+        l = W_ListObject(space, [w(1), w(2.5), w('a')])
+        assert isinstance(l.strategy, ObjectListStrategy)
+        if sys.maxint > 2**31:
+            l = W_ListObject(space, [w(1), w(2.5), w(2**40)])
+            assert isinstance(l.strategy, ObjectListStrategy)
+
+    def test_int_or_float_switching(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1), w(2), w(3)])
+        l.append(w(4.5))
+        assert isinstance(l.strategy, IntOrFloatListStrategy)
+        assert space.unwrap(l) == [1, 2, 3, 4.5]
+        l.append(w(6))
+        l.insert(0, w(0.5))
+        l.setitem(1, w(-1.0))
+        assert isinstance(l.strategy, IntOrFloatListStrategy)
+        assert space.unwrap(l) == [0.5, -1.0, 2, 3, 4.5, 6]
+        l.append(w('a'))
         assert isinstance(l.strategy, ObjectListStrategy)
+        assert space.unwrap(l) == [0.5, -1.0, 2, 3, 4.5, 6, 'a']
+
+        l = W_ListObject(space, [w(1.5), w(2.5)])
+        l.setitem(0, w(7))
+        assert isinstance(l.strategy, IntOrFloatListStrategy)
+        assert space.unwrap(l) == [7, 2.5]
+        l.extend(W_ListObject(space, [w(1), w(2)]))
+        l.extend(W_ListObject(space, [w(1.25)]))
+        assert isinstance(l.strategy, IntOrFloatListStrategy)
+        assert space.unwrap(l) == [7, 2.5, 1, 2, 1.25]
+        l.setslice(0, 1, 2, W_ListObject(space, [w(8.5), w(9)]))
+        assert isinstance(l.strategy, IntOrFloatListStrategy)
+        assert space.unwrap(l) == [8.5, 9, 1, 2, 1.25]
+
+        l = W_ListObject(space, [w(1), w(2)])
+        l.extend(W_ListObject(space, [w(1.5), w(3)]))
+        assert isinstance(l.strategy, IntOrFloatListStrategy)
+        assert space.unwrap(l) == [1, 2, 1.5, 3]
+
+        if sys.maxint > 2**31:
+            l = W_ListObject(space, [w(2**40), w(2)])
+            l.append(w(1.5))
+            assert isinstance(l.strategy, ObjectListStrategy)
+            l = W_ListObject(space, [w(1.5), w(2.5)])
+            l.append(w(2**40))
+            assert isinstance(l.strategy, ObjectListStrategy)
+            assert space.unwrap(l) == [1.5, 2.5, 2**40]
 
     def test_empty_extend_with_any(self):
         space = self.space
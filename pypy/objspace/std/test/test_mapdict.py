@@ -8,6 +8,7 @@ class Config:
             withcelldict = False
             withmethodcache = False
             withidentitydict = False
+            withintvaluedict = False
             withmapdict = True
 
 space = FakeSpace()
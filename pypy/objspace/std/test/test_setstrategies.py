@@ -2,7 +2,7 @@ from pypy.objspace.std.setobject import W_SetObject
 from pypy.objspace.std.setobject import (
     BytesIteratorImplementation, BytesSetStrategy, EmptySetStrategy,
     IntegerIteratorImplementation, IntegerSetStrategy, ObjectSetStrategy,
-    UnicodeIteratorImplementation, UnicodeSetStrategy)
+    UnicodeIteratorImplementation, UnicodeSetStrategy, SizeSetStrategy)
 from pypy.objspace.std.listobject import W_ListObject
 
 class TestW_SetStrategies:
@@ -29,6 +29,19 @@ class TestW_SetStrategies:
         s = W_SetObject(self.space, self.wrapped([u"a", u"b"]))
         assert s.strategy is self.space.fromcache(UnicodeSetStrategy)
 
+    def test_newset_hint(self, monkeypatch):
+        seen = []
+        def prepare_update(self, w_set, num_extra):
+            seen.append(num_extra)
+        monkeypatch.setattr(IntegerSetStrategy, 'prepare_update',
+                            prepare_update)
+        s = self.space.newset_hint(10)
+        assert isinstance(s.strategy, SizeSetStrategy)
+        s.add(self.space.wrap(1))
+        assert s.strategy is self.space.fromcache(IntegerSetStrategy)
+        assert seen == [10]
+        assert s.length() == 1
+
     def test_switch_to_object(self):
         s = W_SetObject(self.space, self.wrapped([1,2,3,4,5]))
         s.add(self.space.wrap("six"))
@@ -45,7 +45,21 @@ class TestW_SpecialisedTupleObject():
         hash_test([1, (1, 2)])
         hash_test([1, ('a', 2)])
         hash_test([1, ()])
-        hash_test([1, 2, 3], must_be_specialized=False)
+        hash_test([1, 2, 3])
+        hash_test([1, -1, 2, -2, 0, 10**9])
+        hash_test([1.5, 2.0, -0.0, 1e100])
+        hash_test(['a', 'bc', '', 'def'])
+        hash_test([1, 2.0, 3], must_be_specialized=False)
+
+    def test_homogeneous_classes(self):
+        space = self.space
+        for values, cls in [([1, 2, 3], W_SpecialisedTupleObject_ints),
+                            ([1.0, 2.0, 3.5, 4.0], W_SpecialisedTupleObject_floats),
+                            (['a', 'b', 'c'], W_SpecialisedTupleObject_strs)]:
+            w_tuple = space.newtuple([space.wrap(value) for value in values])
+            assert type(w_tuple) is cls
+            assert w_tuple.values == values
+            assert space.unwrap(w_tuple) == tuple(values)
 
 
 class AppTestW_SpecialisedTupleObject:
@@ -83,7 +97,8 @@ class AppTestW_SpecialisedTupleObject:
         assert len(t) == 2
 
     def test_notspecialisedtuple(self):
-        assert not self.isspecialised((42, 43, 44, 45))
+        assert not self.isspecialised((42, 43.5, 44, 45))
+        assert not self.isspecialised((42, 43, 44, 45L))
         assert not self.isspecialised((1.5,))
 
     def test_slicing_to_specialised(self):
@@ -204,10 +219,9 @@ class AppTestW_SpecialisedTupleObject:
         assert a == (2.2,) + b
         assert not a != (2.2,) + b
         #
-        if not self.isspecialised((1, 2, 3)):
-            skip("don't have specialization for 3-tuples")
         a = (1, 2.2, '333')
-        assert self.isspecialised(a)
+        if not self.isspecialised(a):
+            skip("don't have specialization for mixed 3-tuples")
         assert len(a) == 3
         assert a[0] == 1 and a[1] == 2.2 and a[2] == '333'
         b = ('333',)
@@ -229,6 +243,69 @@ class AppTestW_SpecialisedTupleObject:
         assert T == (N, N)
         assert (0.0, 0.0) == (-0.0, -0.0)
 
+    def test_homogeneous(self):
+        for t, expected in [((1, 2, 3), '_ints'),
+                            (tuple(range(100)), '_ints'),
+                            ((1.5, 2.5, float('inf')), '_floats'),
+                            (('a', 'bc', ''), '_strs')]:
+            assert self.isspecialised(t, expected)
+            assert len(t) == len(list(t))
+            assert t == tuple(list(t))
+            assert t[-1] == list(t)[-1]
+            assert t[1:] == tuple(list(t)[1:])
+        assert not self.isspecialised((1, 2, True))
+        assert not self.isspecialised((1.5, 2.5, 3))
+        assert not self.isspecialised(('a', 'b', u'c'))
+        class I(int): pass
+        t = (1, 2, I(3))
+        assert not self.isspecialised(t)
+        assert type(t[2]) is I
+
+    def test_homogeneous_eq_hash(self):
+        a = (1, 2, 3)
+        b = (1, 2.0, 3L)
+        assert a == b
+        assert not a != b
+        assert hash(a) == hash(b)
+        assert (1.0, 2.0, 3.0) == a
+        assert hash((1.0, 2.0, 3.0)) == hash(a)
+        assert a != (1, 2, 4)
+        assert a != (1, 2, 3, 4)
+        d = {(1, 2, 3): 'x', ('a', 'b', 'c'): 'y'}
+        assert d[(1.0, 2, 3)] == 'x'
+        assert d[tuple('abc')] == 'y'
+
+    def test_homogeneous_ordering(self):
+        assert (1, 2, 3) < (1, 2, 4)
+        assert (1, 2, 3) < (1, 2, 3, 0)
+        assert not (1, 2, 3) < (1, 2, 3)
+        assert (1, 2, 3) <= (1, 2, 3)
+        assert (1, 3, 0) > (1, 2, 3)
+        assert (1, 2, 3) >= (1, 2, 3)
+        assert (1, 2, 3) < (1, 2, 3.5)
+        assert (1.5, 2.5, 3.5) > (1.5, 2.5, 3)
+        assert ('a', 'b', 'c') < ('a', 'b', 'd')
+        assert ('a', 'b', 'c') < ('a', 'ba', 'c')
+        assert sorted([(3, 2, 1), (1, 2, 3), (2, 1, 3)]) == [
+            (1, 2, 3), (2, 1, 3), (3, 2, 1)]
+
+    def test_homogeneous_nans(self):
+        N = float('nan')
+        T = (N, N, 1.5)
+        assert N in T
+        assert T == (N, N, 1.5)
+        assert (0.0, 0.0, 0.0) == (-0.0, -0.0, -0.0)
+        assert not T < (N, N, 1.5)
+        assert not (1.0, N, 2.0) < (1.0, 3.0, 4.0)
+
+    def test_homogeneous_identity(self):
+        s = 'some string'
+        t = (s, 'x', 'y')
+        assert t[0] is s
+        x = 10 ** 9
+        t = (x, x, x)
+        assert t[1] is x
+
 
 class AppTestAll(test_tupleobject.AppTestW_TupleObject):
     spaceconfig = {"objspace.std.withspecialisedtuple": True}
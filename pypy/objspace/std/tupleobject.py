@@ -73,6 +73,8 @@ class W_AbstractTupleObject(W_Root):
             return w_sequence
         else:
             tuple_w = space.fixedview(w_sequence)
+            if space.is_w(w_tupletype, space.w_tuple):
+                return space.newtuple(tuple_w)
         w_obj = space.allocate_instance(W_TupleObject, w_tupletype)
         W_TupleObject.__init__(w_obj, tuple_w)
         return w_obj
@@ -223,10 +225,10 @@ If the argument is a tuple, the return value is the same object.""",
 
     __eq__ = interpindirect2app(W_AbstractTupleObject.descr_eq),
     __ne__ = interpindirect2app(W_AbstractTupleObject.descr_ne),
-    __lt__ = interp2app(W_AbstractTupleObject.descr_lt),
-    __le__ = interp2app(W_AbstractTupleObject.descr_le),
-    __gt__ = interp2app(W_AbstractTupleObject.descr_gt),
-    __ge__ = interp2app(W_AbstractTupleObject.descr_ge),
+    __lt__ = interpindirect2app(W_AbstractTupleObject.descr_lt),
+    __le__ = interpindirect2app(W_AbstractTupleObject.descr_le),
+    __gt__ = interpindirect2app(W_AbstractTupleObject.descr_gt),
+    __ge__ = interpindirect2app(W_AbstractTupleObject.descr_ge),
 
     __len__ = interp2app(W_AbstractTupleObject.descr_len),
     __iter__ = interp2app(W_AbstractTupleObject.descr_iter),
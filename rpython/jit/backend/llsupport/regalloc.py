@@ -285,6 +285,8 @@ class RegisterManager(object):
         else:
             self.reg_bindings = {}
         self.bindings_to_frame_reg = {}
+        self.hint_regs = {}
+        self.hinted_regs = {}
         self.position = -1
         self.frame_manager = frame_manager
         self.assembler = assembler
@@ -392,10 +394,35 @@ class RegisterManager(object):
             return self.reg_bindings[v]
         except KeyError:
             if self.free_regs:
-                loc = self.free_regs.pop()
+                loc = self._pick_free_reg(v)
                 self.reg_bindings[v] = loc
                 return loc
 
+    def set_hint_reg(self, v, reg):
+        """ Record that 'v' would preferably live in 'reg', e.g. because
+        that's where the target of the final JUMP expects it.  Only an
+        optimization: it avoids register moves at the end of the loop.
+        """
+        self.hint_regs[v] = reg
+        self.hinted_regs[reg] = None
+
+    def _pick_free_reg(self, v):
+        """ Remove and return a free register for 'v'.  Prefer the one
+        hinted for 'v', and otherwise try not to take a register that is
+        hinted for some other variable.
+        """
+        hint = self.hint_regs.get(v, None)
+        if hint is not None and hint in self.free_regs:
+            self.free_regs.remove(hint)
+            return hint
+        if self.hinted_regs:
+            for i in range(len(self.free_regs) - 1, -1, -1):
+                reg = self.free_regs[i]
+                if reg not in self.hinted_regs:
+                    del self.free_regs[i]
+                    return reg
+        return self.free_regs.pop()
+
     def _spill_var(self, v, forbidden_vars, selected_reg,
                    need_lower_byte=False):
         v_to_spill = self._pick_variable_to_spill(v, forbidden_vars,
@@ -526,7 +553,7 @@ class RegisterManager(object):
 
     def _move_variable_away(self, v, prev_loc):
         if self.free_regs:
-            loc = self.free_regs.pop()
+            loc = self._pick_free_reg(v)
             self.reg_bindings[v] = loc
             self.assembler.regalloc_mov(prev_loc, loc)
         else:
@@ -557,9 +584,19 @@ class RegisterManager(object):
             # we need to find a new place for variable v and
             # store result in the same place
             loc = self.reg_bindings[v]
-            del self.reg_bindings[v]
             if self.frame_manager.get(v) is None:
+                # a move is needed anyway: if the result has a hint,
+                # copy v there and leave v where it is
+                hint = self.hint_regs.get(result_v, None)
+                if hint is not None and hint in self.free_regs:
+                    self.free_regs.remove(hint)
+                    self.assembler.regalloc_mov(loc, hint)
+                    self.reg_bindings[result_v] = hint
+                    return hint
+                del self.reg_bindings[v]
                 self._move_variable_away(v, loc)
+            else:
+                del self.reg_bindings[v]
             self.reg_bindings[result_v] = loc
         else:
             self._reallocate_from_to(v, result_v)
@@ -378,6 +378,24 @@ class TestRegalloc(object):
         rm._check_invariants()
 
 
+    def test_hint_regs(self):
+        b0, b1, b2, b3 = newboxes(0, 0, 0, 0)
+        longevity = {b0: (0, 2), b1: (0, 2), b2: (0, 2), b3: (0, 2)}
+        rm = RegisterManager(longevity)
+        rm.set_hint_reg(b1, r0)
+        rm.set_hint_reg(b2, r1)
+        rm.next_instruction()
+        # b0 has no hint: it should avoid r0 and r1
+        loc0 = rm.try_allocate_reg(b0)
+        assert loc0 is not r0 and loc0 is not r1
+        assert rm.try_allocate_reg(b1) is r0
+        # the hint is ignored if the register is already taken
+        rm.set_hint_reg(b3, r0)
+        loc3 = rm.try_allocate_reg(b3)
+        assert loc3 is not r0 and loc3 is not r1
+        assert rm.try_allocate_reg(b2) is r1
+        rm._check_invariants()
+
     def test_hint_frame_locations_1(self):
         for hint_value in range(11):
             b0, = newboxes(0)
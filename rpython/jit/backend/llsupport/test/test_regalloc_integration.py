@@ -548,6 +548,35 @@ class TestRegallocFloats(BaseTestRegalloc):
         self.interpret(ops, [0.1, .2, .3, .4, .5, .6, .7, .8, .9])
         assert self.getfloats(9) == [.1+.2, .9+3.5, .3, .4, .5, .6, .7, .8, .9]
 
+    def test_float_loop_jump_hints(self):
+        ops = '''
+        [f0, f1, i0]
+        f10 = float_add(f0, 0.0)
+        f11 = float_add(f1, 0.0)
+        i10 = int_add(i0, 0)
+        label(f10, f11, i10, descr=targettoken)
+        f2 = float_add(f10, 1.5)
+        f3 = float_mul(f11, 2.0)
+        f4 = float_sub(f2, f3)
+        i1 = int_add(i10, 1)
+        i2 = int_lt(i1, 5)
+        guard_true(i2) [f10, f11, i1]
+        jump(f4, f2, i1, descr=targettoken)
+        '''
+        loop = self.interpret(ops, [0.5, 0.25, 0])
+        f0, f1 = 0.5, 0.25
+        for i in range(4):
+            f0, f1 = f0 + 1.5 - f1 * 2.0, f0 + 1.5
+        assert self.getfloats(2) == [f0, f1]
+        regalloc = self.cpu.assembler._regalloc
+        if regalloc is None:
+            return
+        arglocs = self.targettoken._x86_arglocs
+        f4 = loop.operations[-1].getarg(0)
+        f2 = loop.operations[-1].getarg(1)
+        assert regalloc.xrm.hint_regs[f4] is arglocs[0]
+        assert regalloc.xrm.hint_regs[f2] is arglocs[1]
+
     def test_lt_const(self):
         ops = '''
         [f0]
@@ -456,6 +456,9 @@ class RegAlloc(BaseRegalloc):
 
     def _consider_lea(self, op, loc):
         argloc = self.loc(op.getarg(1))
+        # LEA reads 'loc' before writing 'resloc', so if the first argument
+        # dies here, its register can be reused for the result
+        self.rm.possibly_free_var(op.getarg(0))
         resloc = self.force_allocate_reg(op.result)
         self.perform(op, [loc, argloc], resloc)
 
@@ -1284,6 +1287,14 @@ class RegAlloc(BaseRegalloc):
                 loc = arglocs[i]
                 if isinstance(loc, FrameLoc):
                     self.fm.hint_frame_pos[box] = self.fm.get_loc_index(loc)
+                elif isinstance(loc, RegLoc):
+                    # same idea for registers: if 'box' is allocated later,
+                    # try to put it directly in the register that the
+                    # target LABEL expects, saving a move at the JUMP
+                    if box.type == FLOAT:
+                        self.xrm.set_hint_reg(box, loc)
+                    else:
+                        self.rm.set_hint_reg(box, loc)
 
     def consider_jump(self, op):
         assembler = self.assembler
@@ -232,12 +232,25 @@ class BlackholeInterpBuilder(object):
         handler.func_name = 'handler_' + name
         return handler
 
-    def acquire_interp(self):
-        if len(self.blackholeinterps) > 0:
-            return self.blackholeinterps.pop()
-        else:
+    def acquire_interp(self, jitcode=None):
+        """Get a free BlackholeInterpreter.  If 'jitcode' is given, prefer
+        one that last ran this jitcode: setposition() doesn't need to copy
+        its constants again then."""
+        interps = self.blackholeinterps
+        i = len(interps) - 1
+        if i < 0:
             self.num_interpreters += 1
             return BlackholeInterpreter(self, self.num_interpreters)
+        if jitcode is not None and interps[i].jitcode is not jitcode:
+            j = i - 1
+            while j >= 0:
+                if interps[j].jitcode is jitcode:
+                    interp = interps[j]
+                    interps[j] = interps[i]
+                    interps[i] = interp
+                    break
+                j -= 1
+        return interps.pop()
 
     def release_interp(self, interp):
         interp.cleanup_registers()
@@ -1658,7 +1671,8 @@ def convert_and_run_from_pyjitpl(metainterp, raising_exception=False):
     metainterp_sd = metainterp.staticdata
     nextbh = None
     for frame in metainterp.framestack:
-        curbh = metainterp_sd.blackholeinterpbuilder.acquire_interp()
+        curbh = metainterp_sd.blackholeinterpbuilder.acquire_interp(
+            frame.jitcode)
         curbh._copy_data_from_miframe(frame)
         curbh.nextblackholeinterp = nextbh
         nextbh = curbh
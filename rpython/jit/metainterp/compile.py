@@ -15,6 +15,7 @@ from rpython.jit.metainterp.history import (TreeLoop, Box, JitCellToken,
 from rpython.jit.metainterp import history, jitexc
 from rpython.jit.metainterp.optimize import InvalidLoop
 from rpython.jit.metainterp.inliner import Inliner
+from rpython.jit.metainterp.warmstate import DEFERRED_FRACTION
 from rpython.jit.metainterp.resume import NUMBERING, PENDINGFIELDSP, ResumeDataDirectReader
 from rpython.jit.codewriter import heaptracker, longlong
 
@@ -374,7 +375,13 @@ def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type):
                                       name=loopname)
     #
     if metainterp_sd.warmrunnerdesc is not None:    # for tests
-        metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(original_jitcell_token)
+        memory_manager = metainterp_sd.warmrunnerdesc.memory_manager
+        if asminfo is not None:
+            memory_manager.record_code_size(original_jitcell_token,
+                                            asminfo.asmlen)
+        memory_manager.keep_loop_alive(original_jitcell_token)
+        metainterp_sd.guard_profiler.record_trace(original_jitcell_token,
+                                                  'l', operations)
 
 def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
                            operations, original_loop_token):
@@ -414,6 +421,12 @@ def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
         ops_offset = None
     metainterp_sd.logger_ops.log_bridge(inputargs, operations, None, faildescr,
                                         ops_offset)
+    if metainterp_sd.warmrunnerdesc is not None:    # for tests
+        if asminfo is not None:
+            metainterp_sd.warmrunnerdesc.memory_manager.record_code_size(
+                original_loop_token, asminfo.asmlen)
+        metainterp_sd.guard_profiler.record_trace(original_loop_token, 'b',
+                                                  operations, faildescr)
     #
     #if metainterp_sd.warmrunnerdesc is not None:    # for tests
     #    metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(
@@ -493,7 +506,8 @@ class ResumeDescr(AbstractFailDescr):
 
 class ResumeGuardDescr(ResumeDescr):
     _attrs_ = ('rd_numb', 'rd_count', 'rd_consts', 'rd_virtuals',
-               'rd_frame_info_list', 'rd_pendingfields', 'status')
+               'rd_frame_info_list', 'rd_pendingfields', 'status',
+               'fail_count')
     
     rd_numb = lltype.nullptr(NUMBERING)
     rd_count = 0
@@ -503,6 +517,7 @@ class ResumeGuardDescr(ResumeDescr):
     rd_pendingfields = lltype.nullptr(PENDINGFIELDSP.TO)
 
     status = r_uint(0)
+    fail_count = 0      # only counted while the guard profiler is enabled
 
     def copy_all_attributes_from(self, other):
         assert isinstance(other, ResumeGuardDescr)
@@ -512,7 +527,7 @@ class ResumeGuardDescr(ResumeDescr):
         self.rd_pendingfields = other.rd_pendingfields
         self.rd_virtuals = other.rd_virtuals
         self.rd_numb = other.rd_numb
-        # we don't copy status
+        # we don't copy status nor fail_count
 
     ST_BUSY_FLAG    = 0x01     # if set, busy tracing from the guard
     ST_TYPE_MASK    = 0x06     # mask for the type (TY_xxx)
@@ -535,6 +550,8 @@ class ResumeGuardDescr(ResumeDescr):
             self.status = hash & self.ST_SHIFT_MASK
 
     def handle_fail(self, deadframe, metainterp_sd, jitdriver_sd):
+        if metainterp_sd.guard_profiler.enabled:
+            self.fail_count += 1
         if self.must_compile(deadframe, metainterp_sd, jitdriver_sd):
             self.start_compiling()
             try:
@@ -600,8 +617,13 @@ class ResumeGuardDescr(ResumeDescr):
             hash = r_uint(current_object_addr_as_int(self) * 777767777 +
                           intval * 1442968193)
         #
-        increment = jitdriver_sd.warmstate.increment_trace_eagerness
-        return jitcounter.tick(hash, increment)
+        warmstate = jitdriver_sd.warmstate
+        if not jitcounter.tick(hash, warmstate.increment_trace_eagerness):
+            return False
+        if warmstate.must_defer_compilation():
+            jitcounter.change_current_fraction(hash, DEFERRED_FRACTION)
+            return False
+        return True
 
     def get_index_of_guard_value(self):
         if (self.status & self.ST_TYPE_MASK) == 0:
@@ -721,6 +743,8 @@ class ResumeGuardForcedDescr(ResumeGuardDescr):
         # the virtualrefs and virtualizable have been forced by
         # handle_async_forcing() just a moment ago.
         from rpython.jit.metainterp.blackhole import resume_in_blackhole
+        if metainterp_sd.guard_profiler.enabled:
+            self.fail_count += 1
         hidden_all_virtuals = metainterp_sd.cpu.get_savedata_ref(deadframe)
         obj = AllVirtuals.show(metainterp_sd.cpu, hidden_all_virtuals)
         all_virtuals = obj.cache
@@ -572,6 +572,11 @@ class JitCellToken(AbstractDescr):
     # and more data specified by the backend when the loop is compiled
     number = -1
     generation = r_int64(0)
+    entry_count = 0     # for the memory manager, see memmgr.py
+    code_size = 0
+    eviction_score = 0.0
+    profiled_traces = None  # for the guard profiler, see jitprof.py
+    profiled_merge_points = None  # {guard descr: merge point args}
     # one purpose of LoopToken is to keep alive the CompiledLoopToken
     # returned by the backend.  When the LoopToken goes away, the
     # CompiledLoopToken has its __del__ called, which frees the assembler
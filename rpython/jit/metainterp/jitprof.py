@@ -3,10 +3,15 @@
 """
 
 import time
+import weakref
+from rpython.rtyper.annlowlevel import llstr
+from rpython.rtyper.lltypesystem import lltype
 from rpython.rlib.debug import debug_print, debug_start, debug_stop
 from rpython.rlib.debug import have_debug_prints
+from rpython.rlib.objectmodel import compute_unique_id
 from rpython.jit.metainterp.jitexc import JitException
 from rpython.rlib.jit import Counters
+from rpython.rlib.jit_hooks import GUARD_PROFILE_CONTAINER
 
 
 JITPROF_LINES = Counters.ncounters + 1 + 1
@@ -154,6 +159,21 @@ class Profiler(BaseProfiler):
         self._print_intline("nvirtuals", cnt[Counters.NVIRTUALS])
         self._print_intline("nvholes", cnt[Counters.NVHOLES])
         self._print_intline("nvreused", cnt[Counters.NVREUSED])
+        self._print_intline("resume bytes", cnt[Counters.RESUMEDATA_BYTES])
+        self._print_intline("resume shared",
+                            cnt[Counters.RESUMEDATA_BYTES_SHARED])
+        self._print_intline("evicted loops", cnt[Counters.EVICTED_LOOPS])
+        self._print_intline("recompiled loops",
+                            cnt[Counters.RECOMPILED_LOOPS])
+        # estimate the time saved by not tracing again the loops that
+        # aborted, using the average tracing time
+        skipped = cnt[Counters.TRACING_SKIPPED]
+        saved = 0.0
+        if cnt[Counters.TRACING] > 0:
+            saved = skipped * tim[Counters.TRACING] / cnt[Counters.TRACING]
+        self._print_line_time("tracing skipped", skipped, saved)
+        self._print_intline("over compile budget",
+                            cnt[Counters.OVER_COMPILE_BUDGET])
         cpu = self.cpu
         if cpu is not None:   # for some tests
             self._print_intline("Total # of loops",
@@ -177,3 +197,148 @@ class Profiler(BaseProfiler):
 
 class BrokenProfilerData(JitException):
     pass
+
+
+# ____________________________________________________________
+# per-guard failure profiling
+
+class ProfiledTrace(object):
+    """The guards of one compiled loop or bridge, in trace order."""
+
+    def __init__(self, type, loop_no, bridge_descr):
+        self.type = type                  # 'l' for a loop, 'b' for a bridge
+        self.loop_no = loop_no
+        self.bridge_descr = bridge_descr  # the guard a bridge starts from
+        self.descrs = []
+        self.opnames = []
+        self.locations = []     # index in 'merge_points', or -1
+        self.merge_points = []  # arguments of the debug_merge_points
+        self.location_strs = None
+
+    def get_location(self, metainterp_sd, index):
+        if index < 0:
+            return ''
+        if self.location_strs is None:
+            self.location_strs = [None] * len(self.merge_points)
+        loc = self.location_strs[index]
+        if loc is None:
+            args = self.merge_points[index]
+            jd_sd = metainterp_sd.jitdrivers_sd[args[0].getint()]
+            loc = jd_sd.warmstate.get_greenkey_location(args[3:])
+            self.location_strs[index] = loc
+        return loc
+
+
+class GuardProfiler(object):
+    """Remembers the guards of all compiled loops and bridges, and counts
+    their failures while enabled.  The guards are attached to the
+    JitCellToken of their loop, so they go away together with it; the
+    failures are only counted between enable() and disable(), which
+    makes it cheap to keep the profiler around and only turn it on for
+    a sampling window.
+    """
+    enabled = False
+
+    def __init__(self):
+        self.looptokens = []       # list of weakrefs to JitCellTokens
+        self.prune_limit = 16
+
+    def record_trace(self, looptoken, type, operations, bridge_descr=None):
+        from rpython.jit.metainterp.compile import ResumeGuardDescr
+        from rpython.jit.metainterp.resoperation import rop
+        assert looptoken is not None
+        trace = ProfiledTrace(type, looptoken.number, bridge_descr)
+        if looptoken.profiled_traces is None:
+            looptoken.profiled_traces = []
+            looptoken.profiled_merge_points = {}
+            self._add_looptoken(looptoken)
+        merge_points = looptoken.profiled_merge_points
+        # the guards at the start of a bridge are at the location of
+        # the guard that the bridge is attached to
+        merge_point = None
+        if bridge_descr is not None:
+            merge_point = merge_points.get(bridge_descr, None)
+        location = -1
+        for op in operations:
+            if op.getopnum() == rop.DEBUG_MERGE_POINT:
+                merge_point = op.getarglist()
+                location = -1
+            elif op.is_guard():
+                descr = op.getdescr()
+                if not isinstance(descr, ResumeGuardDescr):
+                    continue
+                if merge_point is not None:
+                    if location < 0:
+                        trace.merge_points.append(merge_point)
+                        location = len(trace.merge_points) - 1
+                    merge_points[descr] = merge_point
+                trace.descrs.append(descr)
+                trace.opnames.append(op.getopname())
+                trace.locations.append(location)
+        looptoken.profiled_traces.append(trace)
+
+    def _add_looptoken(self, looptoken):
+        # drop the dead weakrefs every time the list doubled in size
+        if len(self.looptokens) >= self.prune_limit:
+            self._live_looptokens()
+            self.prune_limit = max(16, len(self.looptokens) * 2)
+        self.looptokens.append(weakref.ref(looptoken))
+
+    def _live_looptokens(self):
+        result = []
+        alive = []
+        for ref in self.looptokens:
+            looptoken = ref()
+            if looptoken is not None:
+                alive.append(ref)
+                result.append(looptoken)
+        self.looptokens = alive
+        return result
+
+    def _live_traces(self):
+        result = []
+        for looptoken in self._live_looptokens():
+            result.extend(looptoken.profiled_traces)
+        return result
+
+    def enable(self):
+        for trace in self._live_traces():
+            for descr in trace.descrs:
+                descr.fail_count = 0
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def get_all_guards(self, metainterp_sd):
+        """Returns an instance of GUARD_PROFILE_CONTAINER from
+        rlib.jit_hooks, describing the guards of all live loops and
+        bridges."""
+        traces = self._live_traces()
+        bridged = {}
+        length = 0
+        for trace in traces:
+            if trace.bridge_descr is not None:
+                bridged[trace.bridge_descr] = None
+            length += len(trace.descrs)
+        result = lltype.malloc(GUARD_PROFILE_CONTAINER, length)
+        i = 0
+        for trace in traces:
+            if trace.bridge_descr is not None:
+                bridge_no = compute_unique_id(trace.bridge_descr)
+            else:
+                bridge_no = -1
+            for j in range(len(trace.descrs)):
+                descr = trace.descrs[j]
+                item = result[i]
+                item.type = trace.type
+                item.loop_no = trace.loop_no
+                item.bridge_no = bridge_no
+                item.guard_no = compute_unique_id(descr)
+                item.opname = llstr(trace.opnames[j])
+                item.location = llstr(trace.get_location(metainterp_sd,
+                                                         trace.locations[j]))
+                item.fail_count = descr.fail_count
+                item.has_bridge = descr in bridged
+                i += 1
+        return result
@@ -1,7 +1,10 @@
-import math
+import math, time
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.listsort import make_timsort_class
+from rpython.rlib.jit import Counters
+from rpython.jit.metainterp.jitprof import EmptyProfiler
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,8 +22,41 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# Loops that are entered often get to live longer: every LoopToken
+# counts in 'entry_count' how many times it was entered.  A loop entered
+# at least 2**HOTNESS_SHIFT times survives twice the max age, twice as
+# many entries give three times the max age, and so on up to
+# (MAX_HOTNESS+1) times the max age.
+# This keeps warm but infrequently used loops from being freed and
+# recompiled over and over again.
+#
+# Additionally, with set_code_budget(), the total size of the machine
+# code of the loops in 'alive_loops' is kept below the given budget.
+# When it is exceeded, the loops with the lowest score are removed until
+# we are back below 3/4 of the budget.  The score is the number of entries
+# divided by the number of generations since the last entry, so it
+# favors both frequently (LFU) and recently (LRU) used loops.
+#
+# Finally, with set_compile_budget(), the time spent tracing and compiling
+# is limited to a budget in every time window of a given length.  Once it
+# is used up, over_compile_budget() returns True until the next window
+# starts, and warmstate.py leaves the hot loops and bridges waiting.  Time
+# spent over the budget is carried over to the next windows, so that a
+# single long compilation cannot exceed the budget on average.
+#
+
+HOTNESS_SHIFT = 3
+MAX_HOTNESS = 4
+
+
+def _score_lt(a, b):
+    return a.eviction_score < b.eviction_score
+
+LoopsByScore = make_timsort_class(lt=_score_lt)
+
 
 class MemoryManager(object):
+    timer = time.time
 
     def __init__(self):
         self.check_frequency = -1
@@ -38,6 +74,14 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.alive_code_size = 0       # machine code size of 'alive_loops'
+        self.code_budget = 0           # 0 = no limit
+        self.compile_budget = 0.0      # seconds per window, 0 = no limit
+        self.compile_window = 0.1      # seconds
+        self.window_start = 0.0
+        self.compile_time_in_window = 0.0
+        self.compiling_since = -1.0    # -1.0 = not compiling now
+        self.profiler = EmptyProfiler()
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,16 +93,96 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_code_budget(self, budget):
+        if budget <= 0:
+            budget = 0
+        self.code_budget = budget
+
+    def set_compile_budget(self, budget_ms):
+        if budget_ms <= 0:
+            budget_ms = 0
+        self.compile_budget = budget_ms / 1000.0
+
+    def set_compile_budget_window(self, window_ms):
+        if window_ms <= 0:
+            window_ms = 1
+        self.compile_window = window_ms / 1000.0
+
+    def start_compiling(self):
+        """Called when we start tracing a loop or a bridge."""
+        if self.compile_budget > 0.0 and self.compiling_since < 0.0:
+            self.compiling_since = self.timer()
+
+    def stop_compiling(self):
+        """Called when we stop tracing and compiling, successfully or not.
+        Time spent in the blackhole interpreter after an abort is not
+        counted."""
+        if self.compiling_since < 0.0:
+            return
+        now = self.timer()
+        self._update_window(now)
+        self.compile_time_in_window += now - self.compiling_since
+        self.compiling_since = -1.0
+
+    def over_compile_budget(self):
+        """Return True if the compile budget of the current time window is
+        used up.  Then the caller should not start tracing now."""
+        if self.compile_budget <= 0.0:
+            return False
+        self._update_window(self.timer())
+        if self.compile_time_in_window < self.compile_budget:
+            return False
+        self.profiler.count(Counters.OVER_COMPILE_BUDGET)
+        return True
+
+    def _update_window(self, now):
+        elapsed = now - self.window_start
+        if elapsed >= self.compile_window:
+            windows = math.floor(elapsed / self.compile_window)
+            self.compile_time_in_window -= windows * self.compile_budget
+            if self.compile_time_in_window < 0.0:
+                self.compile_time_in_window = 0.0
+            self.window_start = now
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        if self.code_budget > 0 and self.alive_code_size > self.code_budget:
+            self._kill_cold_loops_now()
 
     def keep_loop_alive(self, looptoken):
+        looptoken.entry_count += 1
         if looptoken.generation != self.current_generation:
             looptoken.generation = self.current_generation
-            self.alive_loops[looptoken] = None
+            if looptoken not in self.alive_loops:
+                self.alive_loops[looptoken] = None
+                self.alive_code_size += looptoken.code_size
+
+    def record_code_size(self, looptoken, size):
+        """Record that 'size' more bytes of machine code belong to
+        'looptoken', either for the loop itself or for a new bridge."""
+        looptoken.code_size += size
+        if looptoken in self.alive_loops:
+            self.alive_code_size += size
+
+    def record_recompilation(self):
+        """Called when we compile again a loop that was freed."""
+        self.profiler.count(Counters.RECOMPILED_LOOPS)
+
+    def _forget_loop(self, looptoken):
+        del self.alive_loops[looptoken]
+        self.alive_code_size -= looptoken.code_size
+        self.profiler.count(Counters.EVICTED_LOOPS)
+
+    def _hotness(self, looptoken):
+        count = looptoken.entry_count >> HOTNESS_SHIFT
+        hotness = 0
+        while count > 0 and hotness < MAX_HOTNESS:
+            count >>= 1
+            hotness += 1
+        return hotness
 
     def _kill_old_loops_now(self):
         debug_start("jit-mem-collect")
@@ -66,18 +190,51 @@ class MemoryManager(object):
         #print self.alive_loops.keys()
         debug_print("Current generation:", self.current_generation)
         debug_print("Loop tokens before:", oldtotal)
-        max_generation = self.current_generation - (self.max_age-1)
         for looptoken in self.alive_loops.keys():
+            max_age = self.max_age * (self._hotness(looptoken) + 1)
+            max_generation = self.current_generation - (max_age-1)
             if (0 <= looptoken.generation < max_generation or
                 looptoken.invalidated):
-                del self.alive_loops[looptoken]
+                self._forget_loop(looptoken)
         newtotal = len(self.alive_loops)
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
         debug_print("Loop tokens left:  ", newtotal)
         #print self.alive_loops.keys()
+        looptoken = None
+        self._collect_if_needed(oldtotal, newtotal)
+        debug_stop("jit-mem-collect")
+
+    def _kill_cold_loops_now(self):
+        debug_start("jit-mem-collect")
+        oldtotal = len(self.alive_loops)
+        debug_print("Current generation:", self.current_generation)
+        debug_print("Code size before:  ", self.alive_code_size)
+        candidates = []
+        for looptoken in self.alive_loops.keys():
+            if looptoken.invalidated:
+                looptoken.eviction_score = -1.0
+            else:
+                age = self.current_generation - looptoken.generation
+                looptoken.eviction_score = (float(looptoken.entry_count) /
+                                            float(age + 1))
+            candidates.append(looptoken)
+        LoopsByScore(candidates).sort()
+        target = self.code_budget - self.code_budget // 4
+        for looptoken in candidates:
+            if self.alive_code_size <= target and not looptoken.invalidated:
+                break
+            self._forget_loop(looptoken)
+        newtotal = len(self.alive_loops)
+        debug_print("Code size after:   ", self.alive_code_size)
+        debug_print("Loop tokens freed: ", oldtotal - newtotal)
+        debug_print("Loop tokens left:  ", newtotal)
+        looptoken = None
+        candidates = None
+        self._collect_if_needed(oldtotal, newtotal)
+        debug_stop("jit-mem-collect")
+
+    def _collect_if_needed(self, oldtotal, newtotal):
         if not we_are_translated() and oldtotal != newtotal:
-            looptoken = None
             from rpython.rlib import rgc
             # a single one is not enough for all tests :-(
             rgc.collect(); rgc.collect(); rgc.collect()
-        debug_stop("jit-mem-collect")
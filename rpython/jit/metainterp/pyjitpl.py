@@ -9,7 +9,7 @@ from rpython.jit.metainterp import history, compile, resume, executor, jitexc
 from rpython.jit.metainterp.heapcache import HeapCache
 from rpython.jit.metainterp.history import (Const, ConstInt, ConstPtr,
     ConstFloat, Box, TargetToken, MissingValue)
-from rpython.jit.metainterp.jitprof import EmptyProfiler
+from rpython.jit.metainterp.jitprof import EmptyProfiler, GuardProfiler
 from rpython.jit.metainterp.logger import Logger
 from rpython.jit.metainterp.optimizeopt.util import args_dict
 from rpython.jit.metainterp.resoperation import rop, GuardResOp
@@ -1554,6 +1554,7 @@ class MetaInterpStaticData(object):
 
         self.profiler = ProfilerClass()
         self.profiler.cpu = cpu
+        self.guard_profiler = GuardProfiler()
         self.warmrunnerdesc = warmrunnerdesc
         if warmrunnerdesc:
             self.config = warmrunnerdesc.translator.config
@@ -1692,6 +1693,15 @@ class MetaInterpStaticData(object):
         if self.warmrunnerdesc is not None:       # for tests
             self.warmrunnerdesc.memory_manager.next_generation()
 
+    def start_compiling(self):
+        # Measure the time spent tracing and compiling for 'compile_budget'
+        if self.warmrunnerdesc is not None:       # for tests
+            self.warmrunnerdesc.memory_manager.start_compiling()
+
+    def stop_compiling(self):
+        if self.warmrunnerdesc is not None:       # for tests
+            self.warmrunnerdesc.memory_manager.stop_compiling()
+
     # ---------------- logging ------------------------
 
     def log(self, msg):
@@ -2069,6 +2079,10 @@ class MetaInterp(object):
                                                           self.staticdata.logger_ops._make_log_operations(),
                                                           self.history.operations)
         self.staticdata.stats.aborted()
+        resumekey = self.resumekey
+        if isinstance(resumekey, compile.ResumeFromInterpDescr):
+            # we were tracing a loop from the interpreter, not a bridge
+            jd_sd.warmstate.tracing_aborted(resumekey.original_greenkey)
 
     def blackhole_if_trace_too_long(self):
         warmrunnerstate = self.jitdriver_sd.warmstate
@@ -2117,11 +2131,13 @@ class MetaInterp(object):
         self.staticdata.profiler.start_tracing()
         assert jitdriver_sd is self.jitdriver_sd
         self.staticdata.try_to_free_some_loops()
+        self.staticdata.start_compiling()
         self.create_empty_history()
         try:
             original_boxes = self.initialize_original_boxes(jitdriver_sd, *args)
             return self._compile_and_run_once(original_boxes)
         finally:
+            self.staticdata.stop_compiling()
             self.staticdata.profiler.end_tracing()
             debug_stop('jit-tracing')
 
@@ -2149,10 +2165,12 @@ class MetaInterp(object):
         if self.resumekey_original_loop_token is None:
             raise compile.giveup() # should be rare
         self.staticdata.try_to_free_some_loops()
+        self.staticdata.start_compiling()
         self.initialize_state_from_guard_failure(key, deadframe)
         try:
             return self._handle_guard_failure(key, deadframe)
         finally:
+            self.staticdata.stop_compiling()
             self.resumekey_original_loop_token = None
             self.staticdata.profiler.end_tracing()
             debug_stop('jit-tracing')
@@ -2178,6 +2196,7 @@ class MetaInterp(object):
         # run it.
         from rpython.jit.metainterp.blackhole import convert_and_run_from_pyjitpl
         self.aborted_tracing(stb.reason)
+        self.staticdata.stop_compiling()
         convert_and_run_from_pyjitpl(self, stb.raising_exception)
         assert False    # ^^^ must raise
 
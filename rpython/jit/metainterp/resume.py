@@ -5,7 +5,7 @@ from rpython.jit.metainterp.history import (Box, Const, ConstInt, getkind,
 from rpython.jit.metainterp.resoperation import rop
 from rpython.rlib import rarithmetic, rstack
 from rpython.rlib.objectmodel import (we_are_translated, specialize,
-        compute_unique_id, import_from_mixin)
+        compute_unique_id, import_from_mixin, r_dict)
 from rpython.rlib.debug import (have_debug_prints, ll_assert, debug_start,
     debug_stop, debug_print)
 from rpython.rtyper import annlowlevel
@@ -124,6 +124,26 @@ def tagged_list_eq(tl1, tl2):
             return False
     return True
 
+class NumberingKey(object):
+    """The content of a NUMBERING, used to share equal ones."""
+    def __init__(self, prev, nums):
+        self.prev = prev
+        self.nums = nums
+
+def numbering_key_eq(key1, key2):
+    return key1.prev == key2.prev and tagged_list_eq(key1.nums, key2.nums)
+
+def numbering_key_hash(key):
+    x = len(key.nums)
+    for num in key.nums:
+        x = rarithmetic.intmask((x * 1000003) ^ rarithmetic.widen(num))
+    return x
+
+def numbering_size(length):
+    # approximate: the GC header, 'prev' and the length of 'nums', plus
+    # the items themselves
+    return 3 * rffi.sizeof(lltype.Signed) + length * rffi.sizeof(rffi.SHORT)
+
 TAGCONST    = 0
 TAGINT      = 1
 TAGBOX      = 2
@@ -144,12 +164,15 @@ class ResumeDataLoopMemo(object):
         self.large_ints = {}
         self.refs = self.cpu.ts.new_ref_dict_2()
         self.numberings = {}
+        self.shared_numberings = r_dict(numbering_key_eq, numbering_key_hash)
         self.cached_boxes = {}
         self.cached_virtuals = {}
 
         self.nvirtuals = 0
         self.nvholes = 0
         self.nvreused = 0
+        self.numbering_bytes = 0
+        self.numbering_bytes_shared = 0
 
     def getconst(self, const):
         if const.type == INT:
@@ -197,7 +220,7 @@ class ResumeDataLoopMemo(object):
         n = len(liveboxes) - v
         boxes = snapshot.boxes
         length = len(boxes)
-        numb = lltype.malloc(NUMBERING, length)
+        nums = [UNASSIGNED] * length
         for i in range(length):
             box = boxes[i]
             value = optimizer.getvalue(box)
@@ -215,12 +238,30 @@ class ResumeDataLoopMemo(object):
                     tagged = tag(n, TAGBOX)
                     n += 1
                 liveboxes[box] = tagged
-            numb.nums[i] = tagged
+            nums[i] = tagged
         #
-        numb.prev = numb1
+        numb = self._get_numbering(numb1, nums)
         self.numberings[snapshot] = numb, liveboxes, v
         return numb, liveboxes.copy(), v
 
+    def _get_numbering(self, prev, nums):
+        # Many guards end up with exactly the same numbering, e.g. for
+        # consecutive guards in the same frame, or for the virtualizable
+        # and virtualref boxes.  Share them, as NUMBERINGs are immutable.
+        key = NumberingKey(prev, nums)
+        size = numbering_size(len(nums))
+        numb = self.shared_numberings.get(key, lltype.nullptr(NUMBERING))
+        if numb:
+            self.numbering_bytes_shared += size
+            return numb
+        numb = lltype.malloc(NUMBERING, len(nums))
+        for i in range(len(nums)):
+            numb.nums[i] = nums[i]
+        numb.prev = prev
+        self.shared_numberings[key] = numb
+        self.numbering_bytes += size
+        return numb
+
     def forget_numberings(self, virtualbox):
         # XXX ideally clear only the affected numberings
         self.numberings.clear()
@@ -261,6 +302,10 @@ class ResumeDataLoopMemo(object):
         profiler.count(jitprof.Counters.NVIRTUALS, self.nvirtuals)
         profiler.count(jitprof.Counters.NVHOLES, self.nvholes)
         profiler.count(jitprof.Counters.NVREUSED, self.nvreused)
+        profiler.count(jitprof.Counters.RESUMEDATA_BYTES,
+                       self.numbering_bytes)
+        profiler.count(jitprof.Counters.RESUMEDATA_BYTES_SHARED,
+                       self.numbering_bytes_shared)
 
 _frame_info_placeholder = (None, 0, 0)
 
@@ -1197,31 +1242,26 @@ def blackhole_from_resumedata(blackholeinterpbuilder, jitdriver_sd, storage,
     finally:
         rstack._stack_criticalcode_stop()
     #
-    # First get a chain of blackhole interpreters whose length is given
-    # by the depth of rd_frame_info_list.  The first one we get must be
-    # the bottom one, i.e. the last one in the chain, in order to make
-    # the comment in BlackholeInterpreter.setposition() valid.
-    nextbh = None
-    frameinfo = storage.rd_frame_info_list
-    while True:
-        curbh = blackholeinterpbuilder.acquire_interp()
-        curbh.nextblackholeinterp = nextbh
-        nextbh = curbh
-        frameinfo = frameinfo.prev
-        if frameinfo is None:
-            break
-    firstbh = nextbh
-    #
-    # Now fill the blackhole interpreters with resume data.
-    curbh = firstbh
+    # Get a chain of blackhole interpreters whose length is given by the
+    # depth of rd_frame_info_list, and fill them with resume data.  We ask
+    # for interpreters that last ran the same jitcode, to make the comment
+    # in BlackholeInterpreter.setposition() valid.
+    firstbh = None
+    prevbh = None
     frameinfo = storage.rd_frame_info_list
     while True:
+        curbh = blackholeinterpbuilder.acquire_interp(frameinfo.jitcode)
+        if prevbh is None:
+            firstbh = curbh
+        else:
+            prevbh.nextblackholeinterp = curbh
         curbh.setposition(frameinfo.jitcode, frameinfo.pc)
         resumereader.consume_one_section(curbh)
-        curbh = curbh.nextblackholeinterp
+        prevbh = curbh
         frameinfo = frameinfo.prev
         if frameinfo is None:
             break
+    prevbh.nextblackholeinterp = None
     return firstbh
 
 def force_from_resumedata(metainterp_sd, storage, deadframe, vinfo, ginfo):
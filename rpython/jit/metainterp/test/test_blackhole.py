@@ -156,6 +156,24 @@ class TestBlackhole(LLJitMixin):
         interp3 = builder.acquire_interp()
         assert builder.num_interpreters == 2
 
+    def test_blackholeinterp_cache_same_jitcode(self):
+        class FakeJitcode:
+            def num_regs_r(self):
+                return 0
+        jitcode1 = FakeJitcode()
+        jitcode2 = FakeJitcode()
+        interp1 = getblackholeinterp({})
+        interp1.jitcode = jitcode1
+        builder = interp1.builder
+        interp2 = builder.acquire_interp()
+        interp2.jitcode = jitcode2
+        builder.release_interp(interp1)
+        builder.release_interp(interp2)
+        assert builder.acquire_interp(jitcode1) is interp1
+        assert builder.acquire_interp(FakeJitcode()) is interp2
+        assert builder.acquire_interp(jitcode1) is not interp1
+        assert builder.num_interpreters == 3
+
     def test_blackholeinterp_cache_normal(self):
         myjitdriver = JitDriver(greens = [], reds = ['x', 'y'])
         def choices(x):
@@ -191,6 +191,49 @@ class JitHookInterfaceTests(object):
             assert jit_hooks.stats_get_times_value(None, Counters.TRACING) == 0
         self.meta_interp(main, [], ProfilerClass=EmptyProfiler)
 
+    def test_guard_profile(self):
+        driver = JitDriver(greens = ['pc'], reds = ['i', 's'],
+                           get_printable_location=lambda pc: 'pc %d' % pc)
+
+        def loop(pc, i):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(pc=pc, i=i, s=s)
+                s += 2
+                i -= 1
+            return s
+
+        def check(l, expected_failures, expected_bridges):
+            failures = 0
+            bridges = 0
+            for i in range(len(l)):
+                assert l[i].type == 'l'
+                assert l[i].loop_no >= 0
+                assert l[i].bridge_no == -1
+                assert hlstr(l[i].opname).startswith('guard_')
+                assert hlstr(l[i].location) == 'pc 7'
+                failures += l[i].fail_count
+                if l[i].has_bridge:
+                    bridges += 1
+            assert failures == expected_failures
+            assert bridges == expected_bridges
+
+        def main(pc):
+            loop(pc, 30)
+            l = jit_hooks.stats_get_guard_profile(None)
+            assert len(l) > 0
+            check(l, 0, 0)
+            # the loop exit guard fails and gets a bridge
+            jit_hooks.stats_set_guard_profiling(None, True)
+            loop(pc, 30)
+            check(jit_hooks.stats_get_guard_profile(None), 1, 1)
+            jit_hooks.stats_set_guard_profiling(None, False)
+            # enabling again starts a new sampling window
+            jit_hooks.stats_set_guard_profiling(None, True)
+            check(jit_hooks.stats_get_guard_profile(None), 0, 1)
+
+        self.meta_interp(main, [7])
+
 
 class LLJitHookInterfaceTests(JitHookInterfaceTests):
     # use this for any backend, instead of the super class
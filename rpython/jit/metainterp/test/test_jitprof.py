@@ -53,8 +53,12 @@ class TestProfile(ProfilerMixin):
             ]
         assert profiler.events == expected
         assert profiler.times == [2, 1]
-        assert profiler.counters == [1, 1, 3, 3, 2, 15, 2, 0, 0, 0, 0,
-                                     0, 0, 0, 0, 0]
+        counters = profiler.counters
+        assert counters[:16] == [1, 1, 3, 3, 2, 15, 2, 0, 0, 0, 0,
+                                 0, 0, 0, 0, 0]
+        assert counters[Counters.RESUMEDATA_BYTES] > 0
+        assert counters[Counters.RESUMEDATA_BYTES_SHARED] >= 0
+        assert counters[Counters.RESUMEDATA_BYTES_SHARED + 1:] == [0] * 4
 
     def test_simple_loop_with_call(self):
         @dont_look_inside
@@ -95,3 +99,35 @@ class TestProfile(ProfilerMixin):
         assert res == f(6, 7, 2)
         profiler = pyjitpl._warmrunnerdesc.metainterp_sd.profiler
         assert profiler.calls == 1
+
+def test_guard_profiler_record_trace():
+    from rpython.jit.metainterp.jitprof import GuardProfiler
+    from rpython.jit.metainterp.compile import ResumeGuardDescr
+    from rpython.jit.metainterp.history import JitCellToken, BoxInt, ConstInt
+    from rpython.jit.metainterp.resoperation import ResOperation, rop
+
+    def merge_point(pc):
+        return ResOperation(rop.DEBUG_MERGE_POINT,
+                            [ConstInt(0), ConstInt(0), ConstInt(0),
+                             ConstInt(pc)], None)
+
+    def guard(descr):
+        return ResOperation(rop.GUARD_TRUE, [BoxInt()], None, descr=descr)
+
+    profiler = GuardProfiler()
+    token = JitCellToken()
+    d1, d2, d3 = ResumeGuardDescr(), ResumeGuardDescr(), ResumeGuardDescr()
+    # recorded even while not enabled
+    profiler.record_trace(token, 'l', [merge_point(5), guard(d1),
+                                       merge_point(6), guard(d2)])
+    # the guards at the start of a bridge are at the location of the
+    # guard that the bridge is attached to
+    profiler.record_trace(token, 'b', [guard(d3), merge_point(7)], d2)
+    bridge = token.profiled_traces[1]
+    assert bridge.descrs == [d3]
+    assert bridge.merge_points[0][3].getint() == 6
+    assert profiler._live_traces() == token.profiled_traces
+    del token
+    import gc; gc.collect()
+    assert profiler._live_traces() == []
+    assert profiler.looptokens == []
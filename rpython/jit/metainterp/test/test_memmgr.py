@@ -21,6 +21,9 @@ from rpython.rlib import rgc
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    entry_count = 0
+    code_size = 0
+    eviction_score = 0.0
 
 
 class _TestMemoryManager:
@@ -78,6 +81,91 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def test_hot_loop_lives_longer(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(4, 1)
+        cold = FakeLoopToken()
+        hot = FakeLoopToken()
+        memmgr.keep_loop_alive(cold)
+        for i in range(16):
+            memmgr.keep_loop_alive(hot)
+        for i in range(20):
+            memmgr.next_generation()
+            if i < 3:
+                assert memmgr.alive_loops == {cold: None, hot: None}
+            elif i < 11:     # 16 entries: three times the max age
+                assert memmgr.alive_loops == {hot: None}
+            else:
+                assert memmgr.alive_loops == {}
+
+    def test_code_budget(self):
+        memmgr = MemoryManager()
+        memmgr.set_code_budget(1000)
+        tokens = [FakeLoopToken() for i in range(4)]
+        for i, token in enumerate(tokens):
+            if i > 0:
+                memmgr.next_generation()
+            memmgr.keep_loop_alive(token)
+            memmgr.record_code_size(token, 300)
+            for j in range(i + 1):
+                memmgr.keep_loop_alive(tokens[j])
+        assert memmgr.alive_code_size == 1200
+        memmgr.next_generation()
+        # tokens[2] and tokens[3] have been entered less often
+        assert memmgr.alive_loops == {tokens[0]: None, tokens[1]: None}
+        assert memmgr.alive_code_size == 600
+        # a loop that is entered again comes back in the count
+        memmgr.keep_loop_alive(tokens[3])
+        assert memmgr.alive_code_size == 900
+        memmgr.record_code_size(tokens[3], 50)    # a new bridge
+        assert memmgr.alive_code_size == 950
+        # tokens[3] is the most recently used, tokens[1] is now the coldest
+        for i in range(3):
+            memmgr.next_generation()
+        memmgr.keep_loop_alive(tokens[3])
+        memmgr.record_code_size(tokens[3], 100)
+        memmgr.next_generation()
+        assert memmgr.alive_loops == {tokens[0]: None, tokens[3]: None}
+        assert memmgr.alive_code_size == 750
+
+    def test_compile_budget(self):
+        now = [1000.0]
+        memmgr = MemoryManager()
+        memmgr.timer = lambda: now[0]
+        assert not memmgr.over_compile_budget()     # no budget by default
+        memmgr.set_compile_budget(10)
+        memmgr.set_compile_budget_window(100)
+        assert not memmgr.over_compile_budget()
+        memmgr.start_compiling()
+        now[0] += 0.004
+        memmgr.stop_compiling()
+        assert not memmgr.over_compile_budget()
+        memmgr.start_compiling()
+        now[0] += 0.007
+        memmgr.stop_compiling()
+        assert memmgr.over_compile_budget()
+        now[0] += 0.080
+        assert memmgr.over_compile_budget()
+        # the next window starts; the 1ms over the budget is carried over
+        now[0] += 0.010
+        assert not memmgr.over_compile_budget()
+        memmgr.start_compiling()
+        now[0] += 0.0095
+        memmgr.stop_compiling()
+        assert memmgr.over_compile_budget()
+        # a compilation of 35ms uses the budget of the next windows too
+        now[0] += 0.100
+        memmgr.start_compiling()
+        now[0] += 0.035
+        memmgr.stop_compiling()
+        now[0] += 0.100
+        assert memmgr.over_compile_budget()
+        now[0] += 0.200
+        assert not memmgr.over_compile_budget()
+        # stop_compiling() without start_compiling() does nothing
+        memmgr.stop_compiling()
+        assert not memmgr.over_compile_budget()
+
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
@@ -224,6 +312,38 @@ class _TestIntegration(LLJitMixin):
         # Loop with number 0, h(), has not been freed
         assert 0 in [t.number for t in tokens if t]
 
+    def test_recompilations_are_counted(self):
+        from rpython.jit.metainterp import pyjitpl
+        from rpython.jit.metainterp.jitprof import Profiler
+        from rpython.rlib.jit import Counters
+        myjitdriver = JitDriver(greens=['m'], reds=['n'])
+        def g(m):
+            n = 10
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n, m=m)
+                myjitdriver.jit_merge_point(n=n, m=m)
+                n = n - 1
+            return 21
+        def f():
+            for i in range(10):
+                g(1)
+                g(2)
+                g(1)
+                g(3)
+                g(1)
+                g(4)
+                g(1)
+                g(5)
+            return 42
+
+        res = self.meta_interp(f, [], loop_longevity=3,
+                               ProfilerClass=Profiler)
+        assert res == 42
+        profiler = pyjitpl._warmrunnerdesc.metainterp_sd.profiler
+        assert profiler.get_counter(Counters.EVICTED_LOOPS) > 0
+        # g(2) to g(5) are freed and compiled again 9 times each
+        assert profiler.get_counter(Counters.RECOMPILED_LOOPS) == 4 * 9
+
 # ____________________________________________________________
 
 def test_all():
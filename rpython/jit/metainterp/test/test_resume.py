@@ -969,6 +969,27 @@ def test_ResumeDataLoopMemo_number():
                                                 tag(1, TAGVIRTUAL)]
     assert numb5.prev == numb4
 
+def test_ResumeDataLoopMemo_number_shared():
+    b1, b2 = [BoxInt(), BoxInt()]
+    c1 = ConstInt(1)
+    snap = Snapshot(None, [b1, c1])
+    snap1 = Snapshot(snap, [b2, b1])
+    snap2 = Snapshot(snap, [b2, b1])
+    snap3 = Snapshot(snap, [b1, b2])
+
+    memo = ResumeDataLoopMemo(FakeMetaInterpStaticData())
+    numb1, liveboxes1, v = memo.number(FakeOptimizer({}), snap1)
+    numb2, liveboxes2, v = memo.number(FakeOptimizer({}), snap2)
+    numb3, liveboxes3, v = memo.number(FakeOptimizer({}), snap3)
+    assert numb2 == numb1
+    assert liveboxes2 == liveboxes1
+    assert liveboxes2 is not liveboxes1
+    assert numb3 != numb1
+    assert numb3.prev == numb1.prev
+    size = numbering_size(2)
+    assert memo.numbering_bytes == 3 * size
+    assert memo.numbering_bytes_shared == size
+
 def test_ResumeDataLoopMemo_number_boxes():
     memo = ResumeDataLoopMemo(FakeMetaInterpStaticData())
     b1, b2 = [BoxInt(), BoxInt()]
@@ -2,6 +2,7 @@ import py
 from rpython.jit.metainterp import jitexc
 from rpython.jit.metainterp.warmspot import get_stats
 from rpython.rlib.jit import JitDriver, set_param, unroll_safe, jit_callback
+from rpython.rlib.jit import Counters
 from rpython.jit.backend.llgraph import runner
 
 from rpython.jit.metainterp.test.support import LLJitMixin
@@ -108,6 +109,149 @@ class WarmspotTests(object):
         assert res == 0
         self.check_resops(new_with_vtable=0)
 
+    def test_warmup_profile(self):
+        import os
+        from rpython.rtyper.annlowlevel import llstr, hlstr
+        from rpython.tool.udir import udir
+
+        def get_printable_location(code):
+            return 'code %d' % code
+        myjitdriver = JitDriver(greens=['code'], reds=['n'],
+                                get_printable_location=get_printable_location)
+        def f(code, n, path):
+            set_param(myjitdriver, 'threshold', 100)
+            set_param(myjitdriver, 'warmup_profile', hlstr(path))
+            while n > 0:
+                myjitdriver.can_enter_jit(code=code, n=n)
+                myjitdriver.jit_merge_point(code=code, n=n)
+                n -= 1
+            return n
+
+        path = str(udir.join('test_warmup_profile'))
+        if os.path.exists(path):
+            os.unlink(path)
+        # 30 iterations are not enough to reach the threshold
+        self.meta_interp(f, [5, 30, llstr(path)])
+        self.check_trace_count(0)
+        # compile the loop once, which records it in the profile
+        self.meta_interp(f, [5, 200, llstr(path)])
+        self.check_trace_count(1)
+        # now 30 iterations are enough, but only for the same location
+        self.meta_interp(f, [5, 30, llstr(path)])
+        self.check_trace_count(1)
+        self.meta_interp(f, [6, 30, llstr(path)])
+        self.check_trace_count(0)
+
+    def test_tracing_backoff(self):
+        from rpython.jit.metainterp import pyjitpl
+        from rpython.jit.metainterp.jitprof import Profiler
+        myjitdriver = JitDriver(greens=[], reds=['n', 'total'])
+
+        @unroll_safe
+        def long_body(n):
+            total = 0
+            for i in range(50):
+                total += n ^ i
+            return total
+
+        def f(n):
+            set_param(myjitdriver, 'trace_limit', 30)
+            total = 0
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n, total=total)
+                myjitdriver.jit_merge_point(n=n, total=total)
+                total += long_body(n)
+                n -= 1
+            return total
+
+        res = self.meta_interp(f, [1000], ProfilerClass=Profiler,
+                               max_abort_backoff=6)
+        assert res == f(1000)
+        self.check_trace_count(0)
+        counters = pyjitpl._warmrunnerdesc.metainterp_sd.profiler.counters
+        # without the backoff, we would try to trace every 3 iterations
+        assert 0 < counters[Counters.ABORT_TOO_LONG] < 20
+        assert counters[Counters.TRACING_SKIPPED] > 100
+
+    def test_defer_compilation(self):
+        myjitdriver = JitDriver(greens=[], reds=['n', 'total', 'stop'])
+
+        def loop(n, total, stop):
+            while n > stop:
+                myjitdriver.can_enter_jit(n=n, total=total, stop=stop)
+                myjitdriver.jit_merge_point(n=n, total=total, stop=stop)
+                if n < 30:
+                    total += 2
+                total += 1
+                n -= 1
+            return total
+
+        def f(n, deferred, m, stop):
+            set_param(myjitdriver, 'defer_compilation', deferred)
+            total = loop(n, 0, stop)
+            set_param(myjitdriver, 'defer_compilation', 0)
+            return loop(m, total, stop)
+
+        res = self.meta_interp(f, [100, 0, 0, 0])
+        assert res == f(100, 0, 0, 0)
+        self.check_trace_count(2)      # the loop and a bridge
+        res = self.meta_interp(f, [100, 1, 0, 0])
+        assert res == f(100, 1, 0, 0)
+        self.check_trace_count(0)
+        # once compilation is allowed again, the loop is traced at once
+        res = self.meta_interp(f, [100, 1, 2, 0])
+        assert res == f(100, 1, 2, 0)
+        self.check_trace_count(1)
+        # bridges are not compiled either
+        def g(deferred, stop):
+            total = loop(100, 0, stop)
+            set_param(myjitdriver, 'defer_compilation', deferred)
+            total = loop(stop, total, 0)
+            set_param(myjitdriver, 'defer_compilation', 0)
+            return total
+
+        res = self.meta_interp(g, [0, 40])
+        assert res == g(0, 40)
+        self.check_trace_count(2)
+        res = self.meta_interp(g, [1, 40])
+        assert res == g(1, 40)
+        self.check_trace_count(1)
+
+    def test_compile_budget(self):
+        from rpython.jit.metainterp import pyjitpl
+        from rpython.jit.metainterp.jitprof import Profiler
+        myjitdriver = JitDriver(greens=['k'], reds=['n', 'total'])
+
+        def loop(k, n):
+            total = 0
+            while n > 0:
+                myjitdriver.can_enter_jit(k=k, n=n, total=total)
+                myjitdriver.jit_merge_point(k=k, n=n, total=total)
+                total += k
+                n -= 1
+            return total
+
+        def f(budget):
+            set_param(myjitdriver, 'compile_budget', budget)
+            set_param(myjitdriver, 'compile_budget_window', 1000000)
+            total = 0
+            for k in range(5):
+                total += loop(k, 100)
+            set_param(myjitdriver, 'compile_budget', 0)
+            return total
+
+        res = self.meta_interp(f, [0])
+        assert res == f(0)
+        self.check_trace_count(5)
+        # with a budget of 1ms every 1000 seconds, the first loop uses
+        # up the budget (tracing here takes longer than that), and the
+        # other loops are left waiting
+        res = self.meta_interp(f, [1], ProfilerClass=Profiler)
+        assert res == f(1)
+        self.check_trace_count(1)
+        counters = pyjitpl._warmrunnerdesc.metainterp_sd.profiler.counters
+        assert counters[Counters.OVER_COMPILE_BUDGET] > 0
+
     def test_unwanted_loops(self):
         mydriver = JitDriver(reds = ['n', 'total', 'm'], greens = [])
 
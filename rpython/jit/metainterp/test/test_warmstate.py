@@ -192,3 +192,109 @@ def test_make_jitdriver_callbacks_5():
     state.make_jitdriver_callbacks()
     res = state.can_never_inline(5, 42.5)
     assert res is True
+
+def test_warmup_profile(tmpdir):
+    def get_location(x, y):
+        return "loc %d" % x    # abuse the return type, but nobody checks it
+    GET_LOCATION = lltype.Ptr(lltype.FuncType([lltype.Signed, lltype.Float],
+                                              lltype.Ptr(rstr.STR)))
+    class FakeWarmRunnerDesc:
+        rtyper = None
+        cpu = None
+        memory_manager = None
+        jitcounter = DeterministicJitCounter()
+    class FakeJitDriver:
+        name = 'driver'
+    class FakeJitDriverSD:
+        jitdriver = FakeJitDriver()
+        _green_args_spec = [lltype.Signed, lltype.Float]
+        _get_printable_location_ptr = llhelper(GET_LOCATION, get_location)
+        _confirm_enter_jit_ptr = None
+        _can_never_inline_ptr = None
+        _get_unique_id_ptr = None
+        _should_unroll_one_iteration_ptr = None
+        red_args_types = []
+    path = str(tmpdir.join('profile'))
+    state = WarmEnterState(FakeWarmRunnerDesc(), FakeJitDriverSD())
+    state.make_jitdriver_callbacks()
+    state.set_param_warmup_profile(path)
+    assert state.warmup_profile == {}
+    state.record_warmup_location([ConstInt(5), constfloat(42.5)])
+    state.record_warmup_location([ConstInt(6), constfloat(42.5)])
+    state.record_warmup_location([ConstInt(5), constfloat(1.5)])
+    lines = tmpdir.join('profile').readlines()
+    assert lines[1:] == ['driver\tloc 5\n', 'driver\tloc 6\n']
+    #
+    state = WarmEnterState(FakeWarmRunnerDesc(), FakeJitDriverSD())
+    state.set_param_warmup_profile(path)
+    assert state.warmup_profile == {'loc 5': None, 'loc 6': None}
+    state.set_param_warmup_profile('')
+    assert state.warmup_profile is None
+    state.record_warmup_location([ConstInt(7), constfloat(42.5)])
+    assert len(tmpdir.join('profile').readlines()) == 3
+    #
+    # a profile written by another build is thrown away
+    tmpdir.join('profile').write('# jit warmup profile 0\ndriver\tloc 5\n')
+    state.set_param_warmup_profile(path)
+    assert state.warmup_profile == {}
+    assert len(tmpdir.join('profile').readlines()) == 1
+    #
+    # locations containing '\n' are not recorded
+    state.make_jitdriver_callbacks()
+    state.get_printable_location = lambda *greenargs: 'loc\n8'
+    state.record_warmup_location([ConstInt(8), constfloat(42.5)])
+    assert len(tmpdir.join('profile').readlines()) == 1
+    #
+    # a file that is not a warmup profile is left alone
+    tmpdir.join('profile').write('important data\n')
+    state.set_param_warmup_profile(path)
+    assert state.warmup_profile is None
+    assert state.warmup_profile_path is None
+    assert tmpdir.join('profile').read() == 'important data\n'
+    #
+    # but an empty file is fine
+    tmpdir.join('profile').write('')
+    state.set_param_warmup_profile(path)
+    assert state.warmup_profile == {}
+    assert len(tmpdir.join('profile').readlines()) == 1
+
+def test_jitcell_backoff_and_invalidation():
+    from rpython.jit.metainterp.warmstate import BaseJitCell, JC_BACKOFF
+    class FakeLoopToken(object):
+        invalidated = False
+    class FakeJitCell(BaseJitCell):
+        pass
+    cell = FakeJitCell()
+    class FakeJitCellClass:
+        @staticmethod
+        def ensure_jit_cell_at_key(greenkey):
+            assert greenkey == 'key'
+            return cell
+    state = WarmEnterState(None, None)
+    state.JitCell = FakeJitCellClass
+    state.tracing_aborted('key')
+    assert cell.flags == 0
+    state.set_param_max_abort_backoff(4)
+    for i in range(10):
+        state.tracing_aborted('key')
+    assert cell.flags & JC_BACKOFF
+    assert cell.abort_count == 5
+    # the abort count decays every time the chain is cleaned up
+    for i in range(4):
+        assert not cell.should_remove_jitcell()
+    assert cell.abort_count == 1
+    assert cell.should_remove_jitcell()
+    assert not cell.flags & JC_BACKOFF
+    assert cell.abort_count == 0
+    for i in range(3):
+        state.tracing_aborted('key')
+    assert cell.abort_count == 3
+    #
+    token = FakeLoopToken()
+    cell.set_procedure_token(token)
+    assert not cell.flags & JC_BACKOFF
+    assert cell.abort_count == 0
+    assert not cell.was_invalidated()
+    token.invalidated = True
+    assert cell.was_invalidated()
+    assert cell.get_procedure_token() is None
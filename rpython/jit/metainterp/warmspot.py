@@ -72,7 +72,7 @@ def jittify_and_run(interp, graph, args, repeat=1, graph_and_interp_only=False,
                     inline=False, loop_longevity=0, retrace_limit=5,
                     function_threshold=4,
                     enable_opts=ALL_OPTS_NAMES, max_retrace_guards=15, 
-                    max_unroll_recursion=7, **kwds):
+                    max_unroll_recursion=7, max_abort_backoff=0, **kwds):
     from rpython.config.config import ConfigError
     translator = interp.typer.annotator.translator
     try:
@@ -95,6 +95,7 @@ def jittify_and_run(interp, graph, args, repeat=1, graph_and_interp_only=False,
         jd.warmstate.set_param_max_retrace_guards(max_retrace_guards)
         jd.warmstate.set_param_enable_opts(enable_opts)
         jd.warmstate.set_param_max_unroll_recursion(max_unroll_recursion)
+        jd.warmstate.set_param_max_abort_backoff(max_abort_backoff)
     warmrunnerdesc.finish()
     if graph_and_interp_only:
         return interp, graph
@@ -210,6 +211,7 @@ class WarmRunnerDesc(object):
             self.prejit_optimizations_minimal_inline(policy, graphs)
 
         self.build_meta_interp(ProfilerClass)
+        self.memory_manager.profiler = self.metainterp_sd.profiler
         self.make_args_specifications()
         #
         from rpython.jit.metainterp.virtualref import VirtualRefInfo
@@ -979,7 +981,8 @@ class WarmRunnerDesc(object):
             key = jd, funcname
             if key not in closures:
                 closures[key] = make_closure(jd, 'set_param_' + funcname,
-                                             funcname == 'enable_opts')
+                                             funcname in ('enable_opts',
+                                                          'warmup_profile'))
             op.opname = 'direct_call'
             op.args[:3] = [closures[key]]
 
@@ -1,11 +1,14 @@
+import errno
+import os
 import sys
+import time
 import weakref
 
 from rpython.jit.codewriter import support, heaptracker, longlong
 from rpython.jit.metainterp import history
 from rpython.rlib.debug import debug_start, debug_stop, debug_print
 from rpython.rlib.debug import have_debug_prints_for
-from rpython.rlib.jit import PARAMETERS
+from rpython.rlib.jit import PARAMETERS, Counters
 from rpython.rlib.nonconst import NonConstant
 from rpython.rlib.objectmodel import specialize, we_are_translated, r_dict
 from rpython.rlib.rarithmetic import intmask, r_uint
@@ -129,6 +132,17 @@ JC_TRACING         = 0x01
 JC_DONT_TRACE_HERE = 0x02
 JC_TEMPORARY       = 0x04
 JC_TRACING_OCCURRED= 0x08
+JC_PROBED          = 0x10
+JC_FREED           = 0x20
+JC_BACKOFF         = 0x40
+JC_INVALIDATED     = 0x80
+
+# the loop of a greenkey was invalidated: it was hot, so we trace it
+# again after only this fraction of the threshold
+INVALIDATED_RETRACE_FRACTION = 0.25
+# while compilation is deferred, the counters that reach the threshold
+# are put back to this fraction, to be traced soon after
+DEFERRED_FRACTION = 0.98
 
 class BaseJitCell(object):
     """Subclasses of BaseJitCell are used in tandem with the single
@@ -175,8 +189,27 @@ class BaseJitCell(object):
         this particular function.  (We only set this flag when aborting
         due to a trace too long, so we use the same flag as a hint to
         also mean "please trace from here as soon as possible".)
+
+        JC_PROBED: the greenkey was looked up in the warmup profile and
+        not found there.  We keep ticking the JitCounter normally.
+
+        JC_FREED: we had a procedure_token but the memory manager freed
+        it.  We keep ticking the JitCounter normally, and if we compile
+        the loop again, we count it as a recompilation.
+
+        JC_BACKOFF: tracing from here was aborted 'abort_count' times
+        in a row.  We tick the JitCounter with an increment divided by
+        2**(abort_count-1), so that we don't waste time tracing again
+        and again a loop that doesn't compile.  'abort_count' is at most
+        the 'max_abort_backoff' parameter plus one.  It decays by one
+        every time 'should_remove_jitcell()' looks at the cell, and
+        when it reaches zero the cell can be removed.
+
+        JC_INVALIDATED: our procedure_token was invalidated.  We trace
+        again after INVALIDATED_RETRACE_FRACTION of the threshold.
     """
     flags = 0     # JC_xxx flags
+    abort_count = 0
     wref_procedure_token = None
     next = None
 
@@ -190,12 +223,31 @@ class BaseJitCell(object):
     def has_seen_a_procedure_token(self):
         return self.wref_procedure_token is not None
 
+    def was_freed(self):
+        """True if the (non-temporary) procedure_token we had was freed
+        by the memory manager."""
+        if self.flags & JC_FREED:
+            return True
+        if self.wref_procedure_token is None or self.flags & JC_TEMPORARY:
+            return False
+        return self.wref_procedure_token() is None
+
+    def was_invalidated(self):
+        """True if the (non-temporary) procedure_token we had is still
+        alive but was invalidated."""
+        if self.wref_procedure_token is None or self.flags & JC_TEMPORARY:
+            return False
+        token = self.wref_procedure_token()
+        return token is not None and token.invalidated
+
     def set_procedure_token(self, token, tmp=False):
         self.wref_procedure_token = self._makeref(token)
+        self.flags &= ~(JC_PROBED | JC_FREED | JC_INVALIDATED)
         if tmp:
             self.flags |= JC_TEMPORARY
         else:
-            self.flags &= ~JC_TEMPORARY
+            self.flags &= ~(JC_TEMPORARY | JC_BACKOFF)
+            self.abort_count = 0
 
     def _makeref(self, token):
         assert token is not None
@@ -206,6 +258,13 @@ class BaseJitCell(object):
             return False    # don't remove JitCells with a procedure_token
         if self.flags & JC_TRACING:
             return False    # don't remove JitCells that are being traced
+        if self.flags & JC_BACKOFF:
+            # keep JitCells that remember aborted tracings, but only
+            # until the abort count has decayed
+            self.abort_count -= 1
+            if self.abort_count > 0:
+                return False
+            self.flags &= ~JC_BACKOFF
         if self.flags & JC_DONT_TRACE_HERE:
             # if we have this flag, and we *had* a procedure_token but
             # we no longer have one, then remove me.  this prevents this
@@ -215,8 +274,24 @@ class BaseJitCell(object):
 
 # ____________________________________________________________
 
+# The warmup profile is a text file listing the locations, as given by
+# get_printable_location(), of the greenkeys for which we compiled a loop
+# in previous runs.  When such a greenkey shows up again, we start tracing
+# it after only 1/WARMUP_PROBE_FACTOR of the usual threshold.  The first
+# line identifies the build that wrote the file; if it doesn't match, the
+# file is discarded.  A stale entry can only make us trace a bit earlier.
+# A file that doesn't start with WARMUP_PROFILE_MAGIC is not ours, and is
+# never overwritten.
+WARMUP_PROFILE_MAGIC = '# jit warmup profile '
+WARMUP_PROFILE_HEADER = WARMUP_PROFILE_MAGIC + '%x\n' % int(time.time() * 1000)
+WARMUP_PROBE_FACTOR = 8.0
+
 
 class WarmEnterState(object):
+    warmup_profile = None         # dict {location: None}, or None
+    warmup_profile_path = None
+    max_abort_backoff = 0
+    compilation_deferred = False
 
     def __init__(self, warmrunnerdesc, jitdriver_sd):
         "NOT_RPYTHON"
@@ -277,6 +352,12 @@ class WarmEnterState(object):
             self.warmrunnerdesc.memory_manager is not None):   # all for tests
             self.warmrunnerdesc.memory_manager.set_max_age(value)
 
+    def set_param_loop_code_budget(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.set_code_budget(value * 1024)
+
     def set_param_retrace_limit(self, value):
         if self.warmrunnerdesc:
             if self.warmrunnerdesc.memory_manager:
@@ -297,6 +378,127 @@ class WarmEnterState(object):
             if self.warmrunnerdesc.memory_manager:
                 self.warmrunnerdesc.memory_manager.max_unroll_recursion = value
 
+    def set_param_max_abort_backoff(self, value):
+        if value < 0:
+            value = 0
+        elif value > 30:
+            value = 30
+        self.max_abort_backoff = value
+
+    def set_param_defer_compilation(self, value):
+        self.compilation_deferred = value != 0
+
+    def set_param_compile_budget(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.set_compile_budget(value)
+
+    def set_param_compile_budget_window(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.set_compile_budget_window(
+                value)
+
+    def must_defer_compilation(self):
+        """Return True if a loop or bridge that just became hot should not
+        be traced now: either the 'defer_compilation' parameter is set, or
+        the 'compile_budget' of the current time window is used up.  The
+        caller puts its counter back to DEFERRED_FRACTION.  The hottest
+        places then reach the threshold again first, and get compiled
+        first when tracing is allowed again."""
+        if self.compilation_deferred:
+            return True
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            return self.warmrunnerdesc.memory_manager.over_compile_budget()
+        return False
+
+    def set_param_warmup_profile(self, value):
+        self.warmup_profile = None
+        self.warmup_profile_path = None
+        if not value:
+            return
+        if self.jitdriver_sd._get_printable_location_ptr is None:
+            return      # all greenkeys would look the same
+        self.warmup_profile_path = value
+        self.warmup_profile = self._load_warmup_profile(value)
+
+    def _load_warmup_profile(self, path):
+        """Read the locations recorded for this jitdriver in the warmup
+        profile 'path'.  If the file is missing, empty or was written by
+        another build, (re)create it with just the header.  If it is not
+        a warmup profile at all, leave it alone and return None.
+        """
+        profile = {}
+        try:
+            fd = os.open(path, os.O_RDONLY, 0)
+            try:
+                pieces = []
+                while True:
+                    data = os.read(fd, 16384)
+                    if not data:
+                        break
+                    pieces.append(data)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                self.warmup_profile_path = None
+                return None
+            pieces = []
+        text = ''.join(pieces)
+        if text.startswith(WARMUP_PROFILE_HEADER):
+            prefix = self._warmup_profile_prefix()
+            for line in text.split('\n'):
+                if line.startswith(prefix):
+                    profile[line[len(prefix):]] = None
+        elif text and not text.startswith(WARMUP_PROFILE_MAGIC):
+            self.warmup_profile_path = None
+            return None
+        else:
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                             0666)
+                try:
+                    os.write(fd, WARMUP_PROFILE_HEADER)
+                finally:
+                    os.close(fd)
+            except OSError:
+                self.warmup_profile_path = None
+        return profile
+
+    def _warmup_profile_prefix(self):
+        jitdriver = self.jitdriver_sd.jitdriver
+        if jitdriver is not None:
+            return jitdriver.name + '\t'
+        return '\t'
+
+    def record_warmup_location(self, greenkey):
+        """Append the location of 'greenkey' to the warmup profile, if
+        enabled and not already there."""
+        path = self.warmup_profile_path
+        if path is None:
+            return
+        greenargs = self.unwrap_greenkey(greenkey)
+        location = self.get_printable_location(*greenargs)
+        profile = self.warmup_profile
+        if profile is None or location in profile:
+            return
+        if '\n' in location:
+            return      # would not be read back correctly
+        profile[location] = None
+        line = self._warmup_profile_prefix() + location + '\n'
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0666)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        except OSError:
+            self.warmup_profile_path = None
+
     def disable_noninlinable_function(self, greenkey):
         cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
         cell.flags |= JC_DONT_TRACE_HERE
@@ -305,9 +507,21 @@ class WarmEnterState(object):
         debug_print("disabled inlining", loc)
         debug_stop("jit-disableinlining")
 
+    def tracing_aborted(self, greenkey):
+        if self.max_abort_backoff == 0:
+            return
+        cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
+        if cell.abort_count <= self.max_abort_backoff:
+            cell.abort_count += 1
+        cell.flags |= JC_BACKOFF
+
     def attach_procedure_to_interp(self, greenkey, procedure_token):
         cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
         old_token = cell.get_procedure_token()
+        if old_token is None and cell.was_freed():
+            if (self.warmrunnerdesc is not None and
+                self.warmrunnerdesc.memory_manager is not None):  # for tests
+                self.warmrunnerdesc.memory_manager.record_recompilation()
         cell.set_procedure_token(procedure_token)
         if old_token is not None:
             self.cpu.redirect_call_assembler(old_token, procedure_token)
@@ -315,6 +529,7 @@ class WarmEnterState(object):
             # to point to old_token.  Actually freeing old_token early
             # is a pointless optimization (it is tiny).
             old_token.record_jump_to(procedure_token)
+        self.record_warmup_location(greenkey)
 
     # ----------
 
@@ -348,6 +563,10 @@ class WarmEnterState(object):
         func_execute_token = self.cpu.make_execute_token(*ARGS)
         cpu = self.cpu
         jitcounter = self.warmrunnerdesc.jitcounter
+        warmstate = self
+        has_locations = jitdriver_sd._get_printable_location_ptr is not None
+        get_printable_location = self.get_printable_location
+        profiler = metainterp_sd.profiler
 
         def execute_assembler(loop_token, *args):
             # Call the backend to run the 'looptoken' with the given
@@ -373,6 +592,9 @@ class WarmEnterState(object):
             assert 0, "should have raised"
 
         def bound_reached(hash, cell, *args):
+            if warmstate.must_defer_compilation():
+                jitcounter.change_current_fraction(hash, DEFERRED_FRACTION)
+                return
             if not confirm_enter_jit(*args):
                 return
             jitcounter.decay_all_counters()
@@ -389,6 +611,21 @@ class WarmEnterState(object):
             finally:
                 cell.flags &= ~JC_TRACING
 
+        def probe_reached(hash, profile, *args):
+            # a greenkey that we have never compiled reached a fraction of
+            # the threshold.  If it is in the warmup profile, start tracing
+            # now; otherwise, remember it and continue counting normally.
+            greenargs = args[:num_green_args]
+            location = get_printable_location(*greenargs)
+            if location in profile:
+                bound_reached(hash, None, *args)
+                return
+            cell = JitCell(*greenargs)
+            cell.flags |= JC_PROBED
+            jitcounter.install_new_cell(hash, cell)
+            jitcounter.change_current_fraction(hash,
+                                               1.0 / WARMUP_PROBE_FACTOR)
+
         def maybe_compile_and_run(increment_threshold, *args):
             """Entry point to the JIT.  Called at the point with the
             can_enter_jit() hint.
@@ -407,18 +644,34 @@ class WarmEnterState(object):
                 cell = cell.next
             else:
                 # not found. increment the counter
+                profile = warmstate.warmup_profile
+                if has_locations and profile:
+                    increment = increment_threshold * WARMUP_PROBE_FACTOR
+                    if jitcounter.tick(hash, increment):
+                        probe_reached(hash, profile, *args)
+                    return
                 if jitcounter.tick(hash, increment_threshold):
                     bound_reached(hash, None, *args)
                 return
 
             # Here, we have found 'cell'.
             #
-            if cell.flags & (JC_TRACING | JC_TEMPORARY):
+            if cell.flags & (JC_TRACING | JC_TEMPORARY | JC_PROBED |
+                             JC_FREED | JC_BACKOFF | JC_INVALIDATED):
                 if cell.flags & JC_TRACING:
                     # tracing already happening in some outer invocation of
                     # this function. don't trace a second time.
                     return
-                # attached by compile_tmp_callback().  count normally
+                if cell.flags & JC_BACKOFF:
+                    # tracing from here aborted: count more slowly
+                    backoff = 1 << (cell.abort_count - 1)
+                    if jitcounter.tick(hash, increment_threshold / backoff):
+                        profiler.count(Counters.TRACING_SKIPPED, backoff - 1)
+                        bound_reached(hash, cell, *args)
+                    return
+                # attached by compile_tmp_callback(), not in the warmup
+                # profile, freed by the memory manager, or invalidated.
+                # count normally
                 if jitcounter.tick(hash, increment_threshold):
                     bound_reached(hash, cell, *args)
                 return
@@ -437,8 +690,20 @@ class WarmEnterState(object):
                         if tick:
                             bound_reached(hash, cell, *args)
                         return
-                # it was an aborted compilation, or maybe a weakref that
-                # has been freed
+                if cell.was_freed():
+                    # the memory manager freed the loop.  Keep the cell,
+                    # to notice if we compile the same loop again
+                    cell.flags |= JC_FREED
+                    jitcounter.reset(hash)
+                    return
+                if cell.was_invalidated():
+                    # the loop was invalidated.  It was hot, so trace it
+                    # again soon
+                    cell.flags |= JC_INVALIDATED
+                    jitcounter.change_current_fraction(hash,
+                                        1.0 - INVALIDATED_RETRACE_FRACTION)
+                    return
+                # it was an aborted compilation
                 jitcounter.cleanup_chain(hash)
                 return
             if not confirm_enter_jit(*args):
@@ -628,6 +893,10 @@ class WarmEnterState(object):
         get_location_ptr = self.jitdriver_sd._get_printable_location_ptr
         if get_location_ptr is None:
             missing = '(%s: no get_printable_location)' % drivername
+            def get_printable_location(*greenargs):
+                return missing
+            def get_greenkey_location(greenkey):
+                return missing
             def get_location_str(greenkey):
                 return missing
         else:
@@ -638,15 +907,23 @@ class WarmEnterState(object):
             missing = ('(%s: get_printable_location '
                        'disabled, no debug_print)' % drivername)
             #
-            def get_location_str(greenkey):
-                if not have_debug_prints_for("jit-"):
-                    return missing
-                greenargs = unwrap_greenkey(greenkey)
+            def get_printable_location(*greenargs):
                 fn = support.maybe_on_top_of_llinterp(rtyper, get_location_ptr)
                 llres = fn(*greenargs)
                 if not we_are_translated() and isinstance(llres, str):
                     return llres
                 return hlstr(llres)
+            #
+            def get_greenkey_location(greenkey):
+                greenargs = unwrap_greenkey(greenkey)
+                return get_printable_location(*greenargs)
+            #
+            def get_location_str(greenkey):
+                if not have_debug_prints_for("jit-"):
+                    return missing
+                return get_greenkey_location(greenkey)
+        self.get_printable_location = get_printable_location
+        self.get_greenkey_location = get_greenkey_location
         self.get_location_str = get_location_str
         #
         confirm_enter_jit_ptr = self.jitdriver_sd._confirm_enter_jit_ptr
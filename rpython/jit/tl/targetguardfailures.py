@@ -0,0 +1,133 @@
+"""
+A benchmark for the blackhole interpreter: a polymorphic loop whose
+guards keep failing.  Compile it with
+
+    rpython -Ojit targetguardfailures.py
+
+and run it as
+
+    targetguardfailures-c [iterations [shapes [bridges]]]
+
+'shapes' is the number of Shape instances the loop cycles through.  They
+are spread over the four Shape subclasses, so there are never more than
+four classes at the polymorphic call.
+
+With bridges=0 (the default), no bridge is ever compiled, so every
+failing guard resumes in the blackhole interpreter until the next
+iteration of the loop.  Run the same executable with bridges=1 to compare
+with the time it takes when the failing paths get compiled too.
+"""
+
+import time
+from rpython.rlib.jit import JitDriver, set_param, dont_look_inside
+
+
+driver = JitDriver(greens=[], reds=['i', 'n', 'total', 'shapes'])
+
+
+class Shape(object):
+    def area(self, i):
+        raise NotImplementedError
+
+class Square(Shape):
+    def __init__(self, size):
+        self.size = size
+    def area(self, i):
+        return scaled(self.size * self.size, i) + offset(i)
+
+class Rectangle(Shape):
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+    def area(self, i):
+        return offset(i) + scaled(self.width * self.height, i)
+
+class Triangle(Shape):
+    def __init__(self, base, height):
+        self.base = base
+        self.height = height
+    def area(self, i):
+        return scaled(self.base * self.height // 2, i) - offset(i)
+
+class Circle(Shape):
+    def __init__(self, radius):
+        self.radius = radius
+    def area(self, i):
+        return offset(i) - scaled(self.radius * self.radius * 3, i)
+
+def scaled(x, i):
+    if i & 3 == 1:
+        return x * 2
+    if i & 7 == 2:
+        return x - 5
+    return x
+
+def offset(i):
+    if i % 5 == 0:
+        return 7
+    if i % 11 == 0:
+        return -3
+    return 1
+
+def step(shape, i):
+    return shape.area(i)
+
+def run(n, shapes):
+    i = 0
+    total = 0
+    while i < n:
+        driver.jit_merge_point(i=i, n=n, total=total, shapes=shapes)
+        total += step(shapes[i % len(shapes)], i)
+        i += 1
+    return total
+
+def make_shapes(count):
+    shapes = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            shapes.append(Square(i + 1))
+        elif kind == 1:
+            shapes.append(Rectangle(i + 1, i + 2))
+        elif kind == 2:
+            shapes.append(Triangle(i + 2, i + 1))
+        else:
+            shapes.append(Circle(i + 1))
+    return shapes
+
+@dont_look_inside
+def now():
+    return time.time()
+
+
+def entry_point(argv):
+    n = 10000000
+    nshapes = 4
+    bridges = 0
+    if len(argv) > 1:
+        n = int(argv[1])
+    if len(argv) > 2:
+        nshapes = int(argv[2])
+    if len(argv) > 3:
+        bridges = int(argv[3])
+    if not bridges:
+        # a guard must fail this many times before we compile a bridge
+        set_param(driver, 'trace_eagerness', 1000000000)
+    shapes = make_shapes(max(nshapes, 1))
+    start = now()
+    total = run(n, shapes)
+    elapsed = now() - start
+    print 'total:', total
+    print 'iterations: %d, shapes: %d, bridges: %d' % (n, nshapes, bridges)
+    print 'time: %f seconds, %f us per iteration' % (
+        elapsed, elapsed * 1000000.0 / max(n, 1))
+    return 0
+
+def target(driver, args):
+    return entry_point
+
+# ____________________________________________________________
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(entry_point(sys.argv))
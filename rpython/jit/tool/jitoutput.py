@@ -26,6 +26,13 @@ REGEXES = [
     (('nvirtuals',), '^nvirtuals:\s+(\d+)$'),
     (('nvholes',), '^nvholes:\s+(\d+)$'),
     (('nvreused',), '^nvreused:\s+(\d+)$'),
+    (('resume_bytes',), '^resume bytes:\s+(\d+)$'),
+    (('resume_shared',), '^resume shared:\s+(\d+)$'),
+    (('evicted_loops',), '^evicted loops:\s+(\d+)$'),
+    (('recompiled_loops',), '^recompiled loops:\s+(\d+)$'),
+    (('tracing_skipped', 'tracing_saved_time'),
+     '^tracing skipped:\s+(\d+)\s+([\d.]+)$'),
+    (('over_compile_budget',), '^over compile budget:\s+(\d+)$'),
     (('total_compiled_loops',),   '^Total # of loops:\s+(\d+)$'),
     (('total_compiled_bridges',), '^Total # of bridges:\s+(\d+)$'),
     (('total_freed_loops',),      '^Freed # of loops:\s+(\d+)$'),
@@ -57,6 +64,13 @@ class OutputInfo(object):
     nvirtuals = 0
     nvholes = 0
     nvreused = 0
+    resume_bytes = 0
+    resume_shared = 0
+    evicted_loops = 0
+    recompiled_loops = 0
+    tracing_skipped = 0
+    tracing_saved_time = 0.0
+    over_compile_budget = 0
 
     def __init__(self):
         self.ops = Ops()
@@ -61,6 +61,12 @@ abort: force quasi-immut: 3
 nvirtuals:              13
 nvholes:                14
 nvreused:               15
+resume bytes:           1000
+resume shared:          400
+evicted loops:          16
+recompiled loops:       17
+tracing skipped:	18	0.125000
+over compile budget:    19
 Total # of loops:       100
 Total # of bridges:     300
 Freed # of loops:       99
@@ -88,3 +94,10 @@ def test_parse():
     assert info.nvirtuals == 13
     assert info.nvholes == 14
     assert info.nvreused == 15
+    assert info.resume_bytes == 1000
+    assert info.resume_shared == 400
+    assert info.evicted_loops == 16
+    assert info.recompiled_loops == 17
+    assert info.tracing_skipped == 18
+    assert info.tracing_saved_time == 0.125
+    assert info.over_compile_budget == 19
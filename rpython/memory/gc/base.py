@@ -169,6 +169,9 @@ class GCBase(object):
     def can_move(self, addr):
         return False
 
+    def get_stats(self, stats_no):
+        return 0.0
+
     def pin(self, addr):
         return False
 
@@ -48,6 +48,29 @@ def read_float_from_env(varname):
         return 0.0
     return value
 
+def read_time_from_env(varname):
+    # returns a number of seconds; accepts the suffixes s, ms and us
+    value = os.environ.get(varname)
+    if value:
+        end = len(value)
+        if value.endswith('ms'):
+            factor = 0.001
+            end -= 2
+        elif value.endswith('us'):
+            factor = 0.000001
+            end -= 2
+        elif value.endswith('s'):
+            factor = 1.0
+            end -= 1
+        else:
+            factor = 1.0
+        assert end >= 0
+        try:
+            return float(value[:end]) * factor
+        except ValueError:
+            pass
+    return 0.0
+
 
 # ____________________________________________________________
 # Get the total amount of RAM installed in a system.
@@ -9,12 +9,28 @@ Environment variables can be used to fine-tune the following parameters:
  PYPY_GC_NURSERY_DEBUG   If set to non-zero, will fill nursery with garbage,
                          to help debugging.
 
+ PYPY_GC_NURSERY_CHUNK   If set, every thread allocates from its own chunk
+                         of the nursery, of this size, instead of all
+                         threads sharing the same position in the nursery.
+                         Disabled by default.  Try values like '64KB'.
+                         Only works with --gcrootfinder=shadowstack;
+                         ignored with a warning otherwise.
+
  PYPY_GC_INCREMENT_STEP  The size of memory marked during the marking step.
                          Default is size of nursery * 2. If you mark it too high
                          your GC is not incremental at all. The minimum is set
                          to size that survives minor collection * 1.5 so we
                          reclaim anything all the time.
 
+ PYPY_GC_MAX_PAUSE       If set, e.g. to '5ms', the GC measures how fast it
+                         marks and sweeps, and sizes every step of a major
+                         collection and the nursery so that each pause stays
+                         below this time.  The marking steps still grow if
+                         needed to finish the major collection before the
+                         heap reaches PYPY_GC_MAJOR_COLLECT times its size.
+                         Overrides PYPY_GC_INCREMENT_STEP.  Accepts the
+                         suffixes 's', 'ms' and 'us'.  Disabled by default.
+
  PYPY_GC_MAJOR_COLLECT   Major collection memory factor.  Default is '1.82',
                          which means trigger a major collection when the
                          memory consumed equals 1.82 times the memory
@@ -43,6 +59,22 @@ Environment variables can be used to fine-tune the following parameters:
                          the GC in very small programs.  Defaults to 8
                          times the nursery.
 
+ PYPY_GC_SPARSE_ARENAS   If set to a value between 0 and 1, e.g. '0.75', then
+                         the arenas in which at least this fraction of the
+                         pages are free are only allocated into as a last
+                         resort, to let them become empty and be returned
+                         to the OS.  Useful against fragmentation in long-
+                         running processes.  Disabled by default.
+
+ PYPY_GC_RELEASE_IDLE    If set to N >= 0, then at the end of every major
+                         collection the unused part of the nursery is given
+                         back to the OS (with madvise(MADV_DONTNEED)), and
+                         entirely free arenas are only freed after N major
+                         collections during which they were not reused.  By
+                         default, free arenas are freed immediately and the
+                         nursery is left alone.  The total is reported as
+                         'total_memory_released' by gc.get_stats().
+
  PYPY_GC_DEBUG           Enable extra checks around collections that are
                          too slow for normal use.  Values are 0 (off),
                          1 (on major collections) or 2 (also on minor
@@ -62,6 +94,7 @@ Environment variables can be used to fine-tune the following parameters:
 # XXX old_objects_pointing_to_young (IRC 2014-10-22, fijal and gregor_w)
 import sys
 import os
+import time
 from rpython.rtyper.lltypesystem import lltype, llmemory, llarena, llgroup
 from rpython.rtyper.lltypesystem.lloperation import llop
 from rpython.rtyper.lltypesystem.llmemory import raw_malloc_usage
@@ -72,6 +105,8 @@ from rpython.rlib.rarithmetic import ovfcheck, LONG_BIT, intmask, r_uint
 from rpython.rlib.rarithmetic import LONG_BIT_SHIFT
 from rpython.rlib.debug import ll_assert, debug_print, debug_start, debug_stop
 from rpython.rlib.objectmodel import specialize
+from rpython.rlib.rtimer import read_timestamp
+from rpython.rlib import rgc
 from rpython.memory.gc.minimarkpage import out_of_memory
 
 #
@@ -177,12 +212,30 @@ STATE_FINALIZING = 3
 
 GC_STATES = ['SCANNING', 'MARKING', 'SWEEPING', 'FINALIZING']
 
+# The statistics returned by get_stats() that are accumulated as we go,
+# indexed by the rgc.XXX numbers.  The times are measured with
+# read_timestamp(), which is cheap enough to be always enabled.
+STATSARRAY = lltype.Array(lltype.Float, hints={'nolength': True})
+
+
+# Arrays of gc pointers that are copied out of the nursery get card
+# marking if they span at least this number of card pages.
+MIN_CARD_PAGES_OUT_OF_NURSERY = 8
+
 
 FORWARDSTUB = lltype.GcStruct('forwarding_stub',
                               ('forw', llmemory.Address))
 FORWARDSTUBPTR = lltype.Ptr(FORWARDSTUB)
 NURSARRAY = lltype.Array(llmemory.Address)
 
+# With PYPY_GC_NURSERY_CHUNK, the part of the nursery reserved for a thread
+# that is not running is saved in one of NURSERY_CHUNK_SLOTS such entries.
+NURSCHUNK = lltype.Struct('nursery_chunk', ('tid', lltype.Signed),
+                                           ('free', llmemory.Address),
+                                           ('top', llmemory.Address))
+NURSCHUNKARRAY = lltype.Array(NURSCHUNK, hints={'nolength': True})
+NURSERY_CHUNK_SLOTS = 16
+
 # ____________________________________________________________
 
 class IncrementalMiniMarkGC(MovingGCBase):
@@ -279,6 +332,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                  growth_rate_max=2.5,   # for tests
                  card_page_indices=0,
                  large_object=8*WORD,
+                 nursery_chunk_size=0,
                  ArenaCollectionClass=None,
                  **kwds):
         MovingGCBase.__init__(self, config, **kwds)
@@ -313,6 +367,44 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.debug_rotating_nurseries = lltype.nullptr(NURSARRAY)
         self.extra_threshold = 0
         #
+        # Per-thread nursery chunks, see switch_nursery_chunk().  The part
+        # of the current nursery area not given to any thread so far is
+        # between 'nursery_chunks_free' and 'nursery_chunks_top'.
+        self.nursery_chunk_size = nursery_chunk_size
+        self.nursery_chunks = lltype.nullptr(NURSCHUNKARRAY)
+        self.nursery_chunks_free = llmemory.NULL
+        self.nursery_chunks_top = llmemory.NULL
+        self.nursery_chunks_next = 0
+        #
+        # With PYPY_GC_RELEASE_IDLE, the unused part of the nursery is
+        # given back to the OS at the end of every major collection.
+        self.release_nursery_memory = False
+        self.nursery_memory_released = r_uint(0)
+        #
+        self.stats = lltype.malloc(STATSARRAY, rgc.GC_STATS_COUNT,
+                                   flavor='raw', zero=True, immortal=True)
+        #
+        # With PYPY_GC_MAX_PAUSE, the pause budget in seconds.  The
+        # pauses are measured in read_timestamp() ticks, like the stats
+        # above: 'ticks_per_second' converts the budget, and is computed
+        # from time.time() once per major collection (0.0 = not yet).
+        # Then the last measured duration of a minor collection, and the
+        # measured speed of marking (bytes per tick) and sweeping (pages,
+        # or raw-malloced objects, per tick).  See _step_size_for_pause().
+        self.max_pause = 0.0
+        self.ticks_per_second = 0.0
+        self.calibration_time = 0.0
+        self.calibration_ticks = 0
+        self.last_minor_pause = 0.0
+        self.marking_rate = 0.0
+        self.sweeping_rate = 0.0
+        self.rawmalloc_sweeping_rate = 0.0
+        self.heap_at_major_start = 0.0
+        self.bytes_marked_in_major = 0.0
+        # the size of the memory allocated for the nursery, which is
+        # also the largest value for 'nursery_size'
+        self.nursery_size_max = 0
+        #
         # The ArenaCollection() handles the nonmovable objects allocation.
         if ArenaCollectionClass is None:
             from rpython.memory.gc import minimarkpage
@@ -320,6 +412,14 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.ac = ArenaCollectionClass(arena_size, page_size,
                                        small_request_threshold)
         #
+        # While we are in STATE_SWEEPING, the ArenaCollection can sweep
+        # pages by itself when it needs room (see sweep_lazily()).  It
+        # must be given the same function as mass_free_incremental(),
+        # and it cannot be a bound method.
+        def ok_to_free_func(hdr):
+            return self._free_if_unvisited(hdr)
+        self.ac.lazy_ok_to_free_func = ok_to_free_func
+        #
         # Used by minor collection: a list of (mostly non-young) objects that
         # (may) contain a pointer to a young object.  Populated by
         # the write barrier: when we clear GCFLAG_TRACK_YOUNG_PTRS, we
@@ -436,6 +536,10 @@ class IncrementalMiniMarkGC(MovingGCBase):
             if growth > 1.0:
                 self.growth_rate_max = growth
             #
+            sparse_arenas = env.read_float_from_env('PYPY_GC_SPARSE_ARENAS')
+            if 0.0 < sparse_arenas <= 1.0:
+                self.ac.set_sparse_arena_threshold(sparse_arenas)
+            #
             min_heap_size = env.read_uint_from_env('PYPY_GC_MIN')
             if min_heap_size > 0:
                 self.min_heap_size = float(min_heap_size)
@@ -464,11 +568,31 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 self.gc_nursery_debug = True
             else:
                 self.gc_nursery_debug = False
+            #
+            nursery_chunk_size = env.read_from_env('PYPY_GC_NURSERY_CHUNK')
+            if nursery_chunk_size > 0:
+                if self.config.gcrootfinder == 'shadowstack':
+                    self.nursery_chunk_size = nursery_chunk_size & ~(WORD-1)
+                else:
+                    # only the shadowstack root finder calls
+                    # switch_nursery_chunk() when switching threads
+                    llop.debug_print(lltype.Void,
+                        "Warning: PYPY_GC_NURSERY_CHUNK ignored, it needs"
+                        " a PyPy translated with --gcrootfinder=shadowstack")
+            #
+            max_pause = env.read_time_from_env('PYPY_GC_MAX_PAUSE')
+            if max_pause > 0.0:
+                self.max_pause = max_pause
             self.minor_collection()    # to empty the nursery
             llarena.arena_free(self.nursery)
             self.nursery_size = newsize
             self.allocate_nursery()
         #
+        if self.nursery_chunk_size > 0:
+            self.nursery_chunks = lltype.malloc(
+                NURSCHUNKARRAY, NURSERY_CHUNK_SLOTS, flavor='raw', zero=True,
+                track_allocation=False)
+        #
         env_max_number_of_pinned_objects = os.environ.get('PYPY_GC_MAX_PINNED')
         if env_max_number_of_pinned_objects:
             try:
@@ -482,6 +606,16 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # Estimate this number conservatively
             bigobj = self.nonlarge_max + 1
             self.max_number_of_pinned_objects = self.nursery_size / (bigobj * 2)
+        #
+        env_release_idle = os.environ.get('PYPY_GC_RELEASE_IDLE')
+        if env_release_idle:
+            try:
+                release_idle = int(env_release_idle)
+            except ValueError:
+                release_idle = -1
+            if release_idle >= 0:
+                self.ac.set_release_idle(release_idle)
+                self.release_nursery_memory = True
 
     def _nursery_memory_size(self):
         extra = self.nonlarge_max + 1
@@ -501,10 +635,14 @@ class IncrementalMiniMarkGC(MovingGCBase):
         debug_start("gc-set-nursery-size")
         debug_print("nursery size:", self.nursery_size)
         self.nursery = self._alloc_nursery()
+        self.nursery_size_max = self.nursery_size
         # the current position in the nursery:
         self.nursery_free = self.nursery
         # the end of the nursery:
         self.nursery_top = self.nursery + self.nursery_size
+        # no part of the nursery is given to other threads so far:
+        self.nursery_chunks_free = self.nursery_top
+        self.nursery_chunks_top = self.nursery_top
         # initialize the threshold
         self.min_heap_size = max(self.min_heap_size, self.nursery_size *
                                               self.major_collection_threshold)
@@ -709,7 +847,18 @@ class IncrementalMiniMarkGC(MovingGCBase):
         jump over the pinned object and try again to reserve totalsize.
         Otherwise do a minor collection, and possibly a major collection, and
         finally reserve totalsize bytes.
+        With per-thread nursery chunks, first try to give the current
+        thread a new chunk.
         """
+        if self.nursery_chunk_size > 0:
+            result = self.nursery_chunks_free
+            if result + totalsize <= self.nursery_chunks_top:
+                self._reserve_nursery_chunk(result, totalsize)
+                return result
+            # no room left for a new chunk: continue from the end of
+            # the area, as if there were no chunks at all
+            self.nursery_free = result
+            self.nursery_top = self.nursery_chunks_top
 
         minor_collection_count = 0
         while True:
@@ -788,9 +937,68 @@ class IncrementalMiniMarkGC(MovingGCBase):
             if self.nursery_top - self.nursery_free > self.debug_tiny_nursery:
                 self.nursery_free = self.nursery_top - self.debug_tiny_nursery
         #
+        # the current thread now owns the rest of the new area
+        self.nursery_chunks_free = self.nursery_top
+        self.nursery_chunks_top = self.nursery_top
         return result
     collect_and_reserve._dont_inline_ = True
 
+    def _reserve_nursery_chunk(self, start, totalsize):
+        # give the current thread a new chunk, starting at 'start', which
+        # must be 'nursery_chunks_free', and reserve 'totalsize' in it
+        stop = start + self.nursery_chunk_size
+        if stop < start + totalsize:
+            stop = start + totalsize
+        if stop > self.nursery_chunks_top:
+            stop = self.nursery_chunks_top
+        self.nursery_free = start + totalsize
+        self.nursery_top = stop
+        self.nursery_chunks_free = stop
+
+    def switch_nursery_chunk(self, old_tid, new_tid):
+        """Called by the root walker when the thread that runs changes
+        from 'old_tid' to 'new_tid'.  With per-thread nursery chunks,
+        the part of the nursery reserved for 'old_tid' is saved, and the
+        one of 'new_tid' is restored, or a new one is made for it.
+        No GC operation here.
+        """
+        if self.nursery_chunk_size <= 0:
+            return
+        chunks = self.nursery_chunks
+        if self.nursery_top == self.nursery_chunks_top:
+            # the current chunk extends to the end of the area: only
+            # keep 'nursery_chunk_size' bytes of it for 'old_tid'
+            stop = self.nursery_free + self.nursery_chunk_size
+            if stop < self.nursery_top:
+                self.nursery_top = stop
+            self.nursery_chunks_free = self.nursery_top
+        #
+        # save the chunk of 'old_tid', if there is room left in it
+        if self.nursery_free < self.nursery_top:
+            i = 0
+            while i < NURSERY_CHUNK_SLOTS and chunks[i].top:
+                i += 1
+            if i == NURSERY_CHUNK_SLOTS:
+                # all slots are in use: throw away the chunk of some
+                # other thread, which will get a new one next time
+                i = self.nursery_chunks_next
+                self.nursery_chunks_next = (i + 1) % NURSERY_CHUNK_SLOTS
+            chunks[i].tid = old_tid
+            chunks[i].free = self.nursery_free
+            chunks[i].top = self.nursery_top
+        #
+        # look for the chunk of 'new_tid'
+        i = 0
+        while i < NURSERY_CHUNK_SLOTS:
+            if chunks[i].top and chunks[i].tid == new_tid:
+                self.nursery_free = chunks[i].free
+                self.nursery_top = chunks[i].top
+                chunks[i].free = llmemory.NULL
+                chunks[i].top = llmemory.NULL
+                return
+            i += 1
+        self._reserve_nursery_chunk(self.nursery_chunks_free, 0)
+
 
     def external_malloc(self, typeid, length, can_make_young=True):
         """Allocate a large object using the ArenaCollection or
@@ -951,6 +1159,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # cannot trigger a full collection now, but we can ensure
             # that one will occur very soon
             self.nursery_free = self.nursery_top
+            self.nursery_chunks_free = self.nursery_chunks_top
 
     def can_optimize_clean_setarrayitems(self):
         if self.card_page_indices > 0:
@@ -1071,7 +1280,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             if not self.is_valid_gc_object(addr):
                 return False
 
-        if self.nursery <= addr < self.nursery_top:
+        if self.nursery <= addr < self.nursery + self.nursery_size:
             return True      # addr is in the nursery
         #
         # Else, it may be in the set 'young_rawmalloced_objects'
@@ -1116,6 +1325,49 @@ class IncrementalMiniMarkGC(MovingGCBase):
         return (self.next_major_collection_threshold -
                 float(self.get_total_memory_used()))
 
+    def get_stats(self, stats_no):
+        if stats_no == rgc.TOTAL_MEMORY_RELEASED:
+            return (float(self.ac.total_memory_released) +
+                    float(self.nursery_memory_released))
+        elif stats_no == rgc.MAJOR_COLLECTIONS:
+            return float(self.num_major_collects)
+        elif stats_no == rgc.PINNED_OBJECTS:
+            return float(self.pinned_objects_in_nursery)
+        elif stats_no == rgc.ARENA_MEMORY_USED:
+            return float(self.ac.total_memory_used)
+        elif stats_no == rgc.ARENA_MEMORY_ALLOCATED:
+            return float(self.ac.total_memory_alloced)
+        elif stats_no == rgc.RAWMALLOCED_MEMORY:
+            return float(self.rawmalloced_total_size)
+        elif 0 <= stats_no < rgc.GC_STATS_COUNT:
+            return self.stats[stats_no]
+        return 0.0
+
+    def _record_pause(self, time_no, start):
+        # Account for a pause of the program that started at 'start'.
+        # 'time_no' is one of rgc.TIME_xxx.
+        duration = float(read_timestamp() - start)
+        self.stats[time_no] += duration
+        max_no = time_no - rgc.TIME_MINOR + rgc.MAX_TIME_MINOR
+        if duration > self.stats[max_no]:
+            self.stats[max_no] = duration
+        bucket = 0
+        limit = rgc.PAUSE_HISTOGRAM_FIRST
+        while duration >= limit and bucket < rgc.PAUSE_HISTOGRAM_BUCKETS - 1:
+            bucket += 1
+            limit *= 2.0
+        self.stats[rgc.PAUSE_HISTOGRAM + bucket] += 1.0
+
+    def _release_free_nursery(self):
+        # Give back to the OS the pages of the nursery that are not used
+        # at the moment.  They come back, zero-filled, when we allocate
+        # there again.  Called between a minor collection and the next
+        # allocation, so that the range 'nursery_free:nursery_top' is empty.
+        size = self.nursery_top - self.nursery_free
+        if size > 0:
+            llarena.arena_reset(self.nursery_free, size, 4)
+            self.nursery_memory_released += r_uint(size)
+
     def card_marking_words_for_length(self, length):
         # --- Unoptimized version:
         #num_bits = ((length-1) >> self.card_page_shift) + 1
@@ -1529,6 +1781,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         that remain alive and move them out."""
         #
         debug_start("gc-minor")
+        start = read_timestamp()
         #
         # All nursery barriers are invalid from this point on.  They
         # are evaluated anew as part of the minor collection.
@@ -1632,6 +1885,14 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.young_rawmalloced_objects:
             self.free_young_rawmalloced_objects()
         #
+        if self.max_pause > 0.0:
+            self.last_minor_pause = float(read_timestamp() - start)
+            if self.ticks_per_second == 0.0:
+                self._calibrate_timestamp()
+            if (self.pinned_objects_in_nursery == 0 and
+                    not self.debug_rotating_nurseries):
+                self._resize_nursery_for_pause()
+        #
         # All live nursery objects are out of the nursery or pinned inside
         # the nursery.  Create nursery barriers to protect the pinned objects,
         # fill the rest of the nursery with zeros and reset the current nursery
@@ -1667,11 +1928,14 @@ class IncrementalMiniMarkGC(MovingGCBase):
             prev = prev + pinned_obj_size + \
                 (size_gc_header + self.get_size(obj))
         #
-        # reset everything after the last pinned object till the end of the arena
+        # reset everything after the last pinned object till the end of the
+        # arena (which is further than 'nursery_size' if the nursery has
+        # been made smaller by _resize_nursery_for_pause())
+        nursery_end = self.nursery + self.nursery_size_max
         if self.gc_nursery_debug:
-            llarena.arena_reset(prev, self.nursery + self.nursery_size - prev, 3)
+            llarena.arena_reset(prev, nursery_end - prev, 3)
         else:
-            llarena.arena_reset(prev, self.nursery + self.nursery_size - prev, 0)
+            llarena.arena_reset(prev, nursery_end - prev, 0)
         #
         # always add the end of the nursery to the list
         nursery_barriers.append(self.nursery + self.nursery_size)
@@ -1682,6 +1946,15 @@ class IncrementalMiniMarkGC(MovingGCBase):
         # XXX gc-minimark-pinning does a debug_rotate_nursery() here (groggi)
         self.nursery_free = self.nursery
         self.nursery_top = self.nursery_barriers.popleft()
+        self.nursery_chunks_free = self.nursery_top
+        self.nursery_chunks_top = self.nursery_top
+        if self.nursery_chunks:
+            # the chunks saved for other threads are gone
+            i = 0
+            while i < NURSERY_CHUNK_SLOTS:
+                self.nursery_chunks[i].free = llmemory.NULL
+                self.nursery_chunks[i].top = llmemory.NULL
+                i += 1
         #
         # clear GCFLAG_PINNED_OBJECT_PARENT_KNOWN from all parents in the list.
         self.old_objects_pointing_to_pinned.foreach(
@@ -1696,8 +1969,93 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #
         self.root_walker.finished_minor_collection()
         #
+        self.stats[rgc.MINOR_COLLECTIONS] += 1.0
+        self.stats[rgc.BYTES_PROMOTED] += float(self.nursery_surviving_size)
+        self._record_pause(rgc.TIME_MINOR, start)
         debug_stop("gc-minor")
 
+    def _resize_nursery_for_pause(self):
+        # With PYPY_GC_MAX_PAUSE.  The duration of a minor collection
+        # grows with the size of the nursery: aim at using half of the
+        # pause budget, changing the size by at most a factor 2 at a time.
+        # Must only be called while the nursery contains no object.
+        max_pause = self.max_pause * self.ticks_per_second
+        if max_pause <= 0.0:
+            return      # not calibrated yet
+        pause = self.last_minor_pause
+        if pause > 0.0:
+            factor = max_pause * 0.5 / pause
+        else:
+            factor = 2.0
+        if 0.8 <= factor <= 1.25:
+            return      # close enough
+        factor = min(max(factor, 0.5), 2.0)
+        newsize = int(self.nursery_size * factor) & ~(WORD-1)
+        newsize = max(newsize, 2 * (self.nonlarge_max + 1))
+        newsize = min(newsize, self.nursery_size_max)
+        if newsize != self.nursery_size:
+            debug_start("gc-set-nursery-size")
+            debug_print("nursery size:", newsize)
+            self.nursery_size = newsize
+            debug_stop("gc-set-nursery-size")
+
+    def _step_size_for_pause(self, rate):
+        # With PYPY_GC_MAX_PAUSE.  Every step of a major collection comes
+        # just after a minor collection; return how much work, measured
+        # in the unit of 'rate' (per tick), fits in what is left of the
+        # pause budget.  Returns 0.0 if 'rate' was not measured so far.
+        max_pause = self.max_pause * self.ticks_per_second
+        budget = max_pause - self.last_minor_pause
+        if budget < max_pause * 0.25:
+            budget = max_pause * 0.25
+        return rate * budget
+
+    def _calibrate_timestamp(self):
+        # Compute 'ticks_per_second' from the time.time() and the
+        # read_timestamp() elapsed since the first call.
+        now = time.time()
+        ticks = read_timestamp()
+        if self.calibration_time == 0.0:
+            self.calibration_time = now
+            self.calibration_ticks = ticks
+            return
+        elapsed = now - self.calibration_time
+        elapsed_ticks = float(ticks - self.calibration_ticks)
+        if elapsed > 0.0 and elapsed_ticks > 0.0:
+            self.ticks_per_second = elapsed_ticks / elapsed
+
+    def _update_rate(self, oldrate, work, start):
+        # Return the average speed of the last steps, in work per tick.
+        duration = float(read_timestamp() - start)
+        if work <= 0.0 or duration <= 0.0:
+            return oldrate
+        rate = work / duration
+        if oldrate > 0.0:
+            rate = (oldrate + rate) * 0.5
+        return rate
+
+    def _marking_step_for_pause(self, default):
+        step = self._step_size_for_pause(self.marking_rate)
+        if step <= 0.0:
+            step = float(default)
+        #
+        # But mark enough to finish the major collection before the heap
+        # reaches 'major_collection_threshold' times its size at the start:
+        # there are roughly 'headroom / nursery_size' steps left.
+        headroom = (self.heap_at_major_start * self.major_collection_threshold
+                    - float(self.get_total_memory_used()))
+        steps_left = max(headroom / float(self.nursery_size), 1.0)
+        work_left = self.heap_at_major_start - self.bytes_marked_in_major
+        step = max(step, work_left / steps_left)
+        step = max(step, float(WORD))
+        return r_uint(min(step, float(sys.maxint)))
+
+    def _sweeping_step_for_pause(self, rate, default):
+        step = self._step_size_for_pause(rate)
+        if step <= 0.0:
+            return default
+        return intmask(int(min(max(step, 1.0), float(sys.maxint))))
+
     def _reset_flag_old_objects_pointing_to_pinned(self, obj, ignore):
         assert self.header(obj).tid & GCFLAG_PINNED_OBJECT_PARENT_KNOWN
         self.header(obj).tid &= ~GCFLAG_PINNED_OBJECT_PARENT_KNOWN
@@ -1875,7 +2233,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # into a new nonmovable location.
             totalsize = size_gc_header + self.get_size(obj)
             self.nursery_surviving_size += raw_malloc_usage(totalsize)
-            newhdr = self._malloc_out_of_nursery(totalsize)
+            newhdr = self._malloc_out_of_nursery(obj, totalsize)
             #
         elif self.is_forwarded(obj):
             #
@@ -1927,6 +2285,12 @@ class IncrementalMiniMarkGC(MovingGCBase):
         # nursery are kept unchanged in this step.
         llmemory.raw_memcopy(obj - size_gc_header, newhdr, totalsize)
         #
+        # If the copy was given a card marker bits area, flag it.
+        if (self.card_page_indices > 0 and   # <- this is constant-folded
+            raw_malloc_usage(totalsize) > self.small_request_threshold and
+            self._wants_cards_out_of_nursery(obj)):
+            self.header(newhdr + size_gc_header).tid |= GCFLAG_HAS_CARDS
+        #
         # Set the old object's tid to -42 (containing all flags) and
         # replace the old object's content with the target address.
         # A bit of no-ops to convince llarena that we are changing
@@ -1982,31 +2346,66 @@ class IncrementalMiniMarkGC(MovingGCBase):
         ll_assert(added_somewhere, "wrong flag combination on young array")
 
 
-    def _malloc_out_of_nursery(self, totalsize):
-        """Allocate non-movable memory for an object of the given
+    def _malloc_out_of_nursery(self, obj, totalsize):
+        """Allocate non-movable memory for the object 'obj' of the given
         'totalsize' that lives so far in the nursery."""
         if raw_malloc_usage(totalsize) <= self.small_request_threshold:
             # most common path
             return self.ac.malloc(totalsize)
         else:
             # for nursery objects that are not small
-            return self._malloc_out_of_nursery_nonsmall(totalsize)
+            return self._malloc_out_of_nursery_nonsmall(obj, totalsize)
     _malloc_out_of_nursery._always_inline_ = True
 
-    def _malloc_out_of_nursery_nonsmall(self, totalsize):
+    def _malloc_out_of_nursery_nonsmall(self, obj, totalsize):
         # 'totalsize' should be aligned.
         ll_assert(raw_malloc_usage(totalsize) & (WORD-1) == 0,
                   "misaligned totalsize in _malloc_out_of_nursery_nonsmall")
         #
-        arena = llarena.arena_malloc(raw_malloc_usage(totalsize), False)
+        # Arrays of gc pointers that are long enough get a card marker
+        # bits area in front of them, like the large arrays allocated
+        # by external_malloc().  The caller must then set
+        # GCFLAG_HAS_CARDS on the copy.
+        cardheadersize = 0
+        if (self.card_page_indices > 0 and   # <- this is constant-folded
+                self._wants_cards_out_of_nursery(obj)):
+            typeid = self.get_type_id(obj)
+            offset_to_length = self.varsize_offset_to_length(typeid)
+            length = (obj + offset_to_length).signed[0]
+            cardheadersize = WORD * self.card_marking_words_for_length(length)
+        allocsize = cardheadersize + raw_malloc_usage(totalsize)
+        #
+        arena = llarena.arena_malloc(allocsize, False)
         if not arena:
             out_of_memory("out of memory: couldn't allocate a few KB more")
-        llarena.arena_reserve(arena, totalsize)
+        i = 0
+        while i < cardheadersize:
+            p = arena + i
+            llarena.arena_reserve(p, llmemory.sizeof(lltype.Char))
+            p.char[0] = '\x00'
+            i += 1
+        result = arena + cardheadersize
+        llarena.arena_reserve(result, totalsize)
         #
         size_gc_header = self.gcheaderbuilder.size_gc_header
-        self.rawmalloced_total_size += r_uint(raw_malloc_usage(totalsize))
-        self.old_rawmalloced_objects.append(arena + size_gc_header)
-        return arena
+        self.rawmalloced_total_size += r_uint(allocsize)
+        self.old_rawmalloced_objects.append(result + size_gc_header)
+        return result
+
+    def _wants_cards_out_of_nursery(self, obj):
+        # Should this nursery object get card marking once it is copied
+        # out of the nursery?  Yes if it has gc pointers in its array part
+        # and covers at least 'MIN_CARD_PAGES_OUT_OF_NURSERY' card pages.
+        # In this way, a minor collection after a single write into a big
+        # old array (like the 'entries' of a big rordereddict) only scans
+        # the few cards that were written to.  Only called for objects
+        # that are not small.
+        typeid = self.get_type_id(obj)
+        if not self.has_gcptr_in_varsize(typeid):
+            return False
+        offset_to_length = self.varsize_offset_to_length(typeid)
+        length = (obj + offset_to_length).signed[0]
+        return length >= MIN_CARD_PAGES_OUT_OF_NURSERY * self.card_page_indices
 
     def free_young_rawmalloced_objects(self):
         self.young_rawmalloced_objects.foreach(
@@ -2063,6 +2462,13 @@ class IncrementalMiniMarkGC(MovingGCBase):
     def major_collection_step(self, reserving_size=0):
         debug_start("gc-collect-step")
         debug_print("starting gc state: ", GC_STATES[self.gc_state])
+        start = read_timestamp()
+        if self.gc_state == STATE_SWEEPING:
+            time_no = rgc.TIME_SWEEPING
+        elif self.gc_state == STATE_FINALIZING:
+            time_no = rgc.TIME_FINALIZING
+        else:
+            time_no = rgc.TIME_MARKING
         # Debugging checks
         if self.pinned_objects_in_nursery == 0:
             ll_assert(self.nursery_free == self.nursery,
@@ -2080,6 +2486,10 @@ class IncrementalMiniMarkGC(MovingGCBase):
             self.objects_to_trace = self.AddressStack()
             self.collect_roots()
             self.gc_state = STATE_MARKING
+            if self.max_pause > 0.0:
+                self._calibrate_timestamp()
+            self.heap_at_major_start = float(self.get_total_memory_used())
+            self.bytes_marked_in_major = 0.0
             self.more_objects_to_trace = self.AddressStack()
             #END SCANNING
         elif self.gc_state == STATE_MARKING:
@@ -2087,12 +2497,23 @@ class IncrementalMiniMarkGC(MovingGCBase):
                         self.objects_to_trace.length(),
                         "plus",
                         self.more_objects_to_trace.length())
-            estimate = self.gc_increment_step
+            if self.max_pause > 0.0:
+                estimate = self._marking_step_for_pause(
+                    self.gc_increment_step)
+            else:
+                estimate = self.gc_increment_step
             estimate_from_nursery = self.nursery_surviving_size * 2
             if estimate_from_nursery > estimate:
                 estimate = estimate_from_nursery
             estimate = intmask(estimate)
-            remaining = self.visit_all_objects_step(estimate)
+            if self.max_pause > 0.0:
+                remaining = self.visit_all_objects_step(estimate)
+                marked = float(estimate - remaining)
+                self.bytes_marked_in_major += marked
+                self.marking_rate = self._update_rate(self.marking_rate,
+                                                      marked, start)
+            else:
+                remaining = self.visit_all_objects_step(estimate)
             #
             if remaining >= estimate // 2:
                 if self.more_objects_to_trace.non_empty():
@@ -2158,7 +2579,17 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 # a total object size of at least '3 * nursery_size' bytes
                 # is processed.
                 limit = 3 * self.nursery_size // self.small_request_threshold
-                self.free_unvisited_rawmalloc_objects_step(limit)
+                if self.max_pause > 0.0:
+                    limit = self._sweeping_step_for_pause(
+                        self.rawmalloc_sweeping_rate, limit)
+                    remaining = self.free_unvisited_rawmalloc_objects_step(
+                        limit)
+                    if remaining == 0:    # else, we swept less than 'limit'
+                        self.rawmalloc_sweeping_rate = self._update_rate(
+                            self.rawmalloc_sweeping_rate, float(limit),
+                            start)
+                else:
+                    self.free_unvisited_rawmalloc_objects_step(limit)
                 done = False    # the 2nd half below must still be done
             else:
                 # Ask the ArenaCollection to visit a fraction of the objects.
@@ -2166,8 +2597,17 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 # GCFLAG_VISITED on the others.  Visit at most '3 *
                 # nursery_size' bytes.
                 limit = 3 * self.nursery_size // self.ac.page_size
-                done = self.ac.mass_free_incremental(self._free_if_unvisited,
-                                                     limit)
+                if self.max_pause > 0.0:
+                    limit = self._sweeping_step_for_pause(
+                        self.sweeping_rate, limit)
+                    done = self.ac.mass_free_incremental(
+                        self.ac.lazy_ok_to_free_func, limit)
+                    if not done:    # else, we swept less than 'limit'
+                        self.sweeping_rate = self._update_rate(
+                            self.sweeping_rate, float(limit), start)
+                else:
+                    done = self.ac.mass_free_incremental(
+                        self.ac.lazy_ok_to_free_func, limit)
             # XXX tweak the limits above
             #
             if done:
@@ -2203,6 +2643,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
                     self.gc_state = STATE_SCANNING
                     raise MemoryError
 
+                if self.release_nursery_memory:
+                    self._release_free_nursery()
                 self.gc_state = STATE_FINALIZING
             # FINALIZING not yet incrementalised
             # but it seems safe to allow mutator to run after sweeping and
@@ -2222,6 +2664,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         else:
             pass #XXX which exception to raise here. Should be unreachable.
 
+        self._record_pause(time_no, start)
         debug_print("stopping, now in gc state: ", GC_STATES[self.gc_state])
         debug_stop("gc-collect-step")
 
@@ -2322,7 +2765,15 @@ class IncrementalMiniMarkGC(MovingGCBase):
             self.objects_to_trace.append(obj)
 
     def _collect_ref_rec(self, root, ignored):
-        self.objects_to_trace.append(root.address[0])
+        # Don't push objects that visit() would ignore anyway.  In a
+        # big old generation most references found while marking go
+        # to objects that are already black, and pushing them only
+        # makes 'objects_to_trace' grow and be popped again for nothing.
+        obj = root.address[0]
+        if self.header(obj).tid & (GCFLAG_VISITED | GCFLAG_NO_HEAP_PTRS |
+                                   GCFLAG_PINNED):
+            return
+        self.objects_to_trace.append(obj)
 
     def visit_all_objects(self):
         while self.objects_to_trace.non_empty():
@@ -2375,8 +2826,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
     def _allocate_shadow(self, obj):
         size_gc_header = self.gcheaderbuilder.size_gc_header
         size = self.get_size(obj)
-        shadowhdr = self._malloc_out_of_nursery(size_gc_header +
-                                                size)
+        shadowhdr = self._malloc_out_of_nursery(obj, size_gc_header +
+                                                     size)
         # Initialize the shadow enough to be considered a
         # valid gc object.  If the original object stays
         # alive at the next minor collection, it will anyway
@@ -2387,6 +2838,11 @@ class IncrementalMiniMarkGC(MovingGCBase):
         # it to look valid (but ready to be freed).
         shadow = shadowhdr + size_gc_header
         self.header(shadow).tid = self.header(obj).tid
+        if (self.card_page_indices > 0 and   # <- this is constant-folded
+            raw_malloc_usage(size_gc_header + size) >
+                self.small_request_threshold and
+            self._wants_cards_out_of_nursery(obj)):
+            self.header(shadow).tid |= GCFLAG_HAS_CARDS
         typeid = self.get_type_id(obj)
         if self.is_varsize(typeid):
             lenofs = self.varsize_offset_to_length(typeid)
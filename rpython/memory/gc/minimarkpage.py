@@ -27,6 +27,9 @@ ARENA = lltype.Struct('ArenaReference',
     ('freepages', llmemory.Address),
     # -- A linked list of arenas.  See below.
     ('nextarena', ARENA_PTR),
+    # -- For an entirely free arena kept in 'free_arenas': the number of
+    #    major collections it survived there without being reused.
+    ('nidle', lltype.Signed),
     )
 ARENA_PTR.TO.become(ARENA)
 ARENA_NULL = lltype.nullptr(ARENA)
@@ -40,6 +43,29 @@ ARENA_NULL = lltype.nullptr(ARENA)
 # arenas that have 'nfreepages == i'.  We allocate pages out of the
 # arena in 'current_arena'; when it is exhausted we pick another arena
 # with the smallest value for nfreepages (but > 0).
+#
+# Objects are never moved, so a few survivors can keep an otherwise
+# empty arena alive for a long time.  Optionally (see
+# set_sparse_arena_threshold()), the same idea is applied to the
+# partially used pages: the ones that sit in an arena with many free
+# pages are kept aside in 'sparse_page_for_size' after a major
+# collection, and we only allocate into them when no other partially
+# used page of the same size class has room left.  This gives them a
+# chance to be emptied by the following major collections.
+#
+# Entirely free arenas are given back to the OS at the end of a major
+# collection.  Their memory is first released with arena_reset(..., 4),
+# i.e. madvise(MADV_DONTNEED), because the libc doesn't necessarily
+# munmap() it in arena_free().  With set_release_idle(n), they are
+# instead kept in 'free_arenas' during n more major collections, where
+# allocate_new_arena() can pick them up again: this avoids repeatedly
+# freeing and allocating arenas in programs whose heap size oscillates.
+
+# During an incremental major collection, malloc() may sweep by itself
+# up to this number of not-yet-swept pages of the size class it needs,
+# before falling back to a fresh page.
+
+LAZY_SWEEP_MAX_PAGES = 8
 
 # ____________________________________________________________
 #
@@ -104,6 +130,7 @@ class ArenaCollection(object):
         self.full_page_for_size     = self._new_page_ptr_list(length)
         self.old_page_for_size      = self._new_page_ptr_list(length)
         self.old_full_page_for_size = self._new_page_ptr_list(length)
+        self.sparse_page_for_size   = self._new_page_ptr_list(length)
         self.nblocks_for_size = lltype.malloc(rffi.CArray(lltype.Signed),
                                               length, flavor='raw',
                                               immortal=True)
@@ -134,12 +161,35 @@ class ArenaCollection(object):
         # guarantee that 'arenas_lists[1:min_empty_nfreepages]' are all empty
         self.min_empty_nfreepages = self.max_pages_per_arena
         #
+        # arenas with at least this number of free pages are "sparse".
+        # The default value is never reached.
+        self.sparse_arena_nfreepages = self.max_pages_per_arena + 1
+        #
         # part of current_arena might still contain uninitialized pages
         self.num_uninitialized_pages = 0
         #
         # the total memory used, counting every block in use, without
         # the additional bookkeeping stuff.
         self.total_memory_used = r_uint(0)
+        #
+        # during an incremental mass_free, the size classes that still
+        # have pages in 'old_xxx' are the ones <= this number.
+        self.size_class_with_old_pages = -1
+        #
+        # If not None, the 'ok_to_free_func' that malloc() can use to
+        # sweep by itself the not-yet-swept pages of a size class,
+        # instead of starting a fresh page.  See sweep_lazily().
+        self.lazy_ok_to_free_func = None
+        #
+        # entirely free arenas that are not given back to the OS yet,
+        # chained via 'nextarena'.  See _release_free_arenas().
+        self.free_arenas = ARENA_NULL
+        self.release_idle = 0
+        #
+        # the total size of the arenas currently allocated, and the
+        # total number of bytes given back to the OS so far
+        self.total_memory_alloced = r_uint(0)
+        self.total_memory_released = r_uint(0)
 
 
     def _new_page_ptr_list(self, length):
@@ -147,6 +197,21 @@ class ArenaCollection(object):
                              flavor='raw', zero=True,
                              immortal=True)
 
+    def set_sparse_arena_threshold(self, fraction):
+        """Arenas in which at least 'fraction' of the pages are free are
+        considered sparse: we allocate into their partially used pages
+        only as a last resort, before asking for a new page.
+        """
+        nfreepages = int(self.max_pages_per_arena * fraction)
+        self.sparse_arena_nfreepages = max(nfreepages, 1)
+
+    def set_release_idle(self, n):
+        """Keep entirely free arenas during 'n' major collections before
+        giving them back to the OS.  They are reused first if we need new
+        arenas in the meantime.
+        """
+        self.release_idle = n
+
 
     def malloc(self, size):
         """Allocate a block from a page in an arena."""
@@ -160,7 +225,16 @@ class ArenaCollection(object):
         size_class = nsize >> WORD_POWER_2
         page = self.page_for_size[size_class]
         if page == PAGE_NULL:
-            page = self.allocate_new_page(size_class)
+            if size_class <= self.size_class_with_old_pages:
+                page = self.sweep_lazily(size_class, LAZY_SWEEP_MAX_PAGES)
+            if page == PAGE_NULL:
+                page = self.sparse_page_for_size[size_class]
+                if page != PAGE_NULL:
+                    # use the pages of sparse arenas now
+                    self.sparse_page_for_size[size_class] = PAGE_NULL
+                    self.page_for_size[size_class] = page
+            if page == PAGE_NULL:
+                page = self.allocate_new_page(size_class)
         #
         # The result is simply 'page.freeblock'
         result = page.freeblock
@@ -251,6 +325,10 @@ class ArenaCollection(object):
             while arena:
                 yield arena
                 arena = arena.nextarena
+        arena = self.free_arenas
+        while arena:
+            yield arena
+            arena = arena.nextarena
 
 
     def _pick_next_arena(self):
@@ -285,6 +363,13 @@ class ArenaCollection(object):
         if self._pick_next_arena():
             return
         #
+        # Reuse an entirely free arena that was not given back to the OS.
+        arena = self.free_arenas
+        if arena != ARENA_NULL:
+            self.free_arenas = arena.nextarena
+            self.current_arena = arena
+            return
+        #
         # No more arena with any free page.  We must allocate a new arena.
         if not we_are_translated():
             for a in self._all_arenas():
@@ -311,6 +396,7 @@ class ArenaCollection(object):
         arena.freepages = firstpage
         self.num_uninitialized_pages = npages
         self.current_arena = arena
+        self.total_memory_alloced += r_uint(self.arena_size)
         #
     allocate_new_arena._dont_inline_ = True
 
@@ -325,6 +411,7 @@ class ArenaCollection(object):
         self.size_class_with_old_pages = size_class
         #
         while size_class >= 1:
+            self._unsparse_pages(size_class)
             self.old_page_for_size[size_class]      = (
                             self.page_for_size[size_class])
             self.old_full_page_for_size[size_class] = (
@@ -334,6 +421,19 @@ class ArenaCollection(object):
             size_class -= 1
 
 
+    def _unsparse_pages(self, size_class):
+        # put back the pages of 'sparse_page_for_size' in front of the
+        # ones of 'page_for_size'
+        page = self.sparse_page_for_size[size_class]
+        if page != PAGE_NULL:
+            self.sparse_page_for_size[size_class] = PAGE_NULL
+            lastpage = page
+            while lastpage.nextpage != PAGE_NULL:
+                lastpage = lastpage.nextpage
+            lastpage.nextpage = self.page_for_size[size_class]
+            self.page_for_size[size_class] = page
+
+
     def mass_free_incremental(self, ok_to_free_func, max_pages):
         """For each object, if ok_to_free_func(obj) returns True, then free
         the object.  This returns True if complete, or False if the limit
@@ -359,11 +459,36 @@ class ArenaCollection(object):
         #
         if size_class >= 0:
             self._rehash_arenas_lists()
+            self._release_free_arenas()
             self.size_class_with_old_pages = -1
         #
         return True
 
 
+    def sweep_lazily(self, size_class, max_pages):
+        """Called by malloc() during an incremental mass_free, when there is
+        no page with room for 'size_class' but some pages of that size
+        class have not been swept yet.  Sweep them now, one by one, until
+        one of them has got free blocks, and return it.  This hands the
+        memory freed by the sweep back to the allocator as soon as it is
+        needed, rather than growing the heap with fresh pages while the
+        mass_free_incremental() steps slowly catch up.  Gives up and
+        returns PAGE_NULL after 'max_pages' pages.
+        """
+        ok_to_free_func = self.lazy_ok_to_free_func
+        if ok_to_free_func is None:
+            return PAGE_NULL
+        while max_pages > 0:
+            if self.mass_free_in_pages(size_class, ok_to_free_func, 1) > 0:
+                break     # no more pages to sweep in this size class
+            page = self.page_for_size[size_class]
+            if page != PAGE_NULL:
+                return page
+            max_pages -= 1
+        return PAGE_NULL
+    sweep_lazily._dont_inline_ = True
+
+
     def mass_free(self, ok_to_free_func):
         """For each object, if ok_to_free_func(obj) returns True, then free
         the object.
@@ -394,9 +519,11 @@ class ArenaCollection(object):
                 #
                 if arena.nfreepages == arena.totalpages:
                     #
-                    # The whole arena is empty.  Free it.
-                    llarena.arena_free(arena.base)
-                    lltype.free(arena, flavor='raw', track_allocation=False)
+                    # The whole arena is empty.  Move it to 'free_arenas';
+                    # _release_free_arenas() will free it.
+                    arena.nidle = 0
+                    arena.nextarena = self.free_arenas
+                    self.free_arenas = arena
                     #
                 else:
                     # Insert 'arena' in the correct arenas_lists[n]
@@ -412,6 +539,26 @@ class ArenaCollection(object):
         self.min_empty_nfreepages = 1
 
 
+    def _release_free_arenas(self):
+        # Called at the end of a major collection.  Give back to the OS
+        # the free arenas that stayed unused for long enough.
+        arena = self.free_arenas
+        self.free_arenas = ARENA_NULL
+        while arena != ARENA_NULL:
+            nextarena = arena.nextarena
+            if arena.nidle >= self.release_idle:
+                llarena.arena_reset(arena.base, self.arena_size, 4)
+                llarena.arena_free(arena.base)
+                lltype.free(arena, flavor='raw', track_allocation=False)
+                self.total_memory_alloced -= r_uint(self.arena_size)
+                self.total_memory_released += r_uint(self.arena_size)
+            else:
+                arena.nidle += 1
+                arena.nextarena = self.free_arenas
+                self.free_arenas = arena
+            arena = nextarena
+
+
     def mass_free_in_pages(self, size_class, ok_to_free_func, max_pages):
         nblocks = self.nblocks_for_size[size_class]
         block_size = size_class * WORD
@@ -445,9 +592,14 @@ class ArenaCollection(object):
                 elif surviving > 0:
                     #
                     # There is at least 1 object surviving.  Re-insert
-                    # the page in the 'remaining_partial_pages' chained list.
-                    page.nextpage = remaining_partial_pages
-                    remaining_partial_pages = page
+                    # the page in the 'remaining_partial_pages' chained list,
+                    # or in 'sparse_page_for_size' if its arena is sparse.
+                    if page.arena.nfreepages >= self.sparse_arena_nfreepages:
+                        page.nextpage = self.sparse_page_for_size[size_class]
+                        self.sparse_page_for_size[size_class] = page
+                    else:
+                        page.nextpage = remaining_partial_pages
+                        remaining_partial_pages = page
                     #
                 else:
                     # No object survives; free the page.
@@ -654,6 +654,177 @@ class TestIncrementalMiniMarkGCSimple(TestMiniMarkGCSimple):
         newobj1 = oldobj.next
         assert newobj1.x == 1337
 
+    def test_marking_does_not_push_visited_objects(self):
+        a = self.malloc(S)
+        self.stackroots.append(a)
+        b = self.malloc(S)
+        self.write(a, 'prev', b)
+        self.write(a, 'next', b)
+        self.stackroots.append(b)
+        self.gc.debug_gc_step_until(incminimark.STATE_MARKING)
+        # the roots are pushed in order, so 'b' is visited first
+        assert self.gc.objects_to_trace.length() == 2
+        self.gc.visit_all_objects_step(1)
+        assert self.gc.objects_to_trace.length() == 1
+        # visiting 'a' finds only references to the already-black 'b'
+        self.gc.visit_all_objects_step(1)
+        assert not self.gc.objects_to_trace.non_empty()
+        self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+        a = self.stackroots[0]
+        assert a.prev == a.next == self.stackroots[1]
+
+    def test_card_marking_for_array_moved_out_of_nursery(self):
+        # arrays of at least 8 card pages get cards when they leave the
+        # nursery; shorter ones don't
+        short = self.malloc(VAR, 31)
+        a = self.malloc(VAR, 40)
+        assert self.gc.is_in_nursery(llmemory.cast_ptr_to_adr(a))
+        self.stackroots.append(short)
+        self.stackroots.append(a)
+        self.gc.minor_collection()
+        short = self.stackroots[0]
+        a = self.stackroots[1]
+        addr_short = llmemory.cast_ptr_to_adr(short)
+        addr = llmemory.cast_ptr_to_adr(a)
+        assert not self.gc.is_in_nursery(addr)
+        assert self.gc.header(addr_short).tid & incminimark.GCFLAG_HAS_CARDS == 0
+        hdr = self.gc.header(addr)
+        assert hdr.tid & incminimark.GCFLAG_HAS_CARDS
+        assert hdr.tid & incminimark.GCFLAG_CARDS_SET == 0
+        assert hdr.tid & incminimark.GCFLAG_TRACK_YOUNG_PTRS
+        #
+        # writing into the array only sets a card
+        p = self.malloc(S)
+        p.x = 42
+        self.writearray(a, 37, p)
+        assert hdr.tid & incminimark.GCFLAG_CARDS_SET
+        assert ord(self.gc.get_card(addr, 1).char[0]) == 0x02   # card 9
+        assert not self.gc.old_objects_pointing_to_young.non_empty()
+        self.gc.minor_collection()
+        a = self.stackroots[1]
+        assert a[37].x == 42
+        assert hdr.tid & incminimark.GCFLAG_CARDS_SET == 0
+        #
+        # full collections keep it alive, and free it with its cards
+        self.gc.collect()
+        assert self.stackroots[1][37].x == 42
+        self.stackroots.pop()
+        self.gc.collect()
+    test_card_marking_for_array_moved_out_of_nursery.GC_PARAMS = {
+        "card_page_indices": 4, "large_object": 64*WORD,
+        "nursery_size": 256*WORD}
+
+    def test_nursery_chunks_per_thread(self):
+        def malloc(x):
+            p = self.malloc(S)
+            p.x = x
+            self.stackroots.append(p)
+            return self.gc.nursery_free     # the end of 'p'
+        a1 = malloc(1)
+        self.gc.switch_nursery_chunk(1, 2)
+        # thread 1 keeps 16 words after 'a1', thread 2 gets what follows
+        saved = self.gc.nursery_chunks[0]
+        assert saved.tid == 1
+        top1 = saved.top
+        assert a1 == saved.free < top1 == self.gc.nursery_free
+        b1 = malloc(2)
+        assert top1 < b1
+        self.gc.switch_nursery_chunk(2, 1)
+        assert not saved.top
+        a2 = malloc(3)
+        assert a1 < a2 < top1
+        self.gc.switch_nursery_chunk(1, 2)
+        b2 = malloc(4)
+        assert b1 < b2
+        # fill more than the chunk of thread 2
+        for i in range(10):
+            malloc(5 + i)
+        self.gc.switch_nursery_chunk(2, 1)
+        a3 = malloc(15)
+        assert a2 < a3 < top1
+        #
+        self.gc.minor_collection()
+        assert [p.x for p in self.stackroots] == range(1, 16)
+        for i in range(incminimark.NURSERY_CHUNK_SLOTS):
+            assert not self.gc.nursery_chunks[i].top
+        assert self.gc.nursery_free == self.gc.nursery
+        assert self.gc.nursery_chunks_free == self.gc.nursery_top
+        self.gc.switch_nursery_chunk(1, 2)
+        malloc(16)
+        self.gc.collect()
+        assert [p.x for p in self.stackroots] == range(1, 17)
+    test_nursery_chunks_per_thread.GC_PARAMS = {
+        "nursery_chunk_size": 16*WORD, "nursery_size": 256*WORD}
+
+    def test_release_free_nursery(self):
+        from rpython.rlib import rgc
+        self.gc.release_nursery_memory = True
+        p = self.malloc(S)
+        p.x = 42
+        self.stackroots.append(p)
+        self.gc.collect()
+        released = self.gc.get_stats(rgc.TOTAL_MEMORY_RELEASED)
+        assert released == self.gc.nursery_size
+        # the nursery can still be used
+        q = self.malloc(S)
+        q.x = 43
+        self.stackroots.append(q)
+        self.gc.collect()
+        assert [p.x for p in self.stackroots] == [42, 43]
+        released = self.gc.get_stats(rgc.TOTAL_MEMORY_RELEASED)
+        assert released == 2 * self.gc.nursery_size
+
+    def test_max_pause(self):
+        size = self.gc.nursery_size
+        minsize = 2 * (self.gc.nonlarge_max + 1)
+        self.gc.max_pause = 1e-9       # much shorter than any pause
+        for i in range(10):
+            p = self.malloc(S)
+            p.x = i
+            self.stackroots.append(p)
+            self.gc.minor_collection()
+        assert self.gc.ticks_per_second > 0.0
+        assert self.gc.nursery_size == minsize
+        self.gc.collect()
+        assert self.gc.marking_rate > 0.0
+        assert [p.x for p in self.stackroots] == range(10)
+        #
+        self.gc.max_pause = 1000.0
+        for i in range(10):
+            self.gc.minor_collection()
+        assert self.gc.nursery_size == size
+        p = self.malloc(S)
+        p.x = 10
+        self.stackroots.append(p)
+        self.gc.collect()
+        assert [p.x for p in self.stackroots] == range(11)
+    test_max_pause.GC_PARAMS = {"nursery_size": 1024*WORD}
+
+    def test_get_stats(self):
+        from rpython.rlib import rgc
+        p = self.malloc(S)
+        self.stackroots.append(p)
+        self.gc.minor_collection()
+        assert self.gc.get_stats(rgc.MINOR_COLLECTIONS) == 1
+        promoted = self.gc.get_stats(rgc.BYTES_PROMOTED)
+        assert promoted >= llmemory.raw_malloc_usage(llmemory.sizeof(S))
+        self.gc.collect()
+        assert self.gc.get_stats(rgc.MAJOR_COLLECTIONS) == 1
+        assert self.gc.get_stats(rgc.BYTES_PROMOTED) == promoted
+        assert self.gc.get_stats(rgc.ARENA_MEMORY_USED) > 0
+        nminor = self.gc.get_stats(rgc.MINOR_COLLECTIONS)
+        nsteps = 0
+        for i in range(rgc.PAUSE_HISTOGRAM_BUCKETS):
+            nsteps += self.gc.get_stats(rgc.PAUSE_HISTOGRAM + i)
+        # one major collection step after every minor collection but
+        # the first one
+        assert nsteps == 2 * nminor - 1
+        for time_no in [rgc.TIME_MINOR, rgc.TIME_MARKING,
+                        rgc.TIME_SWEEPING, rgc.TIME_FINALIZING]:
+            max_no = time_no - rgc.TIME_MINOR + rgc.MAX_TIME_MINOR
+            assert 0.0 < self.gc.get_stats(max_no) <= (
+                self.gc.get_stats(time_no))
+
     def test_obj_on_escapes_on_stack(self):
         obj0 = self.malloc(S)
 
@@ -82,6 +82,19 @@ def test_read_from_env():
     finally:
         os.environ = saved
 
+def test_read_time_from_env():
+    saved = os.environ
+    try:
+        for value, expected in [(None, 0.0), ('', 0.0), ('???', 0.0),
+                                ('2', 2.0), ('0.5s', 0.5), ('5ms', 0.005),
+                                ('250us', 0.00025), ('ms', 0.0)]:
+            os.environ = FakeEnviron(value)
+            result = env.read_time_from_env('FOOBAR')
+            assert type(result) is float
+            assert abs(result - expected) < 1e-12
+    finally:
+        os.environ = saved
+
 def test_get_total_memory_linux2():
     filepath = udir.join('get_total_memory_linux2')
     filepath.write("""\
@@ -1,7 +1,7 @@
 import py
 from rpython.memory.gc.minimarkpage import ArenaCollection
 from rpython.memory.gc.minimarkpage import PAGE_HEADER, PAGE_PTR
-from rpython.memory.gc.minimarkpage import PAGE_NULL, WORD
+from rpython.memory.gc.minimarkpage import PAGE_NULL, WORD, ARENA_NULL
 from rpython.memory.gc.minimarkpage import _dummy_size
 from rpython.rtyper.lltypesystem import lltype, llmemory, llarena
 from rpython.rtyper.lltypesystem.llmemory import cast_ptr_to_adr
@@ -402,11 +402,134 @@ def test_mass_free_half_page_becomes_more_free():
 
 # ____________________________________________________________
 
-def test_random(incremental=False):
+def test_sweep_lazily():
+    pagesize = hdrsize + 7*WORD
+    ac = arena_collection_for_test(pagesize, "#2", fill_with_objects=2)
+    ok_to_free = OkToFree(ac, 0.5)
+    ac.lazy_ok_to_free_func = ok_to_free
+    ac.mass_free_prepare()
+    assert ac.page_for_size[2] == PAGE_NULL
+    #
+    # malloc() sweeps the unswept full page and reuses the block that
+    # was just freed, instead of asking for a fresh page
+    obj = ac.malloc(2*WORD)
+    assert obj == pagenum(ac, 0) + hdrsize + 2*WORD
+    assert ok_to_free.seen == {hdrsize + 0*WORD: False,
+                               hdrsize + 2*WORD: True,
+                               hdrsize + 4*WORD: False}
+    assert ac.full_page_for_size[2] == getpage(ac, 0)
+    assert ac.old_full_page_for_size[2] == PAGE_NULL
+    assert ac.old_page_for_size[2] == getpage(ac, 1)
+    #
+    # the rest of the sweeping only sees the other page
+    assert ac.mass_free_incremental(ok_to_free, 99)
+    assert len(ok_to_free.seen) == 5
+    assert ac.total_memory_used == 8*WORD
+    assert freepages(ac) == NULL
+
+def test_sweep_lazily_gives_up():
+    pagesize = hdrsize + 7*WORD
+    ac = arena_collection_for_test(pagesize, "###", fill_with_objects=2)
+    ok_to_free = OkToFree(ac, False)
+    ac.lazy_ok_to_free_func = ok_to_free
+    ac.mass_free_prepare()
+    assert ac.sweep_lazily(2, 2) == PAGE_NULL
+    assert len(ok_to_free.seen) == 6
+    assert ac.old_full_page_for_size[2] == getpage(ac, 2)
+    assert ac.sweep_lazily(2, 2) == PAGE_NULL
+    assert len(ok_to_free.seen) == 9
+    assert ac.old_full_page_for_size[2] == PAGE_NULL
+
+def test_sparse_arena_pages_are_used_last():
+    pagesize = hdrsize + 7*WORD
+    ac = arena_collection_for_test(pagesize, "22..", fill_with_objects=2)
+    ac.set_sparse_arena_threshold(0.5)
+    assert ac.sparse_arena_nfreepages == 2
+    ok_to_free = OkToFree(ac, False)
+    ac.mass_free(ok_to_free)
+    # both pages are kept aside, as their arena has 2 free pages out of 4
+    assert ac.page_for_size[2] == PAGE_NULL
+    assert ac.sparse_page_for_size[2] == getpage(ac, 1)
+    assert getpage(ac, 1).nextpage == getpage(ac, 0)
+    # ...but they are still used before allocating a new page
+    obj = ac.malloc(2*WORD)
+    assert obj == pagenum(ac, 1) + hdrsize + 4*WORD
+    assert ac.sparse_page_for_size[2] == PAGE_NULL
+    assert ac.page_for_size[2] == getpage(ac, 0)
+    assert ac.full_page_for_size[2] == getpage(ac, 1)
+    #
+    # the next major collection sees them again
+    ok_to_free = OkToFree(ac, False)
+    ac.mass_free(ok_to_free)
+    assert len(ok_to_free.seen) == 5
+    assert ac.sparse_page_for_size[2] == getpage(ac, 0)
+    assert ac.full_page_for_size[2] == getpage(ac, 1)
+    assert ac.total_memory_used == 5*2*WORD
+
+def test_sparse_arena_threshold_not_reached():
+    pagesize = hdrsize + 7*WORD
+    ac = arena_collection_for_test(pagesize, "22..", fill_with_objects=2)
+    ac.set_sparse_arena_threshold(0.75)
+    assert ac.sparse_arena_nfreepages == 3
+    ok_to_free = OkToFree(ac, False)
+    ac.mass_free(ok_to_free)
+    assert ac.page_for_size[2] == getpage(ac, 1)
+    assert ac.sparse_page_for_size[2] == PAGE_NULL
+
+def _arena_collection_with_full_arena(pagesize):
+    ac = arena_collection_for_test(pagesize, "22", fill_with_objects=2)
+    # like allocate_new_page() when the arena is exhausted
+    arena = ac.current_arena
+    arena.nextarena = ARENA_NULL
+    ac.arenas_lists[0] = arena
+    ac.current_arena = ARENA_NULL
+    return ac, arena
+
+def test_free_arena_is_released():
+    pagesize = hdrsize + 7*WORD
+    ac, arena = _arena_collection_with_full_arena(pagesize)
+    fakearena = arena.base.arena
+    ac.mass_free(OkToFree(ac, True))
+    assert fakearena.freed
+    assert ac.free_arenas == ARENA_NULL
+    assert ac.total_memory_released == ac.arena_size
+
+def test_free_arena_is_released_when_idle():
+    pagesize = hdrsize + 7*WORD
+    ac, arena = _arena_collection_with_full_arena(pagesize)
+    ac.set_release_idle(2)
+    fakearena = arena.base.arena
+    ac.mass_free(OkToFree(ac, True))
+    assert ac.free_arenas == arena
+    assert list(ac._all_arenas()) == [arena]
+    ac.mass_free(OkToFree(ac, True))
+    assert ac.free_arenas == arena
+    assert not fakearena.freed
+    ac.mass_free(OkToFree(ac, True))
+    assert fakearena.freed
+    assert ac.free_arenas == ARENA_NULL
+    assert ac.total_memory_released == ac.arena_size
+
+def test_free_arena_is_reused():
+    pagesize = hdrsize + 7*WORD
+    ac, arena = _arena_collection_with_full_arena(pagesize)
+    ac.set_release_idle(1)
+    ac.mass_free(OkToFree(ac, True))
+    assert ac.free_arenas == arena
+    del ac.allocate_new_arena     # the real one from now on
+    obj = ac.malloc(2*WORD)
+    assert obj.arena is arena.base.arena
+    assert ac.current_arena == arena
+    assert ac.free_arenas == ARENA_NULL
+    assert ac.total_memory_released == 0
+
+def test_random(incremental=False, lazy=False, sparse=False):
     import random
     pagesize = hdrsize + 24*WORD
     num_pages = 3
     ac = arena_collection_for_test(pagesize, " " * num_pages)
+    if sparse:
+        ac.set_sparse_arena_threshold(0.5)
     live_objects = {}
     #
     # Run the test until three arenas are freed.  This is a quick test
@@ -446,6 +569,8 @@ def test_random(incremental=False):
             # Free half the objects, randomly
             ok_to_free = OkToFree(ac, lambda obj: random.random() < 0.5,
                                   multiarenas=True)
+            if lazy:
+                ac.lazy_ok_to_free_func = ok_to_free
             live_objects_extra = {}
             fresh_extra = 0
             if not incremental:
@@ -455,9 +580,10 @@ def test_random(incremental=False):
                 while not ac.mass_free_incremental(ok_to_free,
                                                    random.randrange(1, 3)):
                     print '[]'
-                    prev = ac.total_memory_used
                     allocate_object(live_objects_extra)
-                    fresh_extra += ac.total_memory_used - prev
+                # (with lazy sweeping, allocate_object() can also add the
+                # objects surviving in the pages it swept)
+                fresh_extra = sum(live_objects_extra.values())
             #
             # Check that we have seen all objects
             assert sorted(ok_to_free.seen) == sorted(live_objects)
@@ -477,3 +603,12 @@ def test_random(incremental=False):
 
 def test_random_incremental():
     test_random(incremental=True)
+
+def test_random_incremental_lazy():
+    test_random(incremental=True, lazy=True)
+
+def test_random_sparse():
+    test_random(sparse=True)
+
+def test_random_incremental_lazy_sparse():
+    test_random(incremental=True, lazy=True, sparse=True)
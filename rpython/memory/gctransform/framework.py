@@ -322,6 +322,9 @@ class BaseFrameworkGCTransformer(GCTransformer):
         self.can_move_ptr = getfn(GCClass.can_move.im_func,
                                   [s_gc, SomeAddress()],
                                   annmodel.SomeBool())
+        self.get_stats_ptr = getfn(GCClass.get_stats.im_func,
+                                   [s_gc, annmodel.SomeInteger()],
+                                   annmodel.SomeFloat())
 
         if hasattr(GCClass, 'shrink_array'):
             self.shrink_array_ptr = getfn(
@@ -792,6 +795,12 @@ class BaseFrameworkGCTransformer(GCTransformer):
         hop.genop("direct_call", [self.can_move_ptr, self.c_const_gc, v_addr],
                   resultvar=op.result)
 
+    def gct_gc_get_stats(self, hop):
+        op = hop.spaceop
+        hop.genop("direct_call",
+                  [self.get_stats_ptr, self.c_const_gc, op.args[0]],
+                  resultvar=op.result)
+
     def gct_shrink_array(self, hop):
         if self.shrink_array_ptr is None:
             return GCTransformer.gct_shrink_array(self, hop)
@@ -121,6 +121,10 @@ class ShadowStackRootWalker(BaseRootWalker):
         # Return the thread identifier, as an integer.
         get_tid = rthread.get_ident
 
+        # the GC may want to know when we switch threads, too
+        gc = gcdata.gc
+        gc_switches_threads = hasattr(gc.__class__, 'switch_nursery_chunk')
+
         def thread_setup():
             tid = get_tid()
             gcdata.main_tid = tid
@@ -187,6 +191,8 @@ class ShadowStackRootWalker(BaseRootWalker):
                 shadow_stack_pool.start_fresh_new_state()
             # done
             #
+            if gc_switches_threads:
+                gc.switch_nursery_chunk(gcdata.active_tid, new_tid)
             gcdata.active_tid = new_tid
         switch_shadow_stacks._dont_inline_ = True
 
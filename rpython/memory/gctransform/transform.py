@@ -603,5 +603,8 @@ class GCTransformer(BaseGCTransformer):
     def gct_gc_can_move(self, hop):
         return hop.cast_result(rmodel.inputconst(lltype.Bool, False))
 
+    def gct_gc_get_stats(self, hop):
+        return hop.cast_result(rmodel.inputconst(lltype.Float, 0.0))
+
     def gct_shrink_array(self, hop):
         return hop.cast_result(rmodel.inputconst(lltype.Bool, False))
@@ -129,6 +129,9 @@ class GCManagedHeap(object):
     def can_move(self, addr):
         return self.gc.can_move(addr)
 
+    def get_stats(self, stats_no):
+        return self.gc.get_stats(stats_no)
+
     def pin(self, addr):
         return self.gc.pin(addr)
 
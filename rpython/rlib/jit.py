@@ -551,7 +551,23 @@ PARAMETER_DOCS = {
     'max_unroll_loops': 'number of extra unrollings a loop can cause',
     'enable_opts': 'INTERNAL USE ONLY (MAY NOT WORK OR LEAD TO CRASHES): '
                    'optimizations to enable, or all = %s' % ENABLE_ALL_OPTS,
-    'max_unroll_recursion': 'how many levels deep to unroll a recursive function'
+    'max_unroll_recursion': 'how many levels deep to unroll a recursive function',
+    'loop_code_budget': 'maximum size in KB of the machine code of the '
+                        'loops kept alive; the coldest loops are freed '
+                        'first (0=no limit)',
+    'warmup_profile': 'file in which to remember the loops that got compiled, '
+                      'to compile them sooner in the next runs (empty=off)',
+    'max_abort_backoff': 'after aborted tracings in a row from the same '
+                         'place, we double the threshold there up to this '
+                         'many times (0=off)',
+    'defer_compilation': 'if 1, loops and bridges that become hot are not '
+                         'traced and compiled until this is set back to 0, '
+                         'e.g. during latency-sensitive work',
+    'compile_budget': 'maximum time in ms spent tracing and compiling in '
+                      'every compile_budget_window; past it, hot loops and '
+                      'bridges wait for the next window (0=no limit)',
+    'compile_budget_window': 'length in ms of the time windows in which '
+                             'compile_budget applies',
     }
 
 PARAMETERS = {'threshold': 1039, # just above 1024, prime
@@ -566,6 +582,12 @@ PARAMETERS = {'threshold': 1039, # just above 1024, prime
               'max_unroll_loops': 0,
               'enable_opts': 'all',
               'max_unroll_recursion': 7,
+              'loop_code_budget': 0,
+              'warmup_profile': '',
+              'max_abort_backoff': 6,
+              'defer_compilation': 0,
+              'compile_budget': 0,
+              'compile_budget_window': 100,
               }
 unroll_parameters = unrolling_iterable(PARAMETERS.items())
 
@@ -786,9 +808,12 @@ def set_user_param(driver, text):
         value = parts[1]
         if name == 'enable_opts':
             set_param(driver, 'enable_opts', value)
+        elif name == 'warmup_profile':
+            set_param(driver, 'warmup_profile', value)
         else:
             for name1, _ in unroll_parameters:
-                if name1 == name and name1 != 'enable_opts':
+                if (name1 == name and name1 != 'enable_opts' and
+                        name1 != 'warmup_profile'):
                     try:
                         set_param(driver, name1, int(value))
                     except ValueError:
@@ -952,7 +977,7 @@ class ExtSetParam(ExtRegistryEntry):
     def compute_result_annotation(self, s_driver, s_name, s_value):
         from rpython.annotator import model as annmodel
         assert s_name.is_constant()
-        if s_name.const == 'enable_opts':
+        if s_name.const in ('enable_opts', 'warmup_profile'):
             assert annmodel.SomeString(can_be_None=True).contains(s_value)
         else:
             assert (s_value == annmodel.s_None or
@@ -967,7 +992,7 @@ class ExtSetParam(ExtRegistryEntry):
         hop.exception_cannot_occur()
         driver = hop.inputarg(lltype.Void, arg=0)
         name = hop.args_s[1].const
-        if name == 'enable_opts':
+        if name in ('enable_opts', 'warmup_profile'):
             repr = string_repr
         else:
             repr = lltype.Signed
@@ -1152,6 +1177,12 @@ class Counters(object):
     NVIRTUALS
     NVHOLES
     NVREUSED
+    RESUMEDATA_BYTES
+    RESUMEDATA_BYTES_SHARED
+    EVICTED_LOOPS
+    RECOMPILED_LOOPS
+    TRACING_SKIPPED
+    OVER_COMPILE_BUDGET
     TOTAL_COMPILED_LOOPS
     TOTAL_COMPILED_BRIDGES
     TOTAL_FREED_LOOPS
@@ -4,7 +4,7 @@ from rpython.rlib.objectmodel import specialize
 from rpython.rtyper.annlowlevel import (cast_instance_to_base_ptr,
     cast_base_ptr_to_instance, llstr)
 from rpython.rtyper.extregistry import ExtRegistryEntry
-from rpython.rtyper.lltypesystem import llmemory, lltype
+from rpython.rtyper.lltypesystem import llmemory, lltype, rstr
 from rpython.rtyper import rclass
 
 
@@ -140,3 +140,26 @@ LOOP_RUN_CONTAINER = lltype.GcArray(lltype.Struct('elem',
 @register_helper(lltype.Ptr(LOOP_RUN_CONTAINER))
 def stats_get_loop_run_times(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.get_all_loop_runs()
+
+GUARD_PROFILE_CONTAINER = lltype.GcArray(lltype.Struct('elem',
+                                       ('type', lltype.Char),
+                                       ('loop_no', lltype.Signed),
+                                       ('bridge_no', lltype.Signed),
+                                       ('guard_no', lltype.Signed),
+                                       ('opname', lltype.Ptr(rstr.STR)),
+                                       ('location', lltype.Ptr(rstr.STR)),
+                                       ('fail_count', lltype.Signed),
+                                       ('has_bridge', lltype.Bool)))
+
+@register_helper(annmodel.s_None)
+def stats_set_guard_profiling(warmrunnerdesc, flag):
+    guard_profiler = warmrunnerdesc.metainterp_sd.guard_profiler
+    if flag:
+        guard_profiler.enable()
+    else:
+        guard_profiler.disable()
+
+@register_helper(lltype.Ptr(GUARD_PROFILE_CONTAINER))
+def stats_get_guard_profile(warmrunnerdesc):
+    metainterp_sd = warmrunnerdesc.metainterp_sd
+    return metainterp_sd.guard_profiler.get_all_guards(metainterp_sd)
@@ -7,8 +7,9 @@ in which it does not work.
 """
 
 from __future__ import with_statement
+import sys
 from rpython.annotator import model as annmodel
-from rpython.rlib.rarithmetic import r_int64
+from rpython.rlib.rarithmetic import r_int64, intmask
 from rpython.rtyper.lltypesystem import lltype, rffi
 from rpython.rtyper.extregistry import ExtRegistryEntry
 from rpython.translator.tool.cbuild import ExternalCompilationInfo
@@ -99,3 +100,42 @@ class LongLong2FloatEntry(ExtRegistryEntry):
         [v_longlong] = hop.inputargs(lltype.SignedLongLong)
         hop.exception_cannot_occur()
         return hop.genop("convert_longlong_bytes_to_float", [v_longlong], resulttype=lltype.Float)
+
+
+# -------- storing 32-bit integers inside NaNs --------
+# A float whose high word is 'nan_high_word_int32' is a signalling NaN,
+# which arithmetic never produces (unlike 0x7FF80000 or 0xFFF80000); we
+# use the low word of such NaNs to store a 32-bit integer.  This allows
+# lists of both floats and small integers to be stored as an array of
+# 64-bit values.
+
+nan_high_word_int32 = 0x7FF40000
+
+CAN_ALWAYS_ENCODE_INT32 = (sys.maxint == 2147483647)
+
+def can_encode_int32(intvalue):
+    if CAN_ALWAYS_ENCODE_INT32:
+        return True
+    return intvalue == rffi.cast(lltype.Signed, rffi.cast(rffi.INT, intvalue))
+
+def can_encode_float(floatvalue):
+    return intmask(float2longlong(floatvalue) >> 32) != nan_high_word_int32
+
+def encode_int32_into_longlong_nan(intvalue):
+    return ((rffi.cast(lltype.SignedLongLong, nan_high_word_int32) << 32) |
+            (rffi.cast(lltype.SignedLongLong, intvalue) & 0xFFFFFFFF))
+
+def decode_int32_from_longlong_nan(llvalue):
+    return rffi.cast(lltype.Signed, rffi.cast(rffi.INT, llvalue))
+
+def is_int32_from_longlong_nan(llvalue):
+    return intmask(llvalue >> 32) == nan_high_word_int32
+
+def maybe_decode_longlong_as_float(llvalue):
+    """Return the float value of 'llvalue', which is either the bit
+    pattern of a float or an encoded 32-bit integer.  Converting a
+    32-bit integer to a float is always exact."""
+    if is_int32_from_longlong_nan(llvalue):
+        return float(decode_int32_from_longlong_nan(llvalue))
+    else:
+        return longlong2float(llvalue)
@@ -413,6 +413,56 @@ class AddMemoryPressureEntry(ExtRegistryEntry):
                          resulttype=lltype.Void)
 
 
+# numbers for get_stats()
+TOTAL_MEMORY_RELEASED = 0     # bytes given back to the OS so far
+MINOR_COLLECTIONS = 1
+MAJOR_COLLECTIONS = 2         # completed major collections
+BYTES_PROMOTED = 3            # bytes copied out of the nursery so far
+PINNED_OBJECTS = 4            # pinned objects currently in the nursery
+ARENA_MEMORY_USED = 5         # bytes of the arenas used by objects
+ARENA_MEMORY_ALLOCATED = 6    # bytes of the arenas allocated
+RAWMALLOCED_MEMORY = 7        # bytes of the large objects
+# time spent in each phase of the GC, in read_timestamp() ticks
+TIME_MINOR = 8
+TIME_MARKING = 9
+TIME_SWEEPING = 10
+TIME_FINALIZING = 11
+# the longest single pause of each phase, in read_timestamp() ticks
+MAX_TIME_MINOR = 12
+MAX_TIME_MARKING = 13
+MAX_TIME_SWEEPING = 14
+MAX_TIME_FINALIZING = 15
+# number of pauses in each bucket of the histogram: bucket 0 counts the
+# pauses shorter than PAUSE_HISTOGRAM_FIRST ticks, and every following
+# bucket has a limit twice larger; the last one counts all longer pauses.
+# A pause is a minor collection or a single step of a major collection.
+PAUSE_HISTOGRAM = 16
+PAUSE_HISTOGRAM_BUCKETS = 16
+PAUSE_HISTOGRAM_FIRST = 65536.0
+GC_STATS_COUNT = PAUSE_HISTOGRAM + PAUSE_HISTOGRAM_BUCKETS
+
+def get_stats(stats_no):
+    """Return one of the statistics of the GC, selected by 'stats_no'
+    (one of the constants above), as a float: some of them don't fit
+    in a machine word on 32-bit.  Always 0.0 with GCs that don't track
+    them.  Cheap enough to be called often.
+    """
+    return 0.0
+
+class GetStatsEntry(ExtRegistryEntry):
+    _about_ = get_stats
+
+    def compute_result_annotation(self, s_stats_no):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeFloat()
+
+    def specialize_call(self, hop):
+        [v_stats_no] = hop.inputargs(lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_get_stats', [v_stats_no],
+                         resulttype=lltype.Float)
+
+
 def get_rpy_memory_usage(gcref):
     "NOT_RPYTHON"
     # approximate implementation using CPython's type info
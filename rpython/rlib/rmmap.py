@@ -72,6 +72,8 @@ if _POSIX:
     CConfig.has_mremap = rffi_platform.Has('mremap(NULL, 0, 0, 0)')
     # a dirty hack, this is probably a macro
 
+    CConfig.has_madvise = rffi_platform.Has('madvise(NULL, 0, 0)')
+
 elif _MS_WINDOWS:
     constant_names = ['PAGE_READONLY', 'PAGE_READWRITE', 'PAGE_WRITECOPY',
                       'FILE_MAP_READ', 'FILE_MAP_WRITE', 'FILE_MAP_COPY',
@@ -99,6 +101,18 @@ if _POSIX:
     assert constants["MAP_ANONYMOUS"] is not None
     constants["MAP_ANON"] = constants["MAP_ANONYMOUS"]
 
+    # internal use only, not exported as a constant
+    del constants["has_madvise"]
+    if cConfig["has_madvise"]:
+        class MAdviseCConfig:
+            _compilation_info_ = CConfig._compilation_info_
+            MADV_DONTNEED = rffi_platform.DefinedConstantInteger(
+                "MADV_DONTNEED")
+        MADV_DONTNEED = rffi_platform.configure(
+            MAdviseCConfig)["MADV_DONTNEED"]
+    else:
+        MADV_DONTNEED = None
+
 locals().update(constants)
 
 _ACCESS_DEFAULT, ACCESS_READ, ACCESS_WRITE, ACCESS_COPY = range(4)
@@ -154,6 +168,10 @@ if _POSIX:
     if has_mremap:
         c_mremap, _ = external('mremap',
                                [PTR, size_t, size_t, rffi.ULONG], PTR)
+    has_madvise = MADV_DONTNEED is not None
+    if has_madvise:
+        _, c_madvise_safe = external('madvise', [PTR, size_t, rffi.INT],
+                                     rffi.INT, _nowrapper=True)
 
     # this one is always safe
     _pagesize = rffi_platform.getintegerfunctionresult('getpagesize',
@@ -709,6 +727,17 @@ if _POSIX:
         res = c_mmap_safe(addr, map_size, prot, flags, -1, 0)
         return res == addr
 
+    def release_memory_chunk_aligned(addr, map_size):
+        """Tell the OS that it can reclaim the pages in the given range,
+        which must be page-aligned; their content is lost.  Returns False
+        if this is not supported."""
+        if not has_madvise:
+            return False
+        addr = rffi.cast(PTR, addr)
+        res = c_madvise_safe(addr, rffi.cast(size_t, map_size),
+                             rffi.cast(rffi.INT, MADV_DONTNEED))
+        return rffi.cast(lltype.Signed, res) == 0
+
     # XXX is this really necessary?
     class Hint:
         pos = -0x4fff0000   # for reproducible results
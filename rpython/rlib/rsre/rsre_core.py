@@ -131,6 +131,10 @@ class AbstractMatchContext(object):
         """NOT_RPYTHON: Similar to str()."""
         raise NotImplementedError
 
+    def find_char(self, c, start, end):
+        """NOT_RPYTHON: Index of the first char 'c' in [start, end), or -1."""
+        raise NotImplementedError
+
     def get_mark(self, gid):
         return find_mark(self.match_marks, gid)
 
@@ -191,6 +195,13 @@ class BufMatchContext(AbstractMatchContext):
         c = self.str(index)
         return rsre_char.getlower(c, self.flags)
 
+    def find_char(self, c, start, end):
+        while start < end:
+            if self.str(start) == c:
+                return start
+            start += 1
+        return -1
+
     def fresh_copy(self, start):
         return BufMatchContext(self.pattern, self._buffer, start,
                                self.end, self.flags)
@@ -214,6 +225,13 @@ class StrMatchContext(AbstractMatchContext):
         c = self.str(index)
         return rsre_char.getlower(c, self.flags)
 
+    def find_char(self, c, start, end):
+        if not we_are_translated() and isinstance(self._string, unicode):
+            return self._string.find(unichr(c), start, end)
+        if c > 255:
+            return -1
+        return self._string.find(chr(c), start, end)
+
     def fresh_copy(self, start):
         return StrMatchContext(self.pattern, self._string, start,
                                self.end, self.flags)
@@ -235,6 +253,9 @@ class UnicodeMatchContext(AbstractMatchContext):
         c = self.str(index)
         return rsre_char.getlower(c, self.flags)
 
+    def find_char(self, c, start, end):
+        return self._unicodestr.find(unichr(c), start, end)
+
     def fresh_copy(self, start):
         return UnicodeMatchContext(self.pattern, self._unicodestr, start,
                                    self.end, self.flags)
@@ -1076,10 +1097,14 @@ def literal_search(ctx, base):
     while start < ctx.end:
         ctx.jitdriver_LiteralSearch.jit_merge_point(ctx=ctx, start=start,
                                           base=base, character=character)
-        if ctx.str(start) == character:
-            if sre_match(ctx, base, start + 1, None) is not None:
-                ctx.match_start = start
-                return True
+        # skip directly to the next occurrence of the character, instead
+        # of going around this loop once per position
+        start = ctx.find_char(character, start, ctx.end)
+        if start < 0:
+            break
+        if sre_match(ctx, base, start + 1, None) is not None:
+            ctx.match_start = start
+            return True
         start += 1
     return False
 
@@ -1126,6 +1151,13 @@ def fast_search(ctx):
                 overlap_offset = prefix_len + (7 - 1)
                 i = ctx.pat(overlap_offset + i)
                 continue
+            # no partial match: skip directly to the next occurrence of
+            # the first character of the prefix
+            string_position = ctx.find_char(ctx.pat(7), string_position + 1,
+                                            ctx.end)
+            if string_position < 0:
+                return False
+            continue
         else:
             i += 1
             if i == prefix_len:
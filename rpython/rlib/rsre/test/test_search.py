@@ -25,6 +25,43 @@ class TestSearch:
         assert res is not None
         assert res.span() == (8, 14)
 
+    def test_literal_search(self):
+        r_code = get_code(r'a\d+')
+        res = rsre_core.search(r_code, "xxaxxaaxa12xa3")
+        assert res.span() == (8, 11)
+        res = rsre_core.search(r_code, "xxaxxaaxa12xa3", 9)
+        assert res.span() == (12, 14)
+        res = rsre_core.search(r_code, "xxaxxaaxa12xa3", 0, 10)
+        assert res.span() == (8, 10)
+        res = rsre_core.search(r_code, "xxaxxaaxa12xa3", 0, 9)
+        assert res is None
+        res = rsre_core.search(r_code, "xxxxxxxx")
+        assert res is None
+
+    def test_fast_search_overlap(self):
+        r_code = get_code(r'abab\d')
+        res = rsre_core.search(r_code, "xabxaababab1xabab2")
+        assert res.span() == (7, 12)
+        res = rsre_core.search(r_code, "xabxaababab1xabab2", 8)
+        assert res.span() == (13, 18)
+        res = rsre_core.search(r_code, "xabxaababab1xabab2", 8, 17)
+        assert res is None
+
+    def test_literal_search_other_contexts(self):
+        from rpython.rlib.buffer import StringBuffer
+        for pattern, expected in [(r'a\d+', (9, 12)),
+                                  (r'abab\d', (12, 17))]:
+            r_code = get_code(pattern)
+            s = "xabxaababa12abab1"
+            ctx = rsre_core.BufMatchContext(r_code, StringBuffer(s),
+                                            0, len(s), 0)
+            assert rsre_core.search_context(ctx)
+            assert ctx.span() == expected
+            u = u"\u1234ab\u1234aababa12abab1"
+            ctx = rsre_core.UnicodeMatchContext(r_code, u, 0, len(u), 0)
+            assert rsre_core.search_context(ctx)
+            assert ctx.span() == expected
+
     def test_code3(self):
         r_code1 = get_code(r'<item>\s*<title>(.*?)</title>')
         res = rsre_core.match(r_code1, "<item>  <title>abc</title>def")
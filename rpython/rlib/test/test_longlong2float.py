@@ -63,3 +63,28 @@ def test_compiled_single():
     for x in enum_floats():
         res = fn2(x)
         assert repr(res) == repr(float(r_singlefloat(x)))
+
+# ____________________________________________________________
+
+def test_encode_int32_into_longlong_nan():
+    from rpython.rlib.longlong2float import (can_encode_int32,
+        can_encode_float, encode_int32_into_longlong_nan,
+        decode_int32_from_longlong_nan, is_int32_from_longlong_nan,
+        maybe_decode_longlong_as_float)
+    for x in enum_floats():
+        if can_encode_float(x):
+            assert not is_int32_from_longlong_nan(float2longlong(x))
+    assert can_encode_float(float('nan'))
+    assert can_encode_float(-float('nan'))
+    assert can_encode_int32(-2**31)
+    assert can_encode_int32(2**31 - 1)
+    #
+    def f(x):
+        ll = encode_int32_into_longlong_nan(x)
+        assert is_int32_from_longlong_nan(ll)
+        assert not can_encode_float(longlong2float(ll))
+        assert maybe_decode_longlong_as_float(ll) == float(x)
+        return decode_int32_from_longlong_nan(ll)
+    for x in [0, 1, -1, 42, -2**31, 2**31 - 1]:
+        assert f(x) == x
+        assert interpret(f, [x]) == x
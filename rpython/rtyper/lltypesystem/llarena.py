@@ -52,7 +52,13 @@ class Arena(object):
                 del self.objectptrs[offset]
                 del self.objectsizes[offset]
                 obj._free()
-        if zero and zero != 3:
+        if zero == 4:
+            # the content is undefined, but what was zero stays zero
+            for i in range(start, stop):
+                if self.usagemap[i] != '0':
+                    self.usagemap[i] = '#'
+            return
+        if zero == 1 or zero == 2:
             initialbyte = "0"
         else:
             initialbyte = "#"
@@ -335,6 +341,9 @@ def arena_reset(arena_addr, size, zero):
       * 1: clear, optimized for a very large area of memory
       * 2: clear, optimized for a small or medium area of memory
       * 3: fill with garbage
+      * 4: give the memory back to the OS if possible; the content is
+           undefined afterwards, except that a range that was already
+           zero stays zero
     """
     arena_addr = getfakearenaaddress(arena_addr)
     arena_addr.arena.reset(zero, arena_addr.offset, size)
@@ -435,6 +444,24 @@ if os.name == 'posix':
         if size > 0:    # clear the final misaligned part, if any
             llmemory.raw_memclear(baseaddr, size)
 
+    def release_memory_chunk(baseaddr, size):
+        from rpython.rlib import rmmap
+
+        pagesize = posixpagesize.pagesize
+        if pagesize == 0:
+            pagesize = rffi.cast(lltype.Signed, legacy_getpagesize())
+            posixpagesize.pagesize = pagesize
+
+        # only the pages that are entirely inside the range can be released
+        lowbits = rffi.cast(lltype.Signed, baseaddr) & (pagesize - 1)
+        if lowbits:
+            partpage = pagesize - lowbits
+            baseaddr += partpage
+            size -= partpage
+        length = size & -pagesize
+        if length > 0:
+            rmmap.release_memory_chunk_aligned(baseaddr, length)
+
 else:
     # XXX any better implementation on Windows?
     # Should use VirtualAlloc() to reserve the range of pages,
@@ -443,6 +470,9 @@ else:
     # them immediately.
     clear_large_memory_chunk = llmemory.raw_memclear
 
+    def release_memory_chunk(baseaddr, size):
+        pass
+
 if os.name == "posix":
     from rpython.translator.tool.cbuild import ExternalCompilationInfo
     _eci = ExternalCompilationInfo(includes=['sys/mman.h'])
@@ -509,6 +539,8 @@ def llimpl_arena_reset(arena_addr, size, zero):
             clear_large_memory_chunk(arena_addr, size)
         elif zero == 3:
             llop.raw_memset(lltype.Void, arena_addr, ord('#'), size)
+        elif zero == 4:
+            release_memory_chunk(arena_addr, size)
         else:
             llmemory.raw_memclear(arena_addr, size)
 llimpl_arena_reset._always_inline_ = True
@@ -206,6 +206,21 @@ def test_partial_arena_reset():
     py.test.raises(lltype.UninitializedMemoryAccess,
           "(blist[2] + llmemory.offsetof(SX, 'x')).signed[0]")
 
+def test_arena_reset_release():
+    a = arena_malloc(50, True)
+    b = a + llmemory.raw_malloc_usage(precomputed_size)
+    arena_reserve(a, precomputed_size)
+    (a + llmemory.offsetof(SX, 'x')).signed[0] = 123
+    # mode 4 gives the pages back to the OS: the content is undefined,
+    # except that what was zero stays zero
+    arena_reset(a, 50, 4)
+    arena_reserve(a, precomputed_size)
+    arena_reserve(b, precomputed_size)
+    py.test.raises(lltype.UninitializedMemoryAccess,
+          "(a + llmemory.offsetof(SX, 'x')).signed[0]")
+    assert (b + llmemory.offsetof(SX, 'x')).signed[0] == 0
+    arena_free(a)
+
 def test_address_eq_as_int():
     a = arena_malloc(50, False)
     arena_reserve(a, precomputed_size)
@@ -1610,6 +1610,35 @@ class TestIncrementalMiniMarkGC(TestMiniMarkGC):
         res = self.run("random_pin")
         assert res == 28495
 
+    def define_gc_stats(self):
+        class A:
+            pass
+        def f():
+            alist = []
+            for i in range(100000):
+                alist.append(A())
+                if len(alist) > 100:
+                    alist = []
+            rgc.collect()
+            result = 0
+            if rgc.get_stats(rgc.MINOR_COLLECTIONS) > 0:
+                result += 1
+            if rgc.get_stats(rgc.MAJOR_COLLECTIONS) > 0:
+                result += 10
+            if rgc.get_stats(rgc.TIME_MINOR) > 0.0:
+                result += 100
+            npauses = 0.0
+            for i in range(rgc.PAUSE_HISTOGRAM_BUCKETS):
+                npauses += rgc.get_stats(rgc.PAUSE_HISTOGRAM + i)
+            if npauses >= rgc.get_stats(rgc.MINOR_COLLECTIONS):
+                result += 1000
+            return result
+        return f
+
+    def test_gc_stats(self):
+        res = self.run("gc_stats")
+        assert res == 1111
+
     define_limited_memory_linux = TestMiniMarkGC.define_limited_memory.im_func
 
     def test_limited_memory_linux(self):
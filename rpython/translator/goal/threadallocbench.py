@@ -0,0 +1,94 @@
+"""
+Allocation throughput of several threads that keep switching.
+
+Every thread builds and drops small trees and lists, i.e. it allocates
+mostly short-lived objects in the nursery.  The GIL is released often
+(see --interval), so that the threads take turns much more frequently
+than the nursery fills up.  Run it on top of a translated pypy, once as
+it is and once with per-thread nursery chunks enabled, e.g.:
+
+    pypy threadallocbench.py --threads=4
+    PYPY_GC_NURSERY_CHUNK=64KB pypy threadallocbench.py --threads=4
+
+The number printed at the end is the total number of objects allocated
+per second, summed over all threads.
+"""
+import sys, time
+
+USAGE = """threadallocbench [num_repetitions] [--threads=N] [--count=N]
+                 [--interval=N]"""
+
+
+class Node(object):
+
+    def __init__(self, l=None, r=None):
+        self.left = l
+        self.right = r
+
+def make_tree(depth):
+    "Build tree bottom-up; returns the number of objects allocated"
+    if depth <= 0:
+        return Node(), 1
+    left, n1 = make_tree(depth - 1)
+    right, n2 = make_tree(depth - 1)
+    return Node(left, right), n1 + n2 + 1
+
+def allocate(count, results, index):
+    total = 0
+    for i in range(count):
+        tree, n = make_tree(6)
+        lst = [tree] * 8
+        total += n + 1
+        tree = lst = None
+    results[index] = total
+
+def run(nthreads, count):
+    import threading
+    results = [0] * nthreads
+    threadlist = []
+    t_start = time.time()
+    for n in range(nthreads):
+        t = threading.Thread(target=allocate, args=(count, results, n))
+        t.start()
+        threadlist.append(t)
+    for t in threadlist:
+        t.join()
+    t_finish = time.time()
+    return sum(results), t_finish - t_start
+
+def main(nthreads, count):
+    print "%d threads, %d trees each" % (nthreads, count)
+    nobjects, elapsed = run(nthreads, count)
+    print "\t%d objects in %f ms" % (nobjects, elapsed * 1000.)
+    print "\t%f objects/second" % (nobjects / elapsed,)
+
+
+def argerror():
+    print "Usage:"
+    print "   ", USAGE
+    return 2
+
+def entry_point(argv):
+    nthreads = 4
+    count = 20000
+    interval = 10
+    repeatcount = 1
+    for arg in argv[1:]:
+        try:
+            if arg.startswith('--threads='):
+                nthreads = int(arg[len('--threads='):])
+            elif arg.startswith('--count='):
+                count = int(arg[len('--count='):])
+            elif arg.startswith('--interval='):
+                interval = int(arg[len('--interval='):])
+            else:
+                repeatcount = int(arg)
+        except ValueError:
+            return argerror()
+    sys.setcheckinterval(interval)
+    for i in range(repeatcount):
+        main(nthreads, count)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(entry_point(sys.argv))